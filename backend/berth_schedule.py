@@ -0,0 +1,203 @@
+"""Vessel schedule and berth occupancy, answered from an in-memory interval index.
+
+The agent and the dashboard ask range questions about the schedule:
+"which vessels arrive in the next 12 hours?", "who is at CT1-B3 on
+Friday?".  Each voyage is a stay from ``eta`` to ``etd`` at a berth; the
+index keeps, per berth, the stays sorted by arrival together with the
+longest stay seen there, so an overlap query is one bisect plus a short
+backwards walk bounded by that length.  Arrivals and departures are two
+port-wide sorted lists.
+
+The index is loaded at startup from an indexed storage query (stays that
+end after ``now - history``) and kept current by ``upsert``/``remove`` on
+every schedule write made through this server, like the gate-lane map.
+Writes made by other worker processes arrive with the periodic rebuild
+(``refresh.py``); this process's own writes made while a rebuild was
+querying are applied again to the rebuilt index.  Windows that start
+before the loaded horizon fall back to storage.
+"""
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from metrics import BERTH_QUERY_SECONDS
+from records import FULL, VesselRecord, parse_utc
+
+# Far enough ahead to load every scheduled call
+_FAR_FUTURE = datetime(9999, 1, 1)
+
+Stay = Tuple[datetime, datetime, str]  # (eta, etd, voyageNumber)
+
+
+class BerthIntervals:
+    """Stays at one berth, sorted by arrival."""
+
+    def __init__(self):
+        self.stays: List[Stay] = []
+        # Upper bound on any stay's length, so overlap walks know when to stop
+        self.longest = timedelta(0)
+
+    def __len__(self):
+        return len(self.stays)
+
+    def add(self, stay: Stay):
+        insort(self.stays, stay)
+        self.longest = max(self.longest, stay[1] - stay[0])
+
+    def remove(self, stay: Stay):
+        i = bisect_left(self.stays, stay)
+        if i < len(self.stays) and self.stays[i] == stay:
+            del self.stays[i]
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Stay]:
+        """Stays with ``eta < end`` and ``etd > start``, by arrival."""
+        hi = bisect_left(self.stays, (end,))
+        earliest = start - self.longest
+        matches = []
+        for i in range(hi - 1, -1, -1):
+            stay = self.stays[i]
+            if stay[0] < earliest:
+                break
+            if stay[1] > start:
+                matches.append(stay)
+        matches.reverse()
+        return matches
+
+
+class BerthSchedule:
+    def __init__(self, get_storage: Callable, history: timedelta = timedelta(days=30)):
+        self.get_storage = get_storage
+        self.history = history
+        self.vessels: Dict[str, VesselRecord] = {}
+        self.stays: Dict[str, Stay] = {}
+        self.berths: Dict[str, BerthIntervals] = {}
+        self.arrivals_by_time: List[Tuple[datetime, str]] = []
+        self.departures_by_time: List[Tuple[datetime, str]] = []
+        self.horizon: Optional[datetime] = None
+        # Voyages upserted while a rebuild is querying storage, applied again once it lands
+        self._since_fetch: Optional[List[VesselRecord]] = None
+
+    def __len__(self):
+        return len(self.stays)
+
+    def load(self, now: Optional[datetime] = None):
+        """Rebuild the index from storage (indexed ``etd`` range query)."""
+        self.install(self.fetch(now))
+
+    def fetch(self, now: Optional[datetime] = None) -> "BerthSchedule":
+        """A freshly loaded index, for ``install``."""
+        self._since_fetch = []
+        horizon = (now or datetime.utcnow()) - self.history
+        fresh = BerthSchedule(self.get_storage, self.history)
+        for vessel in self.get_storage().vessels.find_overlapping(horizon, _FAR_FUTURE):
+            fresh.upsert(vessel)
+        fresh.horizon = horizon
+        return fresh
+
+    def install(self, fresh: "BerthSchedule"):
+        for vessel in self._since_fetch or []:
+            fresh.upsert(vessel)
+        self._since_fetch = None
+        self.vessels, self.stays, self.berths = fresh.vessels, fresh.stays, fresh.berths
+        self.arrivals_by_time, self.departures_by_time = fresh.arrivals_by_time, fresh.departures_by_time
+        self.horizon = fresh.horizon
+
+    def upsert(self, vessel: VesselRecord):
+        """Index a new or rescheduled voyage, replacing its previous stay."""
+        if self._since_fetch is not None:
+            self._since_fetch.append(vessel)
+        voyage = vessel.get("voyageNumber")
+        self.remove(voyage)
+        eta, etd = parse_utc(vessel.get("eta")), parse_utc(vessel.get("etd"))
+        if not voyage or eta is None or etd is None:
+            return
+        stay = (eta, etd, voyage)
+        self.vessels[voyage] = vessel
+        self.stays[voyage] = stay
+        insort(self.arrivals_by_time, (eta, voyage))
+        insort(self.departures_by_time, (etd, voyage))
+        if vessel.get("berth"):
+            self.berths.setdefault(vessel.get("berth"), BerthIntervals()).add(stay)
+
+    def remove(self, voyage_number: Optional[str]):
+        if not voyage_number or voyage_number not in self.stays:
+            return
+        stay = self.stays.pop(voyage_number)
+        vessel = self.vessels.pop(voyage_number)
+        _discard(self.arrivals_by_time, (stay[0], voyage_number))
+        _discard(self.departures_by_time, (stay[1], voyage_number))
+        intervals = self.berths.get(vessel.get("berth"))
+        if intervals is not None:
+            intervals.remove(stay)
+            if not intervals:
+                del self.berths[vessel.get("berth")]
+
+    def arrivals(self, start: datetime, end: datetime, profile: str = FULL) -> List[VesselRecord]:
+        """Vessels with ``start <= eta < end``, in arrival order."""
+        return self._between("arrivals", self.arrivals_by_time, "eta", start, end, profile)
+
+    def departures(self, start: datetime, end: datetime, profile: str = FULL) -> List[VesselRecord]:
+        """Vessels with ``start <= etd < end``, in departure order."""
+        return self._between("departures", self.departures_by_time, "etd", start, end, profile)
+
+    def occupancy(self, berth: str, start: datetime, end: datetime, profile: str = FULL) -> List[VesselRecord]:
+        """Vessels alongside ``berth`` at any time between ``start`` and ``end``, by arrival."""
+        started = perf_counter()
+        if self._loaded(start):
+            source = "hot"
+            intervals = self.berths.get(berth)
+            stays = intervals.overlapping(start, end) if intervals is not None else []
+            vessels = [self.vessels[voyage].project(profile) for _, _, voyage in stays]
+        else:
+            source = "storage"
+            vessels = self.get_storage().vessels.find_overlapping(start, end, berth, profile)
+        BERTH_QUERY_SECONDS.labels("occupancy", source).observe(perf_counter() - started)
+        return vessels
+
+    def at(self, instant: datetime, profile: str = FULL) -> Dict[str, List[VesselRecord]]:
+        """Vessels alongside each occupied berth at ``instant``."""
+        started = perf_counter()
+        end = instant + timedelta(microseconds=1)
+        occupied = {}
+        if self._loaded(instant):
+            source = "hot"
+            for berth, intervals in self.berths.items():
+                stays = intervals.overlapping(instant, end)
+                if stays:
+                    occupied[berth] = [self.vessels[voyage].project(profile) for _, _, voyage in stays]
+        else:
+            source = "storage"
+            for vessel in self.get_storage().vessels.find_overlapping(instant, end, profile=profile):
+                if vessel.get("berth"):
+                    occupied.setdefault(vessel.get("berth"), []).append(vessel)
+        BERTH_QUERY_SECONDS.labels("at", source).observe(perf_counter() - started)
+        return dict(sorted(occupied.items()))
+
+    def _loaded(self, start: datetime) -> bool:
+        return self.horizon is not None and start >= self.horizon
+
+    def _between(self, query: str, times: List[Tuple[datetime, str]], field: str, start: datetime, end: datetime,
+                 profile: str) -> List[VesselRecord]:
+        started = perf_counter()
+        if self._loaded(start):
+            source = "hot"
+            lo, hi = bisect_left(times, (start,)), bisect_left(times, (end,))
+            vessels = [self.vessels[voyage].project(profile) for _, voyage in times[lo:hi]]
+        else:
+            # Every stay with its eta (etd) in the window overlaps it (widened by a tick so a
+            # departure exactly at ``start`` counts); keep only those
+            source = "storage"
+            overlapping = self.get_storage().vessels.find_overlapping(start - timedelta(microseconds=1), end)
+            dated = [(parse_utc(vessel.get(field)), vessel) for vessel in overlapping]
+            in_window = [(at, vessel) for at, vessel in dated if at is not None and start <= at < end]
+            in_window.sort(key=lambda item: item[0])
+            vessels = [vessel.project(profile) for _, vessel in in_window]
+        BERTH_QUERY_SECONDS.labels(query, source).observe(perf_counter() - started)
+        return vessels
+
+
+def _discard(times: List[Tuple[datetime, str]], entry: Tuple[datetime, str]):
+    i = bisect_left(times, entry)
+    if i < len(times) and times[i] == entry:
+        del times[i]
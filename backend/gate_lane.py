@@ -0,0 +1,135 @@
+"""Gate-lane lookup: resolve a truck plate or gatepass id at the gate.
+
+Lane systems ask "may this truck leave with its container?" many times a
+second, usually by plate (read by ANPR) or by the gatepass id the driver
+shows.  ACTIVE gatepasses are kept in a hot in-memory map keyed by id and
+by normalized plate, loaded from an indexed query at startup and kept
+current by ``activate`` (gatepass generated) and ``deactivate`` (expired or
+used), so a hit costs two dict lookups plus one indexed container read.
+Misses fall back to the indexed storage queries so the lane still gets a
+precise reason ("gatepass EXPIRED", "no gatepass for truck").
+"""
+from datetime import datetime
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+
+from metrics import GATE_LOOKUP_SECONDS
+from records import GatepassRecord, normalize_plate
+
+
+class ActiveGatepasses:
+    """ACTIVE gatepasses by id and by normalized truck plate."""
+
+    def __init__(self):
+        self.by_id: Dict[str, GatepassRecord] = {}
+        self.by_truck: Dict[str, Dict[str, GatepassRecord]] = {}
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def add(self, gatepass: GatepassRecord):
+        self.remove(gatepass.id)
+        self.by_id[gatepass.id] = gatepass
+        self.by_truck.setdefault(normalize_plate(gatepass.get("truckNumber")), {})[gatepass.id] = gatepass
+
+    def remove(self, gatepass_id: str) -> Optional[GatepassRecord]:
+        gatepass = self.by_id.pop(gatepass_id, None)
+        if gatepass is not None:
+            plate = normalize_plate(gatepass.get("truckNumber"))
+            passes = self.by_truck.get(plate)
+            if passes is not None:
+                passes.pop(gatepass_id, None)
+                if not passes:
+                    del self.by_truck[plate]
+        return gatepass
+
+    def for_truck(self, truck_number: str) -> List[GatepassRecord]:
+        return list(self.by_truck.get(normalize_plate(truck_number), {}).values())
+
+    def clear(self):
+        self.by_id.clear()
+        self.by_truck.clear()
+
+
+def gate_eligibility(gatepass: GatepassRecord, container, now: Optional[datetime] = None) -> List[str]:
+    """Reasons the truck may not take the container out; empty when it may."""
+    now = now or datetime.utcnow()
+    reasons = []
+    if gatepass.get("status") != "ACTIVE":
+        reasons.append(f"Gatepass {gatepass.id} is {gatepass.get('status')}")
+    valid_until = gatepass.get("validUntil")
+    if valid_until and datetime.fromisoformat(valid_until) <= now:
+        reasons.append(f"Gatepass {gatepass.id} expired at {valid_until}")
+    if container is None:
+        reasons.append(f"Container {gatepass.get('containerNumber')} not found")
+        return reasons
+    if container.get("activeGatepass") != gatepass.id:
+        reasons.append("Gatepass has been superseded for this container")
+    if container.get("status") == "GATED_OUT":
+        reasons.append("Container already gated out")
+    if container.get("customsStatus") != "CLEARED":
+        reasons.append("Customs clearance pending")
+    if container.get("edoStatus") != "RELEASED":
+        reasons.append("EDO not released by shipping agent")
+    return reasons
+
+
+class GateLane:
+    # Container fields the lane display needs
+    CONTAINER_FIELDS = ("containerNumber", "status", "location", "containerType", "size",
+                        "customsStatus", "edoStatus", "activeGatepass")
+
+    def __init__(self, get_storage: Callable):
+        self.get_storage = get_storage
+        self.active = ActiveGatepasses()
+
+    def load(self):
+        """Rebuild the hot map from storage (indexed ACTIVE query)."""
+        active = ActiveGatepasses()
+        for gatepass in self.get_storage().gatepasses.find_active():
+            active.add(gatepass)
+        self.active = active
+
+    def activate(self, gatepass: GatepassRecord):
+        self.active.add(gatepass)
+
+    def deactivate(self, gatepass_id: str):
+        self.active.remove(gatepass_id)
+
+    def lookup(self, truck_number: Optional[str] = None, gatepass_id: Optional[str] = None) -> List[Dict]:
+        """Resolve a plate or gatepass id to gatepass, container and eligibility."""
+        started = perf_counter()
+        source = "hot"
+        if gatepass_id:
+            hit = self.active.by_id.get(gatepass_id)
+            gatepasses = [hit] if hit is not None else []
+        elif truck_number:
+            gatepasses = self.active.for_truck(truck_number)
+        else:
+            gatepasses = []
+
+        storage = self.get_storage()
+        if not gatepasses:
+            # Not active (expired, used, unknown): ask storage so the lane gets the real reason
+            source = "storage"
+            if gatepass_id:
+                found = storage.gatepasses.get(gatepass_id)
+                gatepasses = [found] if found is not None else []
+            else:
+                gatepasses = storage.gatepasses.find_by_truck(normalize_plate(truck_number))
+                gatepasses = sorted(gatepasses, key=lambda gp: gp.get("generatedAt") or "", reverse=True)[:1]
+
+        now = datetime.utcnow()
+        results = []
+        for gatepass in gatepasses:
+            container = storage.containers.get(gatepass.get("containerNumber"))
+            reasons = gate_eligibility(gatepass, container, now)
+            results.append({
+                "gatepass": gatepass.project("voice"),
+                "container": ({name: container.get(name) for name in self.CONTAINER_FIELDS}
+                              if container is not None else None),
+                "eligible": not reasons,
+                "reasons": reasons,
+            })
+        GATE_LOOKUP_SECONDS.labels(source).observe(perf_counter() - started)
+        return results
@@ -0,0 +1,186 @@
+"""Background expiry of gatepasses at their ``validUntil``.
+
+ACTIVE gatepasses sit in a min-heap ordered by expiry time, so the engine
+sleeps exactly until the next pass is due instead of scanning the
+collection.  The heap is rebuilt at startup from the indexed
+``(status, validUntil)`` query (passes that expired while the server was
+down are expired straight away) and fed by ``schedule`` whenever a pass is
+generated.
+
+Expiry is a conditional update (only if the pass is still ACTIVE with the
+``validUntil`` it was scheduled with), and the container's
+``activeGatepass`` is cleared only if it still points at the expired pass,
+so passes that were used, extended or superseded in the meantime are left
+alone and stale heap entries never need to be removed eagerly.  When storage
+fails partway through a batch, the passes already expired still get their
+``on_expired`` callback and only the rest go back on the heap.
+"""
+import asyncio
+import heapq
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from metrics import GATEPASS_EXPIRED, GATEPASS_EXPIRY_LAG_SECONDS
+from records import ContainerRecord, GatepassRecord
+
+logger = logging.getLogger(__name__)
+
+# Heap entry: (expiry time, gatepass id, validUntil as stored)
+Entry = Tuple[datetime, str, str]
+ExpiredCallback = Callable[[GatepassRecord, Optional[ContainerRecord]], Awaitable[None]]
+
+
+class GatepassExpiryScheduler:
+    def __init__(self, get_storage: Callable, on_expired: Optional[ExpiredCallback] = None,
+                 batch_size: int = 500, max_sleep: float = 60.0):
+        self.get_storage = get_storage
+        self.on_expired = on_expired
+        self.batch_size = batch_size
+        # Re-check at least this often so wall-clock jumps can't strand a pass
+        self.max_sleep = max_sleep
+        self.expired = 0
+        self._heap: List[Entry] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self):
+        return len(self._heap)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def load(self):
+        """Rebuild the heap from storage; ACTIVE passes arrive in validUntil order."""
+        heap = []
+        for gatepass in self.get_storage().gatepasses.find_active():
+            entry = self._entry(gatepass)
+            if entry is not None:
+                heap.append(entry)
+        heapq.heapify(heap)
+        self._heap = heap
+
+    def schedule(self, gatepass: GatepassRecord):
+        entry = self._entry(gatepass)
+        if entry is None:
+            return
+        wake = not self._heap or entry < self._heap[0]
+        heapq.heappush(self._heap, entry)
+        if wake and self._wakeup is not None:
+            self._wakeup.set()
+
+    def next_due(self) -> Optional[datetime]:
+        return self._heap[0][0] if self._heap else None
+
+    def start(self):
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="gatepass-expiry")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @staticmethod
+    def _entry(gatepass: GatepassRecord) -> Optional[Entry]:
+        valid_until = gatepass.get("validUntil")
+        if not valid_until:
+            return None
+        try:
+            return datetime.fromisoformat(valid_until.rstrip("Z")), gatepass.id, valid_until
+        except ValueError:
+            logger.warning("Gatepass %s has unparseable validUntil %r; not scheduling expiry",
+                           gatepass.id, valid_until)
+            return None
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            due = self.next_due()
+            delay = self.max_sleep if due is None else (due - datetime.utcnow()).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), min(delay, self.max_sleep))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self.expire_due()
+            except Exception:
+                logger.exception("Gatepass expiry batch failed; retrying")
+                await asyncio.sleep(1.0)
+
+    def _pop_due(self, now: datetime) -> List[Entry]:
+        due: List[Entry] = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+            due.append(heapq.heappop(self._heap))
+        return due
+
+    async def expire_due(self, now: Optional[datetime] = None) -> int:
+        """Expire one batch of due passes; returns how many were actually expired."""
+        now = now or datetime.utcnow()
+        due = self._pop_due(now)
+        if not due:
+            return 0
+        try:
+            expired, retry, error = await run_in_threadpool(self._expire, due, now)
+        except Exception:
+            # Storage was not reached at all: put the whole batch back
+            for entry in due:
+                heapq.heappush(self._heap, entry)
+            raise
+        # Only passes that were not transitioned are retried; those that were
+        # would fail the ACTIVE check next time and never get their callback
+        for entry in retry:
+            heapq.heappush(self._heap, entry)
+        for valid_until, gatepass, container in expired:
+            GATEPASS_EXPIRY_LAG_SECONDS.observe(max((now - valid_until).total_seconds(), 0.0))
+            if self.on_expired is not None:
+                try:
+                    await self.on_expired(gatepass, container)
+                except Exception:
+                    logger.exception("Gatepass %s expired but its on_expired callback failed", gatepass.id)
+        if error is not None:
+            raise error
+        return len(expired)
+
+    def _expire(self, due: List[Entry], now: datetime):
+        """(expired passes, entries to retry, the storage error that stopped the batch or None)"""
+        storage = self.get_storage()
+        expired_at = now.isoformat()
+        expired: List[Tuple[datetime, GatepassRecord, Optional[ContainerRecord]]] = []
+        retry: List[Entry] = []
+        error: Optional[Exception] = None
+        for i, (valid_until, gatepass_id, stored_valid_until) in enumerate(due):
+            try:
+                gatepass = storage.gatepasses.update(
+                    gatepass_id, {"status": "EXPIRED", "expiredAt": expired_at},
+                    expected={"status": "ACTIVE", "validUntil": stored_valid_until})
+            except Exception as exc:
+                # This pass and the rest of the batch were not touched
+                retry, error = due[i:], exc
+                break
+            if gatepass is None:
+                continue  # used, extended or already expired
+            try:
+                container = storage.containers.update(
+                    gatepass.get("containerNumber"), {"activeGatepass": None, "lastUpdated": expired_at},
+                    expected={"activeGatepass": gatepass_id})
+            except Exception:
+                # The pass is expired either way; report it so its callback still runs
+                logger.exception("Gatepass %s expired but container %s was not cleared",
+                                 gatepass_id, gatepass.get("containerNumber"))
+                container = None
+            expired.append((valid_until, gatepass, container))
+        self.expired += len(expired)
+        GATEPASS_EXPIRED.inc(len(expired))
+        return expired, retry, error
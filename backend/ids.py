@@ -0,0 +1,120 @@
+"""Monotonic, sortable, coordination-free ids for gatepasses and SSRs.
+
+Ids pack milliseconds since ``EPOCH`` (41 bits), a worker id (10 bits) and
+a per-millisecond sequence (12 bits) into a 63-bit integer, rendered as a
+prefix plus 19 zero-padded digits (``GP0370620648497049600``), so string
+order is creation order and any worker can issue 4096 ids per millisecond
+without talking to the others.
+
+The worker id must be unique across every process on every host.  It
+comes from ``ID_WORKER_ID`` when set (e.g. from a pod ordinal); otherwise
+the server leases one from storage at startup (``worker_lease.py``) and
+installs it with ``use_worker_id``.  Until then, and in scripts that never
+lease, it falls back to the process id, which is only good enough for a
+single process: containers share pids and pids 1024 apart collide.  A
+clock that steps backwards or a sequence that runs out borrows the next
+millisecond rather than blocking, so ids never repeat and never go
+backwards within a worker.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+EPOCH = datetime(2024, 1, 1)
+_EPOCH_MS = int((EPOCH - datetime(1970, 1, 1)).total_seconds() * 1000)
+
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+DIGITS = 19
+
+
+def default_worker_id() -> int:
+    configured = os.environ.get('ID_WORKER_ID')
+    if configured is not None:
+        worker = int(configured)
+        if not 0 <= worker <= MAX_WORKER:
+            raise ValueError(f"ID_WORKER_ID must be between 0 and {MAX_WORKER}, got {worker}")
+        return worker
+    return os.getpid() & MAX_WORKER
+
+
+class IdGenerator:
+    def __init__(self, worker_id: Optional[int] = None, clock=time.time):
+        if worker_id is not None and not 0 <= worker_id <= MAX_WORKER:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER}, got {worker_id}")
+        self._fixed_worker = worker_id
+        self._leased_worker: Optional[int] = None
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._reset()
+        if worker_id is None and hasattr(os, "register_at_fork"):
+            # A forked worker must not keep issuing ids as its parent (nor under its lease)
+            os.register_at_fork(after_in_child=self._forked)
+
+    def use_worker_id(self, worker_id: int):
+        """Issue ids as ``worker_id`` from now on (one leased for this process)."""
+        if not 0 <= worker_id <= MAX_WORKER:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER}, got {worker_id}")
+        with self._lock:
+            self._leased_worker = worker_id
+            self._reset()
+
+    def _forked(self):
+        self._leased_worker = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        if self._fixed_worker is not None:
+            self.worker_id = self._fixed_worker
+        elif self._leased_worker is not None:
+            self.worker_id = self._leased_worker
+        else:
+            self.worker_id = default_worker_id()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def next_int(self) -> int:
+        with self._lock:
+            now_ms = int(self.clock() * 1000) - _EPOCH_MS
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            elif self._sequence < MAX_SEQUENCE:
+                # Same millisecond, or the clock stepped back: stay on the last one
+                self._sequence += 1
+            else:
+                # Sequence exhausted: borrow the next millisecond
+                self._last_ms += 1
+                self._sequence = 0
+            return (self._last_ms << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+
+    def next_id(self, prefix: str) -> str:
+        return f"{prefix}{self.next_int():0{DIGITS}d}"
+
+
+def parse_id(value: str, prefix: str) -> Tuple[datetime, int, int]:
+    """Split an id back into (creation time, worker id, sequence)."""
+    if not value.startswith(prefix) or len(value) != len(prefix) + DIGITS:
+        raise ValueError(f"Not a {prefix} id: {value!r}")
+    number = int(value[len(prefix):])
+    sequence = number & MAX_SEQUENCE
+    worker = (number >> SEQUENCE_BITS) & MAX_WORKER
+    millis = number >> (WORKER_BITS + SEQUENCE_BITS)
+    return EPOCH + timedelta(milliseconds=millis), worker, sequence
+
+
+# Process-wide generator used by the id-producing endpoints
+generator = IdGenerator()
+
+
+def new_gatepass_id() -> str:
+    return generator.next_id("GP")
+
+
+def new_ssr_id() -> str:
+    return generator.next_id("SSR")
@@ -0,0 +1,364 @@
+"""Write-behind journal of tool calls and state transitions.
+
+Every tool call (``JournalMiddleware``) and every state change the
+endpoints make (``record``) becomes an append-only event in the ``events``
+collection, queryable per container in id order, which is creation order
+(``ids``).  Writing it must not add latency to the call, so:
+
+* ``record`` only stamps an id and puts the event on a bounded in-memory
+  queue; a writer thread drains it in batches of up to ``batch_size``,
+  waiting at most ``linger`` for a batch to fill;
+* request bodies are kept as raw bytes and parsed by the writer thread;
+* when the queue is full (storage slower than the calls), new events are
+  dropped and counted, so memory stays bounded and callers never wait on
+  the database or the disk;
+* a batch storage rejects is appended by the writer thread to the spill
+  file (fsynced) and the writer backs off; the spill file is replayed into
+  storage at startup and once storage accepts writes again.  Only the
+  writer (and ``close``, after it has stopped) touches the spill file.
+
+Each process needs a spill file of its own (a replay renames and deletes
+it): ``{worker}`` in ``spill_path`` is replaced by the id generator's
+worker id when the writer starts, so ``uvicorn --workers N`` processes keep
+apart.  The writer holds an exclusive lock on ``<spill file>.lock`` for as
+long as it runs, and at startup also replays every other worker's spill
+file whose lock it can take: a worker that crashed (and whose replacement
+got a different worker id) leaves its events behind for the next process
+to start, while the files of live workers are left alone.
+
+Event ids are unique in storage and replays skip ids already written, so a
+crash mid-replay only repeats work.  What a hard crash can lose is the
+in-memory queue: at most ``linger`` plus one batch write of events.
+"""
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from time import monotonic, perf_counter, sleep
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+from ids import generator
+from metrics import JOURNAL_BATCH_SECONDS, JOURNAL_EVENTS
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks (Windows): other workers' spill files are not adopted
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class EventJournal:
+    def __init__(self, get_storage: Callable, spill_path: Optional[str] = None, batch_size: int = 500,
+                 linger: float = 0.05, max_pending: int = 50_000, retry_interval: float = 5.0):
+        self.get_storage = get_storage
+        self.spill_template = spill_path
+        self.spill_path = _resolve(spill_path)
+        self.batch_size = batch_size
+        self.linger = linger
+        self.retry_interval = retry_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._spill_lock = threading.Lock()
+        self._spill_file: Optional[TextIO] = None
+        self._writer: Optional[threading.Thread] = None
+        self._retry_at = 0.0
+        self._lock_file: Optional[TextIO] = None
+        self._orphans_pending = True
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    # Producers (event loop)
+    def record(self, event_type: str, container_number: Optional[str] = None, data: Optional[Dict] = None,
+               **fields) -> str:
+        """Journal an event; returns its id without waiting for it to be stored."""
+        event: Dict[str, Any] = {"id": generator.next_id("EV"), "type": event_type, "at": datetime.utcnow().isoformat()}
+        if container_number:
+            event["containerNumber"] = container_number
+        if data is not None:
+            event["data"] = data
+        event.update((name, value) for name, value in fields.items() if value is not None)
+        self._put(event)
+        return event["id"]
+
+    def record_call(self, tool: str, body: bytes, status: int, duration: float) -> str:
+        """Journal a tool invocation; the request body is parsed off the event loop."""
+        return self.record("toolCall", tool=tool, status=status, durationMs=round(duration * 1000, 3), body=body)
+
+    def _put(self, event: Dict):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # Storage is this far behind: shed the event rather than block the loop on disk
+            JOURNAL_EVENTS.labels("dropped").inc()
+
+    # Lifecycle
+    def start(self):
+        if self._writer is None:
+            # Resolved again here: the worker id of a forked process differs from its parent's
+            self.spill_path = _resolve(self.spill_template)
+            self._writer = threading.Thread(target=self._run, name="event-journal", daemon=True)
+            self._writer.start()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything recorded so far has been written (or spilled)."""
+        if self._writer is None:
+            return self._queue.empty()
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Drain the queue, then stop the writer; anything still unwritten is spilled."""
+        if self._writer is not None:
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            self._writer.join(timeout)
+            self._writer = None
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, dict):
+                leftover.append(item)
+        if leftover:
+            self._spill(leftover, fsync=True)
+        with self._spill_lock:
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    # Writer thread
+    def _run(self):
+        self._lock_file = self._hold_lock()
+        self._replay()
+        self._adopt_orphans()
+        while True:
+            batch, markers, stop = self._next_batch()
+            if batch:
+                self._write(batch)
+            for marker in markers:
+                marker.set()
+            if stop:
+                return
+            if monotonic() >= self._retry_at and self._has_spill():
+                self._replay()
+            if monotonic() >= self._retry_at and self._orphans_pending:
+                self._adopt_orphans()
+
+    def _next_batch(self):
+        """Up to ``batch_size`` events, waiting ``linger`` for more once the first arrives."""
+        batch, markers = [], []
+        try:
+            item = self._queue.get(timeout=self.retry_interval)
+        except queue.Empty:
+            return batch, markers, False
+        deadline = monotonic() + self.linger
+        while True:
+            if item is _STOP:
+                return batch, markers, True
+            if isinstance(item, threading.Event):
+                # Flush marker: write what came before it right away
+                markers.append(item)
+                return batch, markers, False
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch, markers, False
+            try:
+                item = self._queue.get(timeout=max(deadline - monotonic(), 0))
+            except queue.Empty:
+                return batch, markers, False
+
+    def _write(self, events: List[Dict]):
+        events = [_prepare(event) for event in events]
+        if monotonic() < self._retry_at:
+            # Storage failed recently: spill until the retry instead of waiting on it again
+            self._spill(events, fsync=True)
+            return
+        started = perf_counter()
+        try:
+            self.get_storage().events.insert_many(events)
+        except Exception as exc:
+            logger.warning("Journal batch of %d events not written (%s); spilling to %s",
+                           len(events), exc, self.spill_path)
+            self._retry_at = monotonic() + self.retry_interval
+            self._spill(events, fsync=True)
+            return
+        JOURNAL_BATCH_SECONDS.observe(perf_counter() - started)
+        JOURNAL_EVENTS.labels("written").inc(len(events))
+
+    # Spill file
+    def _spill(self, events: List[Dict], fsync: bool = False):
+        if not self.spill_path:
+            JOURNAL_EVENTS.labels("dropped").inc(len(events))
+            return
+        lines = "".join(json.dumps(_prepare(event), separators=(",", ":")) + "\n" for event in events)
+        with self._spill_lock:
+            if self._spill_file is None:
+                self._spill_file = open(self.spill_path, "a", encoding="utf-8")
+            self._spill_file.write(lines)
+            self._spill_file.flush()
+            if fsync:
+                os.fsync(self._spill_file.fileno())
+        JOURNAL_EVENTS.labels("spilled").inc(len(events))
+
+    def _has_spill(self) -> bool:
+        return self.spill_path is not None and (os.path.exists(self.spill_path) or os.path.exists(self._replay_path()))
+
+    def _replay_path(self) -> str:
+        return f"{self.spill_path}.replaying"
+
+    def _replay(self):
+        """Move the spill file aside and write its events to storage; kept for a retry on failure."""
+        if not self._has_spill():
+            return
+        replay_path = self._replay_path()
+        with self._spill_lock:
+            if not os.path.exists(replay_path):
+                if self._spill_file is not None:
+                    self._spill_file.close()
+                    self._spill_file = None
+                os.replace(self.spill_path, replay_path)
+        self._replay_file(replay_path, self.spill_path)
+
+    def _replay_file(self, replay_path: str, spill_path: str) -> bool:
+        """Write one file's events to storage and delete it; False (file kept) on failure."""
+        replayed = 0
+        try:
+            with open(replay_path, encoding="utf-8") as f:
+                batch = []
+                for line in f:
+                    try:
+                        batch.append(json.loads(line))
+                    except ValueError:
+                        continue  # torn write from a crash
+                    if len(batch) >= self.batch_size:
+                        replayed += self.get_storage().events.insert_many(batch)
+                        batch = []
+                if batch:
+                    replayed += self.get_storage().events.insert_many(batch)
+        except Exception as exc:
+            logger.warning("Journal spill replay failed (%s); retrying in %.0fs", exc, self.retry_interval)
+            self._retry_at = monotonic() + self.retry_interval
+            return False
+        os.remove(replay_path)
+        JOURNAL_EVENTS.labels("replayed").inc(replayed)
+        if replayed:
+            logger.info("Replayed %d journal events from %s", replayed, spill_path)
+        return True
+
+    def _hold_lock(self) -> Optional[TextIO]:
+        """Lock this worker's spill file for the writer's lifetime, waiting out another process's replay of it."""
+        if not self.spill_path or fcntl is None:
+            return None
+        lock_file = open(f"{self.spill_path}.lock", "a", encoding="utf-8")
+        warned = False
+        while True:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return lock_file
+            except BlockingIOError:
+                if not warned:
+                    logger.warning("Waiting for the lock on %s; is another live worker using the same worker id?",
+                                   self.spill_path)
+                    warned = True
+                sleep(self.retry_interval)
+
+    def _orphans(self) -> List[str]:
+        """Other workers' spill files (or interrupted replays of them)."""
+        if not self.spill_template or "{worker}" not in self.spill_template or fcntl is None:
+            return []
+        pattern = os.path.abspath(self.spill_template.format(worker="*"))
+        paths = set(glob.glob(pattern))
+        paths.update(path[:-len(".replaying")] for path in glob.glob(f"{pattern}.replaying"))
+        paths.discard(self.spill_path)
+        return sorted(paths)
+
+    def _adopt_orphans(self):
+        """Replay the spill files of workers that are gone: those whose lock is free."""
+        self._orphans_pending = False
+        for spill_path in self._orphans():
+            with open(f"{spill_path}.lock", "a", encoding="utf-8") as lock_file:
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # its worker is still running and replays it itself
+                for path in (f"{spill_path}.replaying", spill_path):
+                    if os.path.exists(path) and not self._replay_file(path, spill_path):
+                        self._orphans_pending = True
+                        return
+                # Leaving the file closes it and releases the lock.  Lock files are never deleted: a process
+                # still holding the old one would otherwise lock a different file than the next one to come.
+
+
+def _resolve(spill_path: Optional[str]) -> Optional[str]:
+    return os.path.abspath(spill_path.format(worker=generator.worker_id)) if spill_path else None
+
+
+def _prepare(event: Dict) -> Dict:
+    """Parse a tool call's raw request body into ``request`` (and its container number)."""
+    body = event.get("body")
+    if not isinstance(body, (bytes, bytearray)):
+        return event
+    event = dict(event)
+    del event["body"]
+    try:
+        request = json.loads(body) if body else None
+    except ValueError:
+        request = body.decode("utf-8", "replace")
+    if request is not None:
+        event["data"] = {"request": request}
+    if isinstance(request, dict) and request.get("containerNumber") and "containerNumber" not in event:
+        event["containerNumber"] = str(request["containerNumber"])
+    return event
+
+
+class JournalMiddleware:
+    """Pure ASGI middleware journaling each tool call with its body, status and duration."""
+
+    def __init__(self, app, journal: EventJournal, tools: Dict[str, str]):
+        self.app = app
+        self.journal = journal
+        self.tools = tools
+
+    async def __call__(self, scope, receive, send):
+        tool = self.tools.get(scope["path"]) if scope["type"] == "http" else None
+        if tool is None:
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        status_code = 500
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            self.journal.record_call(tool, b"".join(chunks), status_code, perf_counter() - started)
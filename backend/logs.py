@@ -0,0 +1,241 @@
+"""Structured, non-blocking logging correlated per tool call.
+
+``setup_logging`` routes the root logger through a ``QueueHandler`` on a
+bounded queue; a ``QueueListener`` thread formats each record (one JSON
+object per line, or ``LOG_FORMAT=text``) and writes it to stdout.  The
+caller only renders the message and enqueues it, so a slow stdout never
+stalls the event loop: when the writer falls behind and the queue fills,
+records are dropped and counted instead.
+
+``LogContextMiddleware`` gives every tool call a call id (the caller's
+``X-Request-ID`` when sent; echoed on the response) and binds it and the
+tool name to the call, as endpoints later ``bind`` the container number, so
+every record logged while handling the call carries them.  The call ends
+with one record holding its status and ``durationMs``.
+
+High-volume reads can be sampled per tool
+(``LOG_SAMPLE_RATES=getContainerStatus=0.1,checkVesselSchedule=0.1``).  The
+decision is made once per call, so a call is logged completely or not at
+all; warnings, failed calls and slow calls (``LOG_SLOW_MS``) are always
+kept.
+"""
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from time import perf_counter
+from typing import Callable, Dict, Optional
+
+from ids import generator
+from metrics import LOG_QUEUE_DEPTH, LOG_RECORDS_DISCARDED
+
+logger = logging.getLogger(__name__)
+
+# Fields of the tool call being handled, shared by every record logged during it
+_call: ContextVar[Optional[Dict]] = ContextVar("log_call", default=None)
+
+CALL_FIELDS = ("callId", "tool", "containerNumber")
+
+# LogRecord attributes that are not ``extra`` fields
+_STANDARD = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "keep"}
+
+_MAX_CALL_ID = 64
+
+
+def bind(**fields):
+    """Attach fields (e.g. ``containerNumber``) to the current call's log records."""
+    call = _call.get()
+    if call is not None:
+        call.update((name, value) for name, value in fields.items() if value is not None)
+
+
+def parse_sample_rates(value: Optional[str]) -> Dict[str, float]:
+    """``"getContainerStatus=0.1,checkVesselSchedule=0.5"`` -> {tool: fraction of calls logged}"""
+    rates = {}
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        tool, separator, rate = item.partition("=")
+        if not separator:
+            raise ValueError(f"Invalid sample rate {item!r} (expected tool=rate)")
+        rates[tool.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+def _fields(record: logging.LogRecord) -> Dict:
+    return {name: value for name, value in vars(record).items() if name not in _STANDARD and value is not None}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.utcfromtimestamp(record.created).isoformat(timespec="milliseconds") + "Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(_fields(record))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, separators=(",", ":"))
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local runs: time, level, logger, message, then the fields."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = " ".join(f"{name}={value}" for name, value in _fields(record).items())
+        return f"{line} {fields}" if fields else line
+
+
+class CallContextFilter(logging.Filter):
+    """Stamps records with the current call's fields and drops those of unsampled calls."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        call = _call.get()
+        if call is None:
+            return True
+        for name in CALL_FIELDS:
+            if name in call and getattr(record, name, None) is None:
+                setattr(record, name, call[name])
+        if not call["sampled"] and record.levelno < logging.WARNING and not getattr(record, "keep", False):
+            LOG_RECORDS_DISCARDED.labels("sampled").inc()
+            return False
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render in the caller (arguments may change later) but keep the fields for the formatter
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # The writer is behind (slow stdout): lose the record rather than the caller's time
+            LOG_RECORDS_DISCARDED.labels("queue_full").inc()
+
+
+class _Listener(QueueListener):
+    queue: queue.Queue
+    _sentinel = None  # as in QueueListener, which the stubs leave undeclared
+
+    def stop(self, timeout: float = 5.0):
+        if self._thread is None:
+            return
+        try:
+            self.queue.put(self._sentinel, timeout=timeout)
+        except queue.Full:
+            return  # the writer is stuck; its daemon thread dies with the process
+        self._thread.join(timeout)
+        self._thread = None
+
+
+_installed: Dict = {}
+
+
+def setup_logging(level: Optional[str] = None, fmt: Optional[str] = None, stream=None,
+                  max_queue: Optional[int] = None):
+    """Route the root logger through the non-blocking queue (replacing an earlier setup)."""
+    shutdown_logging()
+    level = (level or os.environ.get('LOG_LEVEL', 'INFO')).upper()
+    fmt = (fmt or os.environ.get('LOG_FORMAT', 'json')).lower()
+    if fmt not in ("json", "text"):
+        raise ValueError(f"Unknown LOG_FORMAT {fmt!r} (expected 'json' or 'text')")
+    max_queue = max_queue or int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    log_queue: queue.Queue = queue.Queue(maxsize=max_queue)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(CallContextFilter())
+    listener = _Listener(log_queue, output)
+
+    root = logging.getLogger()
+    _installed.update(handler=handler, listener=listener, level=root.level)
+    root.addHandler(handler)
+    root.setLevel(level)
+    LOG_QUEUE_DEPTH.set_function(log_queue.qsize)
+    listener.start()
+
+
+def shutdown_logging(timeout: float = 5.0):
+    """Detach the queue handler and let the writer finish what is queued."""
+    if not _installed:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_installed["handler"])
+    root.setLevel(_installed["level"])
+    _installed["listener"].stop(timeout)
+    _installed.clear()
+
+
+class LogContextMiddleware:
+    """Pure ASGI middleware giving each tool call a call id, its log context and a closing record."""
+
+    def __init__(self, app, tools: Dict[str, str], sample_rates: Optional[Dict[str, float]] = None,
+                 slow_ms: float = 500.0, rng: Callable[[], float] = random.random):
+        self.app = app
+        self.tools = tools
+        self.sample_rates = sample_rates or {}
+        self.slow_ms = slow_ms
+        self.rng = rng
+
+    async def __call__(self, scope, receive, send):
+        tool = self.tools.get(scope["path"]) if scope["type"] == "http" else None
+        if tool is None:
+            await self.app(scope, receive, send)
+            return
+
+        call_id = _request_id(scope) or generator.next_id("CALL")
+        sampled = self.rng() < self.sample_rates.get(tool, 1.0)
+        token = _call.set({"callId": call_id, "tool": tool, "sampled": sampled})
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", [])) + [(b"x-request-id", call_id.encode("latin-1"))]
+                message = dict(message, headers=headers)
+            await send(message)
+
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = round((perf_counter() - started) * 1000, 3)
+            logger.log(
+                logging.WARNING if status_code >= 500 else logging.INFO,
+                "%s returned %d in %.1fms", tool, status_code, duration_ms,
+                extra={"status": status_code, "durationMs": duration_ms,
+                       "keep": status_code >= 400 or duration_ms >= self.slow_ms},
+            )
+            _call.reset(token)
+
+
+def _request_id(scope) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == b"x-request-id":
+            value = value.decode("latin-1").strip()[:_MAX_CALL_ID]
+            return value if value.isprintable() and value else None
+    return None
@@ -0,0 +1,127 @@
+"""Event-loop lag monitor and blocking-call detector.
+
+A heartbeat coroutine measures how late ``asyncio.sleep`` wakes up (the
+event-loop lag).  A watchdog thread watches that heartbeat; when the loop
+has not ticked for longer than the threshold it snapshots the loop thread's
+current Python stack, which points straight at the blocking call (a pymongo
+round trip, a ``print`` to a slow stdout, ...).
+"""
+import asyncio
+import logging
+import sys
+import threading
+import traceback
+from collections import deque
+from datetime import datetime
+from time import perf_counter
+from typing import Deque, Dict, List, Optional
+
+from metrics import LOOP_LAG_SECONDS, LOOP_STALLS
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.1, threshold: float = 0.1, max_stalls: int = 20):
+        self.interval = interval
+        self.threshold = threshold
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.stall_count = 0
+        self.stalls: Deque[Dict] = deque(maxlen=max_stalls)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = perf_counter()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._open_stall: Optional[Dict] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start monitoring the running event loop."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = perf_counter()
+        self._stopped.clear()
+        self._task = self._loop.create_task(self._heartbeat_loop())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _heartbeat_loop(self):
+        loop = self._loop
+        while True:
+            scheduled = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - scheduled - self.interval, 0.0)
+            self._heartbeat = perf_counter()
+            self.last_lag = lag
+            if lag > self.max_lag:
+                self.max_lag = lag
+            LOOP_LAG_SECONDS.observe(lag)
+
+            stall = self._open_stall
+            if stall is not None:
+                # The watchdog caught this stall mid-flight; record how long it really lasted
+                stall["lagMs"] = round(lag * 1000, 2)
+                self._open_stall = None
+
+    def _watch(self):
+        poll = min(self.interval, self.threshold) / 2
+        limit = self.interval + self.threshold
+        while not self._stopped.wait(poll):
+            blocked_for = perf_counter() - self._heartbeat
+            if blocked_for > limit and self._open_stall is None:
+                self._capture(blocked_for)
+
+    def _capture(self, blocked_for: float):
+        frame = sys._current_frames().get(self._loop_thread_id) if self._loop_thread_id is not None else None
+        stack = [line.rstrip() for line in traceback.format_stack(frame)] if frame is not None else []
+        # The task the loop is stepping right now (current_task takes the loop, so any thread may ask)
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+        stall = {
+            "detectedAt": datetime.utcnow().isoformat(),
+            "blockedForMs": round(blocked_for * 1000, 2),
+            "lagMs": None,
+            "task": task.get_name() if task is not None else None,
+            "coroutine": repr(task.get_coro()) if task is not None else None,
+            "stack": stack,
+        }
+        self._open_stall = stall
+        self.stalls.append(stall)
+        self.stall_count += 1
+        LOOP_STALLS.inc()
+        location = stack[-1].strip().splitlines()[0] if stack else "unknown frame"
+        logger.warning("Event loop blocked for %.0fms at %s", blocked_for * 1000, location)
+
+    def snapshot(self) -> Dict:
+        last_stall = self.stalls[-1] if self.stalls else None
+        return {
+            "running": self.running,
+            "lagMs": round(self.last_lag * 1000, 3),
+            "maxLagMs": round(self.max_lag * 1000, 3),
+            "thresholdMs": round(self.threshold * 1000, 3),
+            "stalls": self.stall_count,
+            "lastStall": {k: v for k, v in last_stall.items() if k != "stack"} if last_stall else None,
+        }
+
+    def recent_stalls(self) -> List[Dict]:
+        return list(self.stalls)
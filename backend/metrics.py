@@ -0,0 +1,424 @@
+"""Lightweight Prometheus-style metrics for the Westports tool API.
+
+Instrumentation is kept deliberately cheap so it can stay enabled in
+production: label children are cached, histogram observation is a single
+bisect plus two additions, and gauges that mirror live state are read only
+when ``/api/metrics`` is scraped.
+"""
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+# Latency buckets (seconds) tuned for tool calls: sub-millisecond in-memory
+# lookups up to multi-second MongoDB stalls.
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the gauge from ``function`` at scrape time instead of storing it."""
+        self.function = function
+
+    def get(self) -> float:
+        if self.function is not None:
+            try:
+                return float(self.function())
+            except Exception:
+                return float("nan")
+        return self.value
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+
+class _Timer:
+    """Context manager observing elapsed wall time into a histogram child."""
+    __slots__ = ("child", "started")
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.child.observe(perf_counter() - self.started)
+        return False
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def _samples(self):
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in list(self._children.items())
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default.dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        self._default.set_function(function)
+
+    def get(self) -> float:
+        return self._default.get()
+
+    def _samples(self):
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}"
+            for key, child in list(self._children.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self) -> _Timer:
+        return self._default.time()
+
+    def _samples(self):
+        lines = []
+        bounds = self.buckets + (float("inf"),)
+        for key, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, child.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# HTTP layer
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "portcall_http_request_duration_seconds",
+    "End-to-end HTTP request latency by route template, method and status.",
+    ("method", "path", "status"),
+)
+
+# Tool-call breakdown
+TOOL_STAGE_SECONDS = REGISTRY.histogram(
+    "portcall_tool_stage_duration_seconds",
+    "Time spent per tool call stage (db, validation, broadcast, serialization).",
+    ("tool", "stage"),
+)
+TOOL_RESPONSE_BYTES = REGISTRY.histogram(
+    "portcall_tool_response_bytes",
+    "Encoded tool response size by response profile (voice, full, dashboard).",
+    ("tool", "profile"),
+    buckets=(128, 256, 512, 1024, 2048, 4096, 8192, 16384, 65536),
+)
+TOOL_FAILURES = REGISTRY.counter(
+    "portcall_tool_failures_total",
+    "Tool calls that ended in a not-found or validation failure.",
+    ("tool", "reason"),
+)
+
+# Gate lane
+GATE_LOOKUP_SECONDS = REGISTRY.histogram(
+    "portcall_gate_lookup_duration_seconds",
+    "Gate-lane truck/gatepass resolution time, by whether the hot map answered.",
+    ("source",),
+)
+
+# Event journal
+JOURNAL_PENDING = REGISTRY.gauge(
+    "portcall_journal_pending_events",
+    "Journal events buffered in memory, waiting for the writer thread.",
+)
+JOURNAL_EVENTS = REGISTRY.counter(
+    "portcall_journal_events_total",
+    "Journal events by outcome: written to storage, spilled to the local file, replayed from it, or dropped.",
+    ("outcome",),
+)
+JOURNAL_BATCH_SECONDS = REGISTRY.histogram(
+    "portcall_journal_batch_write_seconds",
+    "Time to write one batch of journal events to storage.",
+)
+
+# Logging
+LOG_QUEUE_DEPTH = REGISTRY.gauge(
+    "portcall_log_queue_depth",
+    "Log records waiting for the log writer thread.",
+)
+LOG_RECORDS_DISCARDED = REGISTRY.counter(
+    "portcall_log_records_discarded_total",
+    "Log records not written: sampled out, or dropped because the log queue was full.",
+    ("reason",),
+)
+
+# Berth schedule
+BERTH_QUERY_SECONDS = REGISTRY.histogram(
+    "portcall_berth_query_duration_seconds",
+    "Vessel schedule / berth occupancy query time, by query and whether the interval index answered.",
+    ("query", "source"),
+)
+
+# Gatepass expiry
+GATEPASS_EXPIRY_PENDING = REGISTRY.gauge(
+    "portcall_gatepass_expiry_pending",
+    "ACTIVE gatepasses waiting in the expiry scheduler.",
+)
+GATEPASS_EXPIRED = REGISTRY.counter(
+    "portcall_gatepasses_expired_total",
+    "Gatepasses transitioned to EXPIRED by the scheduler.",
+)
+GATEPASS_EXPIRY_LAG_SECONDS = REGISTRY.histogram(
+    "portcall_gatepass_expiry_lag_seconds",
+    "How long after validUntil a gatepass was actually expired.",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0, 300.0, 3600.0),
+)
+
+# WebSocket fan-out
+WS_CONNECTIONS = REGISTRY.gauge(
+    "portcall_websocket_connections",
+    "Currently connected dashboard WebSocket clients.",
+)
+WS_CONNECTIONS_TOTAL = REGISTRY.counter(
+    "portcall_websocket_connections_total",
+    "WebSocket connections accepted since start.",
+)
+BROADCAST_QUEUE_DEPTH = REGISTRY.gauge(
+    "portcall_broadcast_queue_depth",
+    "Events waiting to be fanned out to WebSocket clients.",
+)
+BROADCAST_SEND_SECONDS = REGISTRY.histogram(
+    "portcall_broadcast_send_duration_seconds",
+    "Time to fan one event out to every connected WebSocket client.",
+)
+BROADCAST_DROPPED = REGISTRY.counter(
+    "portcall_broadcast_send_failures_total",
+    "Per-connection WebSocket sends that failed during broadcast.",
+)
+
+# Event loop health
+LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "portcall_event_loop_lag_seconds",
+    "How late the event loop wakes up a periodic heartbeat.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+LOOP_STALLS = REGISTRY.counter(
+    "portcall_event_loop_stalls_total",
+    "Times the event loop was blocked past the stall threshold.",
+)
+
+# Readiness
+READY = REGISTRY.gauge(
+    "portcall_ready",
+    "1 when the last readiness check passed, 0 otherwise.",
+)
+READINESS_CHECK_SECONDS = REGISTRY.histogram(
+    "portcall_readiness_check_duration_seconds",
+    "Latency of readiness checks against MongoDB.",
+    ("check",),
+)
+
+# Cold start
+IMPORT_SECONDS = REGISTRY.gauge(
+    "portcall_import_seconds",
+    "Time taken to import the server module.",
+)
+TIME_TO_READY_SECONDS = REGISTRY.gauge(
+    "portcall_time_to_ready_seconds",
+    "Time from module import until the lifespan startup finished.",
+)
+
+
+def stage(tool: str, name: str) -> _Timer:
+    """Time a block of a tool call: ``with stage("generateEGatepass", "db"): ...``"""
+    return TOOL_STAGE_SECONDS.labels(tool, name).time()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency by route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # FastAPI stores the matched route on the scope; using its template
+            # keeps label cardinality bounded.
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            HTTP_REQUEST_SECONDS.labels(scope["method"], path, status_code).observe(perf_counter() - started)
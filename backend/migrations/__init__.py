@@ -0,0 +1 @@
+"""One-off data migrations, run from ``backend/`` with ``python -m migrations.<name>``."""
@@ -0,0 +1,81 @@
+"""Batch backfill shared by the one-off migrations.
+
+A migration names the documents to visit and supplies a transform that
+returns the fields to ``$set`` on one of them, or nothing when it is
+already current.  ``backfill`` pages through the matches in ``_id`` order,
+bulk-writes each page's changes with ``version`` bumped and logs its
+progress.  Current documents are never rewritten, so an interrupted
+migration can simply be run again; with ``dry_run`` it only counts.
+"""
+import argparse
+import logging
+import sys
+import time
+from typing import Callable, Dict, Optional
+
+from pymongo import ASCENDING, MongoClient, UpdateOne
+
+from storage.mongo import REQUIRED_INDEXES, index_options
+
+logger = logging.getLogger(__name__)
+
+# (document, stats) -> fields to $set, or None/{} to leave the document alone
+Transform = Callable[[Dict, Dict[str, int]], Optional[Dict]]
+
+
+def changed(document: Dict, fields: Dict) -> Optional[Dict]:
+    """``fields`` if any differs from what the document holds, else None."""
+    return fields if any(document.get(name) != value for name, value in fields.items()) else None
+
+
+def ensure_indexes(db, collection: str):
+    for spec in REQUIRED_INDEXES[collection]:
+        db[collection].create_index(spec["keys"], **index_options(spec))
+
+
+def backfill(collection, transform: Transform, query: Optional[Dict] = None, fields: Optional[Dict] = None,
+             batch_size: int = 1000, dry_run: bool = False, stats: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """Apply ``transform`` to every document matching ``query``; returns the counts (plus the transform's own)."""
+    stats = dict(stats or {}, batches=0, documents=0, updated=0)
+    last_id = None
+    while True:
+        page = dict(query or {})
+        if last_id is not None:
+            page = {"$and": [page, {"_id": {"$gt": last_id}}]} if page else {"_id": {"$gt": last_id}}
+        batch = list(collection.find(page, fields).sort("_id", ASCENDING).limit(batch_size))
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+        stats["batches"] += 1
+        stats["documents"] += len(batch)
+
+        updates = []
+        for document in batch:
+            update = transform(document, stats)
+            if update:
+                updates.append(UpdateOne({"_id": document["_id"]}, {"$set": update, "$inc": {"version": 1}}))
+        stats["updated"] += len(updates)
+        if updates and not dry_run:
+            collection.bulk_write(updates, ordered=False)
+        logger.info("%s: batch %d, %d documents read, %d %s", collection.name, stats["batches"],
+                    stats["documents"], stats["updated"], "to update" if dry_run else "updated")
+    return stats
+
+
+def run(description: str, migrate: Callable[..., Dict[str, int]], noun: str, argv=None, batch_size: int = 1000):
+    """Command line shared by the migrations: connect, migrate, report."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="westports_db")
+    parser.add_argument("--batch-size", type=int, default=batch_size)
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr, format="%(message)s")
+
+    client: MongoClient = MongoClient(args.mongo_url)
+    started = time.perf_counter()
+    stats = migrate(client[args.db], batch_size=args.batch_size, dry_run=args.dry_run)
+    client.close()
+    print(f"{'Would update' if args.dry_run else 'Updated'} {stats['updated']} of {stats['documents']} {noun} "
+          f"in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    print(stats)
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Backfill ``pickupEligible`` / ``pickupBlockers`` on existing containers.
+
+Containers get their pickup eligibility materialized on write; this covers
+documents written before that, so the ``/api/pickup`` listings (and their
+indexes) see them:
+
+    cd backend && python -m migrations.pickup_eligibility --mongo-url mongodb://localhost:27017 --batch-size 1000
+
+Only containers whose stored eligibility differs from the derived one are
+rewritten (see ``migrations.common``).
+"""
+from typing import Dict, Optional
+
+from migrations.common import backfill, changed, ensure_indexes, run
+from pickup import INPUT_FIELDS, pickup_fields
+
+READ_FIELDS = dict({name: 1 for name in INPUT_FIELDS}, pickupEligible=1, pickupBlockers=1)
+
+
+def _eligibility(container: Dict, stats: Dict[str, int]) -> Optional[Dict]:
+    fields = pickup_fields(container)
+    stats["eligible"] += fields["pickupEligible"]
+    return changed(container, fields)
+
+
+def migrate(db, batch_size: int = 1000, dry_run: bool = False) -> Dict[str, int]:
+    if not dry_run:
+        ensure_indexes(db, "containers")
+    return backfill(db.containers, _eligibility, fields=READ_FIELDS, batch_size=batch_size, dry_run=dry_run,
+                    stats={"eligible": 0})
+
+
+def main(argv=None):
+    run("Materialize pickup eligibility on existing containers", migrate, "containers", argv)
+
+
+if __name__ == "__main__":
+    main()
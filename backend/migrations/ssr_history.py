@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Replace unbounded container ``ssrHistory`` arrays with ``recentSSRs``.
+
+Containers used to ``$push`` every SSR id onto ``ssrHistory``.  The full
+history now comes from ``ssr_requests`` (indexed by container and submission
+time), and the container keeps only a summary of its newest SSRs.  This
+rewrites existing MongoDB documents in batches:
+
+    cd backend && python -m migrations.ssr_history --mongo-url mongodb://localhost:27017 --batch-size 500
+
+Ids in ``ssrHistory`` with no matching ``ssr_requests`` document get a stub
+SSR (status ``UNKNOWN``) so no history is lost.  Legacy ids were
+``SSR<unix seconds>``, so SSRs submitted in the same second share one:
+existing rows sharing an id are renumbered first (``migrations.unique_ids``)
+and a stub whose id is already taken gets a fresh one, with the legacy id
+kept as ``legacyId`` either way.  Each container is rewritten
+in one update that also unsets ``ssrHistory``, so the migration can be
+interrupted and re-run; ``--dry-run`` only reports what would change.
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Set
+
+from pymongo import ASCENDING, DESCENDING, MongoClient, UpdateOne
+
+from ids import generator
+from migrations.unique_ids import renumber
+from records import SSRRecord
+
+SUMMARY_FIELDS = {"_id": 0, "id": 1, "ssrType": 1, "status": 1, "submittedAt": 1}
+
+
+def _submitted_at_from_id(ssr_id: str) -> str:
+    """Legacy ids were ``SSR<unix seconds>``; recover the time when possible."""
+    try:
+        return datetime.utcfromtimestamp(int(ssr_id[3:])).isoformat()
+    except (ValueError, OverflowError, OSError):
+        return ""
+
+
+def _stub(ssr_id: str, container_number: str, taken: Set[str]) -> Dict:
+    stub: Dict[str, Any] = {
+        "id": ssr_id,
+        "containerNumber": container_number,
+        "ssrType": None,
+        "requestDetails": "Recovered from container ssrHistory",
+        "status": "UNKNOWN",
+        "submittedAt": _submitted_at_from_id(ssr_id),
+        "version": 1,
+    }
+    if ssr_id in taken:
+        # Another container's SSR from the same second already holds this id
+        stub.update(id=generator.next_id("SSR"), legacyId=ssr_id)
+    taken.add(stub["id"])
+    return stub
+
+
+def recent_summaries(db, container_number: str, keep: int) -> List[Dict]:
+    """Newest ``keep`` SSR summaries, oldest first (the order ``$push`` builds)."""
+    cursor = (db.ssr_requests.find({"containerNumber": container_number}, SUMMARY_FIELDS)
+              .sort([("submittedAt", DESCENDING), ("id", DESCENDING)])
+              .limit(keep))
+    return [SSRRecord.from_doc(doc).summary() for doc in reversed(list(cursor))]
+
+
+def migrate(db, batch_size: int = 500, keep: int = 5, dry_run: bool = False) -> Dict[str, int]:
+    stats = {"batches": 0, "containers": 0, "historyIds": 0, "stubsCreated": 0, "stubsRekeyed": 0,
+             "renumbered": renumber(db, "ssr_requests", dry_run)["updated"]}
+    if not dry_run:
+        db.ssr_requests.create_index([("containerNumber", ASCENDING), ("submittedAt", DESCENDING), ("id", DESCENDING)])
+
+    last_id = None
+    while True:
+        query = {"ssrHistory": {"$exists": True}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = list(db.containers.find(query, {"containerNumber": 1, "ssrHistory": 1})
+                     .sort("_id", ASCENDING).limit(batch_size))
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+        stats["batches"] += 1
+        stats["containers"] += len(batch)
+
+        # Stub out history entries whose SSR document never made it into ssr_requests.  The same
+        # legacy id can sit in several containers' histories, so entries are (id, container) pairs.
+        entries = {(ssr_id, container["containerNumber"])
+                   for container in batch for ssr_id in container.get("ssrHistory") or []}
+        stats["historyIds"] += len(entries)
+        ids = sorted({ssr_id for ssr_id, _ in entries})
+        taken, existing = set(), set()
+        for doc in db.ssr_requests.find({"$or": [{"id": {"$in": ids}}, {"legacyId": {"$in": ids}}]},
+                                        {"_id": 0, "id": 1, "legacyId": 1, "containerNumber": 1}):
+            taken.add(doc["id"])
+            existing.add((doc.get("legacyId") or doc["id"], doc.get("containerNumber")))
+        stubs = [_stub(ssr_id, owner, taken) for ssr_id, owner in sorted(entries) if (ssr_id, owner) not in existing]
+        stats["stubsCreated"] += len(stubs)
+        stats["stubsRekeyed"] += sum(1 for stub in stubs if "legacyId" in stub)
+        if dry_run:
+            continue
+        if stubs:
+            db.ssr_requests.insert_many(stubs, ordered=False)
+
+        db.containers.bulk_write([
+            UpdateOne(
+                {"_id": container["_id"]},
+                {
+                    "$set": {"recentSSRs": recent_summaries(db, container["containerNumber"], keep)},
+                    "$unset": {"ssrHistory": ""},
+                    "$inc": {"version": 1},
+                },
+            )
+            for container in batch
+        ], ordered=False)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move container ssrHistory arrays into recentSSRs summaries")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="westports_db")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--keep", type=int, default=5, help="summaries kept per container (SSR_RECENT_LIMIT)")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args(argv)
+
+    client = MongoClient(args.mongo_url)
+    started = time.perf_counter()
+    stats = migrate(client[args.db], args.batch_size, args.keep, args.dry_run)
+    client.close()
+    print(f"{'Would migrate' if args.dry_run else 'Migrated'} {stats['containers']} containers "
+          f"in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    print(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""Backfill the normalized ``truckPlate`` on existing gatepasses.
+
+Gatepasses get ``truckPlate`` (``normalize_plate`` of ``truckNumber``) on
+write, and the gate lane's storage fallback looks passes up by it, so an
+expired or used pass is found whatever spelling of the plate the lane
+sends.  This covers passes written before that:
+
+    cd backend && python -m migrations.truck_plate --mongo-url mongodb://localhost:27017 --batch-size 1000
+
+Only gatepasses without the field are visited.
+"""
+from typing import Dict, Optional
+
+from pymongo import ASCENDING
+
+from migrations.common import backfill, run
+from records import GatepassRecord
+
+
+def _plate(gatepass: Dict, stats: Dict[str, int]) -> Optional[Dict]:
+    return GatepassRecord.derived(gatepass)
+
+
+def migrate(db, batch_size: int = 1000, dry_run: bool = False) -> Dict[str, int]:
+    if not dry_run:
+        db.gatepasses.create_index([("truckPlate", ASCENDING)])
+    return backfill(db.gatepasses, _plate, query={"truckPlate": {"$exists": False}}, fields={"truckNumber": 1},
+                    batch_size=batch_size, dry_run=dry_run)
+
+
+def main(argv=None):
+    run("Store the normalized truck plate on existing gatepasses", migrate, "gatepasses", argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Renumber gatepasses and SSRs that share a legacy ``id``.
+
+Legacy ids were ``GP``/``SSR`` plus the issue time in seconds, so two
+passes or SSRs issued in the same second got the same id and the unique
+``id`` indexes cannot be built over them.  For every id held by more than
+one document this keeps the oldest (lowest ``_id``), gives each of the
+others a fresh id from ``ids.generator`` with the old one kept as
+``legacyId``, and repoints the owning container's ``activeGatepass`` or
+``recentSSRs`` entry.  Run it before starting a server on an old database:
+
+    cd backend && python -m migrations.unique_ids --mongo-url mongodb://localhost:27017
+
+Once no duplicates remain it builds the unique indexes; a second run finds
+nothing to do.  ``--dry-run`` only reports.
+"""
+from typing import Dict, List
+
+from pymongo import UpdateOne
+
+from ids import generator
+from migrations.common import ensure_indexes, run
+
+# Collection -> prefix of the ids issued for it
+PREFIXES = {"gatepasses": "GP", "ssr_requests": "SSR"}
+
+DUPLICATES = [
+    {"$group": {"_id": "$id", "count": {"$sum": 1},
+                "docs": {"$push": {"_id": "$_id", "containerNumber": "$containerNumber"}}}},
+    {"$match": {"count": {"$gt": 1}}},
+]
+
+
+def _repoint(containers, collection: str, container_number: str, old_id: str, ids: List[str]) -> bool:
+    """Point the container's references to ``old_id`` at ``ids``, its documents' ids oldest first."""
+    container = containers.find_one({"containerNumber": container_number}, {"activeGatepass": 1, "recentSSRs": 1})
+    if container is None:
+        return False
+    if collection == "gatepasses":
+        if container.get("activeGatepass") != old_id:
+            return False
+        update: Dict = {"activeGatepass": ids[-1]}
+    else:
+        entries = list(container.get("recentSSRs") or [])
+        positions = [i for i, entry in enumerate(entries) if isinstance(entry, dict) and entry.get("id") == old_id]
+        if not positions:
+            return False
+        # The list keeps only the newest summaries, so line them up from the newest end
+        for position, new_id in zip(reversed(positions), reversed(ids)):
+            entries[position] = dict(entries[position], id=new_id)
+        update = {"recentSSRs": entries}
+    containers.update_one({"_id": container["_id"]}, {"$set": update, "$inc": {"version": 1}})
+    return True
+
+
+def renumber(db, collection: str, dry_run: bool = False) -> Dict[str, int]:
+    """Give every document but the oldest of each shared ``id`` a fresh one."""
+    stats = {"duplicateIds": 0, "documents": 0, "updated": 0, "containersRepointed": 0}
+    for group in list(db[collection].aggregate(DUPLICATES, allowDiskUse=True)):
+        old_id = group["_id"]
+        docs = sorted(group["docs"], key=lambda doc: doc["_id"])
+        ids = [old_id] + [generator.next_id(PREFIXES[collection]) for _ in docs[1:]]
+        stats["duplicateIds"] += 1
+        stats["documents"] += len(docs)
+        stats["updated"] += len(docs) - 1
+        if dry_run:
+            continue
+
+        db[collection].bulk_write([
+            UpdateOne({"_id": doc["_id"]}, {"$set": {"id": new_id, "legacyId": old_id}, "$inc": {"version": 1}})
+            for doc, new_id in zip(docs[1:], ids[1:])
+        ], ordered=False)
+        by_container: Dict[str, List[str]] = {}
+        for doc, new_id in zip(docs, ids):
+            by_container.setdefault(doc.get("containerNumber"), []).append(new_id)
+        for container_number, container_ids in by_container.items():
+            if container_ids != [old_id] and _repoint(db.containers, collection, container_number, old_id,
+                                                      container_ids):
+                stats["containersRepointed"] += 1
+    return stats
+
+
+def migrate(db, batch_size: int = 1000, dry_run: bool = False) -> Dict[str, int]:
+    stats: Dict[str, int] = {}
+    for collection in PREFIXES:
+        for key, count in renumber(db, collection, dry_run).items():
+            stats[key] = stats.get(key, 0) + count
+        if not dry_run:
+            ensure_indexes(db, collection)
+    return stats
+
+
+def main(argv=None):
+    run("Renumber gatepasses and SSRs that share a legacy id", migrate, "gatepasses and SSRs sharing an id", argv)
+
+
+if __name__ == "__main__":
+    main()
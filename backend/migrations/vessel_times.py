@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Convert vessel ``eta``/``etd`` from ISO strings to BSON dates.
+
+Range queries (arrivals in a window, stays overlapping a berth slot) need
+real dates behind the ``eta``/``etd`` indexes, which are built once the
+strings are gone:
+
+    cd backend && python -m migrations.vessel_times --mongo-url mongodb://localhost:27017 --batch-size 1000
+
+Only vessels still holding a string are visited; unparseable strings are
+counted and left as they are.
+"""
+from typing import Dict, Optional
+
+from migrations.common import backfill, ensure_indexes, run
+from records import VesselRecord, parse_utc
+
+STRING_TIME = {"$or": [{name: {"$type": "string"}} for name in VesselRecord.TIME_FIELDS]}
+
+
+def _dates(vessel: Dict, stats: Dict[str, int]) -> Optional[Dict]:
+    times = {}
+    for name in VesselRecord.TIME_FIELDS:
+        if isinstance(vessel.get(name), str) and vessel[name]:
+            try:
+                times[name] = parse_utc(vessel[name])
+            except ValueError:
+                stats["unparseable"] += 1
+    return times
+
+
+def migrate(db, batch_size: int = 1000, dry_run: bool = False) -> Dict[str, int]:
+    stats = backfill(db.vessels, _dates, query=STRING_TIME, fields={name: 1 for name in VesselRecord.TIME_FIELDS},
+                     batch_size=batch_size, dry_run=dry_run, stats={"unparseable": 0})
+    if not dry_run:
+        ensure_indexes(db, "vessels")
+    return stats
+
+
+def main(argv=None):
+    run("Store vessel eta/etd as BSON dates", migrate, "vessels", argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Backfill ``yardBlock`` / ``yardRow`` parsed from existing container locations.
+
+The block listings and the occupancy map (built from the ``yardBlock``
+index at startup) only see containers whose position was materialized on
+write; this parses it for older documents:
+
+    cd backend && python -m migrations.yard_location --mongo-url mongodb://localhost:27017 --batch-size 1000
+
+Locations that name no block are counted as ``unparsed`` (gated-out
+containers excepted).
+"""
+from typing import Dict, Optional
+
+from migrations.common import backfill, changed, ensure_indexes, run
+from yard import INPUT_FIELDS, yard_fields
+
+READ_FIELDS = dict({name: 1 for name in INPUT_FIELDS}, yardBlock=1, yardRow=1)
+
+
+def _position(container: Dict, stats: Dict[str, int]) -> Optional[Dict]:
+    fields = yard_fields(container)
+    if fields["yardBlock"] is None and container.get("status") != "GATED_OUT":
+        stats["unparsed"] += 1
+    return changed(container, fields)
+
+
+def migrate(db, batch_size: int = 1000, dry_run: bool = False) -> Dict[str, int]:
+    if not dry_run:
+        ensure_indexes(db, "containers")
+    return backfill(db.containers, _position, fields=READ_FIELDS, batch_size=batch_size, dry_run=dry_run,
+                    stats={"unparsed": 0})
+
+
+def main(argv=None):
+    run("Materialize yard block/row on existing containers", migrate, "containers", argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Pickup eligibility, materialized onto every container document.
+
+``pickupEligible`` and ``pickupBlockers`` are derived from the EDO, customs
+and pickup-availability fields whenever a container record is created or
+replaced (``ContainerRecord.derived``), so the in-memory engine and MongoDB
+both store them on every write.  Indexed together with the consignee and
+the shipping agent, they answer "what can this consignee collect?" with an
+index range instead of a collection scan, and ``generate_gatepass`` reads
+the stored reasons instead of re-deriving them.
+"""
+from typing import Any, Dict, List
+
+# Container fields the materialized eligibility depends on
+INPUT_FIELDS = ("status", "edoStatus", "customsStatus", "availableForPickup")
+
+# Pickup listings can be filtered by either party, mapped to its container field
+PARTY_FIELDS = {"consignee": "consignee", "agent": "shippingAgent"}
+
+
+def pickup_blockers(container) -> List[str]:
+    """Reasons an eGatepass cannot be issued for the container; empty when it can."""
+    blockers = []
+    if container.get("edoStatus") != "RELEASED":
+        blockers.append("EDO not released by shipping agent")
+    if container.get("customsStatus") != "CLEARED":
+        blockers.append("Customs clearance pending")
+    if not container.get("availableForPickup"):
+        blockers.append(f"Container status {container.get('status')} not eligible for pickup")
+    return blockers
+
+
+def pickup_fields(container) -> Dict[str, Any]:
+    blockers = pickup_blockers(container)
+    return {"pickupEligible": not blockers, "pickupBlockers": blockers}
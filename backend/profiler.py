@@ -0,0 +1,146 @@
+"""Opt-in sampling profiler for live requests.
+
+When armed, requests matching a target endpoint (or a random percentage of
+all requests) are marked in flight, and a background thread samples the
+event-loop thread's stack every few milliseconds while any of them is
+running.  Samples are aggregated as collapsed stacks ("a;b;c 42"), the
+input format of flamegraph.pl, speedscope and most flame-graph viewers.
+
+Disabled, the only cost per request is one attribute check in
+``ProfilerMiddleware``.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return label.replace(";", ":")
+
+
+class SamplingProfiler:
+    def __init__(self, max_stacks: int = 20000):
+        self.enabled = False
+        self.max_stacks = max_stacks
+        self.endpoint: Optional[str] = None
+        self.sample_percent = 0.0
+        self.interval = 0.005
+        self.started_at: Optional[datetime] = None
+        self.expires_at = 0.0
+        self.profiled_requests = 0
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._inflight = 0
+        self._loop_thread_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self, endpoint: Optional[str] = None, sample_percent: float = 0.0,
+              duration: float = 60.0, interval: float = 0.005):
+        """Arm the profiler from the event-loop thread; previous samples are discarded.
+
+        A running sampler is stopped first, which blocks; async callers ``stop()`` in a thread beforehand.
+        """
+        self.stop()
+        self.endpoint = endpoint
+        self.sample_percent = sample_percent
+        self.interval = interval
+        self.started_at = datetime.utcnow()
+        self.expires_at = time.monotonic() + duration
+        self.profiled_requests = 0
+        self.samples = 0
+        self._stacks = Counter()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        self.enabled = True
+
+    def stop(self):
+        """Disarm and wait (up to a second) for the sampler thread to exit; blocks the caller."""
+        self.enabled = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def should_profile(self, path: str) -> bool:
+        if time.monotonic() >= self.expires_at:
+            self.enabled = False
+            self._stop.set()
+            return False
+        if self.endpoint is not None:
+            return path == self.endpoint
+        return random.random() * 100 < self.sample_percent
+
+    def enter(self):
+        self._inflight += 1
+        self.profiled_requests += 1
+
+    def exit(self):
+        self._inflight -= 1
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            if time.monotonic() >= self.expires_at:
+                self.enabled = False
+                break
+            if self._inflight <= 0:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            stack = ";".join(reversed(labels))
+            if stack in self._stacks or len(self._stacks) < self.max_stacks:
+                self._stacks[stack] += 1
+            else:
+                self._stacks["[truncated]"] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Aggregated samples in collapsed-stack (flame graph) format."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self._stacks.items()))
+
+    def status(self) -> Dict:
+        remaining = max(self.expires_at - time.monotonic(), 0.0) if self.enabled else 0.0
+        return {
+            "enabled": self.enabled,
+            "endpoint": self.endpoint,
+            "samplePercent": self.sample_percent,
+            "intervalMs": round(self.interval * 1000, 3),
+            "startedAt": self.started_at.isoformat() if self.started_at else None,
+            "expiresAt": (datetime.utcnow() + timedelta(seconds=remaining)).isoformat() if self.enabled else None,
+            "profiledRequests": self.profiled_requests,
+            "samples": self.samples,
+            "distinctStacks": len(self._stacks),
+        }
+
+
+class ProfilerMiddleware:
+    """Pure ASGI middleware marking selected requests for the sampling profiler."""
+
+    def __init__(self, app, profiler: SamplingProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        profiler = self.profiler
+        if not profiler.enabled or scope["type"] != "http" or not profiler.should_profile(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        profiler.enter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.exit()
@@ -0,0 +1,65 @@
+"""Deep readiness probe for the storage engine.
+
+Liveness only says the process is serving; readiness says a voice call
+routed here will not time out on the database.  The probe runs the storage
+engine's health checks (for MongoDB: a ping plus verification of the
+indexes the tool endpoints rely on).  Results are cached for a short TTL
+and at most one check runs at a time, so load balancers polling every pod
+cannot turn the probe itself into database load.
+"""
+import asyncio
+from datetime import datetime
+from time import monotonic
+from typing import Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from metrics import READINESS_CHECK_SECONDS, READY
+
+
+class ReadinessProbe:
+    def __init__(self, get_storage, ttl: float = 2.0, timeout: float = 2.0):
+        self.get_storage = get_storage
+        self.ttl = ttl
+        self.timeout = timeout
+        self._result: Optional[Dict] = None
+        self._checked_at = 0.0
+        self._inflight: Optional[asyncio.Future] = None
+
+    async def check(self) -> Dict:
+        """Return the cached result, refreshing it if older than the TTL."""
+        if self._result is not None and monotonic() - self._checked_at < self.ttl:
+            return dict(self._result, cached=True)
+
+        if self._inflight is not None and not self._inflight.done():
+            # Another caller is already checking; don't stack pings behind it
+            if self._result is not None:
+                return dict(self._result, cached=True)
+            return dict(await asyncio.shield(self._inflight), cached=False)
+
+        self._inflight = asyncio.ensure_future(self._refresh())
+        return dict(await asyncio.shield(self._inflight), cached=False)
+
+    async def _refresh(self) -> Dict:
+        storage = self.get_storage()
+        try:
+            checks = await asyncio.wait_for(run_in_threadpool(storage.health_checks), self.timeout)
+        except asyncio.TimeoutError:
+            checks = {storage.name: {"ok": False, "error": f"check timed out after {self.timeout}s"}}
+        except Exception as exc:
+            checks = {storage.name: {"ok": False, "error": str(exc)}}
+
+        for name, check in checks.items():
+            if "latencyMs" in check:
+                READINESS_CHECK_SECONDS.labels(name).observe(check["latencyMs"] / 1000)
+
+        ready = all(check.get("ok") for check in checks.values())
+        READY.set(1 if ready else 0)
+        self._result = {
+            "status": "ready" if ready else "not_ready",
+            "storage": storage.name,
+            "checkedAt": datetime.utcnow().isoformat(),
+            "checks": checks,
+        }
+        self._checked_at = monotonic()
+        return self._result
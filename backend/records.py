@@ -0,0 +1,398 @@
+"""Compact typed records for containers, vessels, gatepasses, SSRs and journal events.
+
+Records use ``__slots__`` instead of per-instance dicts and are treated as
+immutable: a change produces a new record with ``version`` bumped
+(``replace``).  That makes the encoded JSON safe to cache on the record, so
+one container is serialized once and the same bytes are spliced into both
+the HTTP response and the WebSocket event (``encode_json``).  Encodings of
+versioned documents are also kept in a small LRU, so repeated reads of an
+unchanged MongoDB document skip ``json.dumps`` entirely.
+
+Each record type also declares named response profiles: "voice" keeps only
+what the voice agent needs to answer, "dashboard" what the frontend renders,
+and "full" is the whole document.  ``projection`` turns a profile into a
+MongoDB projection so trimmed fields never leave the database.
+"""
+import json
+import re
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, List, Optional, Tuple
+
+from pickup import pickup_fields
+from yard import yard_fields
+
+_MISSING = object()
+_PLATE_NOISE = re.compile(r"[\s\-]")
+
+FULL = "full"
+PROFILES = ("voice", FULL, "dashboard")
+_dumps = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode
+
+
+class EncodedCache:
+    """LRU of encoded record JSON keyed by (type, key, version, profile)."""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        encoded = self._entries.get(key)
+        if encoded is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return encoded
+
+    def put(self, key: Tuple, encoded: bytes):
+        self._entries[key] = encoded
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+ENCODED_CACHE = EncodedCache()
+
+
+class Record:
+    """Base for slot-based records; subclasses list their fields in FIELDS."""
+
+    __slots__ = ("_extra", "_json", "_profile")
+    _extra: Optional[Dict[str, Any]]
+    _json: Optional[bytes]
+    _profile: Optional[str]
+    FIELDS: Tuple[str, ...] = ()
+    KEY = "id"
+    # Only keys enforced unique by the database may share the process-wide LRU
+    UNIQUE_KEY = False
+    # Fields kept by each trimmed response profile, in output order
+    PROFILE_FIELDS: Dict[str, Tuple[str, ...]] = {}
+    _FIELD_SET: FrozenSet[str] = frozenset()
+
+    if TYPE_CHECKING:
+        # Fields are slots named by each subclass's FIELDS
+        def __getattr__(self, name: str) -> Any: ...
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+
+    def __init__(self, **fields):
+        self._load(fields)
+
+    def _load(self, doc: Dict, profile: Optional[str] = None):
+        extra = None
+        field_set = self._FIELD_SET
+        for name, value in doc.items():
+            if name in field_set:
+                object.__setattr__(self, name, value)
+            elif name != "_id":
+                if extra is None:
+                    extra = {}
+                extra[name] = value
+        object.__setattr__(self, "_extra", extra)
+        object.__setattr__(self, "_json", None)
+        object.__setattr__(self, "_profile", profile)
+
+    @classmethod
+    def from_doc(cls, doc: Optional[Dict], profile: str = FULL):
+        """Build a record from a BSON/JSON document (``_id`` is dropped).
+
+        ``profile`` marks a document read with ``projection(profile)``.
+        """
+        if doc is None:
+            return None
+        record = cls.__new__(cls)
+        record._load(doc, None if profile == FULL else profile)
+        return record
+
+    @classmethod
+    def projection(cls, profile: str = FULL) -> Dict[str, int]:
+        """MongoDB projection for a response profile."""
+        if profile == FULL:
+            return {"_id": 0}
+        projection = {"_id": 0, cls.KEY: 1, "version": 1}
+        for name in cls.PROFILE_FIELDS[profile]:
+            projection[name] = 1
+        return projection
+
+    @classmethod
+    def coerce(cls, value):
+        return value if isinstance(value, cls) else cls.from_doc(value)
+
+    @classmethod
+    def derived(cls, doc) -> Dict[str, Any]:
+        """Fields computed from the others; ``new`` and ``replace`` keep them current."""
+        return {}
+
+    @classmethod
+    def new(cls, value):
+        """Record as first stored: version 1 unless it already carries one."""
+        record = cls.coerce(value)
+        derived = cls.derived(record)
+        if record.get("version") is None or any(record.get(name, _MISSING) != value
+                                                 for name, value in derived.items()):
+            record = cls.from_doc(dict(record.to_doc(), **derived, version=record.get("version") or 1))
+        return record
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable; use replace()")
+
+    def get(self, name: str, default=None):
+        value = getattr(self, name, _MISSING) if name in self._FIELD_SET else _MISSING
+        if value is _MISSING:
+            return (self._extra or {}).get(name, default)
+        return value
+
+    def __getitem__(self, name: str):
+        value = self.get(name, _MISSING)
+        if value is _MISSING:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name, _MISSING) is not _MISSING
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other.to_doc() == self.to_doc()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_doc()!r})"
+
+    @property
+    def key(self):
+        return self.get(self.KEY)
+
+    @property
+    def profile(self) -> str:
+        return self._profile or FULL
+
+    def to_doc(self) -> Dict[str, Any]:
+        """Plain dict for BSON inserts and persistence (profile fields only if projected)."""
+        profile = self._profile
+        doc = {}
+        for name in self.FIELDS if profile is None else self.PROFILE_FIELDS[profile]:
+            value = getattr(self, name, _MISSING)
+            if value is not _MISSING:
+                doc[name] = value
+        if self._extra and profile is None:
+            doc.update(self._extra)
+        return doc
+
+    def project(self, profile: str):
+        """This record trimmed to a response profile; the key and version are kept for caching."""
+        if profile == self.profile:
+            return self
+        if self._profile is not None:
+            raise ValueError(f"cannot re-project a {self._profile!r} record to {profile!r}")
+        doc = {name: getattr(self, name) for name in self.projection(profile)
+               if name in self._FIELD_SET and hasattr(self, name)}
+        return type(self).from_doc(doc, profile)
+
+    def replace(self, fields: Optional[Dict] = None, push: Optional[Dict[str, Any]] = None,
+                inc: Optional[Dict[str, int]] = None, keep_last: Optional[int] = None):
+        """New record with ``fields`` set, ``push`` values appended and version bumped.
+
+        With ``keep_last``, pushed arrays are trimmed to their newest entries
+        (MongoDB's ``$push`` with ``$slice``).
+        """
+        if self._profile is not None:
+            raise ValueError("cannot update a projected record")
+        doc = self.to_doc()
+        if fields:
+            doc.update(fields)
+        for name, value in (push or {}).items():
+            doc[name] = list(doc.get(name) or []) + [value]
+            if keep_last is not None:
+                doc[name] = doc[name][-keep_last:]
+        for name, amount in (inc or {}).items():
+            doc[name] = (doc.get(name) or 0) + amount
+        doc.update(self.derived(doc))
+        doc["version"] = (doc.get("version") or 0) + 1
+        return type(self).from_doc(doc)
+
+    def _cache_key(self) -> Optional[Tuple]:
+        version = getattr(self, "version", None)
+        key = self.key
+        if not self.UNIQUE_KEY or version is None or key is None:
+            return None
+        return (type(self).__name__, key, version, self.profile)
+
+    def to_json(self) -> bytes:
+        """Encoded JSON, computed at most once per record version."""
+        encoded = self._json
+        if encoded is None:
+            cache_key = self._cache_key()
+            if cache_key is not None:
+                encoded = ENCODED_CACHE.get(cache_key)
+            if encoded is None:
+                encoded = _dumps(self.to_doc()).encode("utf-8")
+                if cache_key is not None:
+                    ENCODED_CACHE.put(cache_key, encoded)
+            object.__setattr__(self, "_json", encoded)
+        return encoded
+
+
+class ContainerRecord(Record):
+    FIELDS = (
+        "id", "containerNumber", "status", "location", "vesselName", "voyageNumber",
+        "arrivalDate", "dischargeDate", "containerType", "size", "weight",
+        "availableForPickup", "charges", "currency", "edoStatus", "customsStatus",
+        "activeGatepass", "lastUpdated", "gateOutTime", "consignee", "shippingAgent",
+        "portOfLoading", "recentSSRs", "pickupEligible", "pickupBlockers", "yardBlock", "yardRow", "version",
+    )
+    __slots__ = FIELDS
+    KEY = "containerNumber"
+    UNIQUE_KEY = True
+    PROFILE_FIELDS = {
+        # Both keep dischargeDate, gateOutTime and size so storage charges can be priced
+        "voice": (
+            "containerNumber", "status", "location", "vesselName", "arrivalDate", "dischargeDate",
+            "gateOutTime", "size", "availableForPickup", "charges", "currency", "edoStatus",
+            "customsStatus", "activeGatepass", "pickupEligible", "pickupBlockers",
+        ),
+        "dashboard": (
+            "containerNumber", "status", "location", "vesselName", "containerType", "size",
+            "dischargeDate", "gateOutTime", "availableForPickup", "charges", "currency", "edoStatus",
+            "customsStatus", "activeGatepass", "pickupEligible", "pickupBlockers", "yardBlock", "yardRow",
+            "lastUpdated", "version",
+        ),
+    }
+
+    @classmethod
+    def derived(cls, doc) -> Dict[str, Any]:
+        return dict(pickup_fields(doc), **yard_fields(doc))
+
+
+def parse_utc(value) -> Optional[datetime]:
+    """Naive UTC datetime from an ISO string ("2025-06-28T06:00:00Z", any offset) or datetime."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def format_utc(value: datetime) -> str:
+    """ISO string with a ``Z`` suffix, the wire format of vessel times."""
+    parsed = parse_utc(value)
+    if parsed is None:
+        raise ValueError("format_utc needs a time")
+    return parsed.isoformat() + "Z"
+
+
+class VesselRecord(Record):
+    FIELDS = (
+        "id", "vesselName", "imoNumber", "voyageNumber", "eta", "etd", "berth",
+        "status", "agent", "version",
+    )
+    __slots__ = FIELDS
+    # ISO strings in records and JSON; stored as BSON dates in MongoDB
+    TIME_FIELDS = ("eta", "etd")
+    PROFILE_FIELDS = {
+        "voice": ("vesselName", "voyageNumber", "eta", "etd", "berth", "status"),
+        "dashboard": (
+            "vesselName", "imoNumber", "voyageNumber", "eta", "etd", "berth", "status", "agent", "version",
+        ),
+    }
+
+    @classmethod
+    def derived(cls, doc) -> Dict[str, Any]:
+        # Canonical "...Z" UTC strings, so time strings also compare in time order
+        return {name: format_utc(doc.get(name)) for name in cls.TIME_FIELDS if doc.get(name)}
+
+
+def normalize_plate(truck_number: Optional[str]) -> str:
+    """ANPR and manual entry differ in case and separators ("wbe 1234-a" == "WBE1234A")."""
+    return _PLATE_NOISE.sub("", truck_number or "").upper()
+
+
+class GatepassRecord(Record):
+    FIELDS = (
+        "id", "containerNumber", "haulierCompany", "truckNumber", "truckPlate", "generatedAt",
+        "validUntil", "status", "generatedBy", "charges", "storageCharges", "containerDetails", "expiredAt",
+        "version",
+    )
+    __slots__ = FIELDS
+    UNIQUE_KEY = True
+    PROFILE_FIELDS = {
+        "voice": ("id", "containerNumber", "truckNumber", "validUntil", "status", "charges"),
+        "dashboard": (
+            "id", "containerNumber", "haulierCompany", "truckNumber", "generatedAt", "validUntil",
+            "status", "version",
+        ),
+    }
+
+    @classmethod
+    def derived(cls, doc) -> Dict[str, Any]:
+        # The plate as the gate lane looks it up, so any spelling of it finds the pass
+        return {"truckPlate": normalize_plate(doc.get("truckNumber"))}
+
+
+class SSRRecord(Record):
+    FIELDS = (
+        "id", "containerNumber", "ssrType", "requestDetails", "status", "submittedAt",
+        "submittedBy", "expectedProcessingTime", "version",
+    )
+    __slots__ = FIELDS
+    UNIQUE_KEY = True
+    PROFILE_FIELDS = {
+        "voice": ("id", "containerNumber", "ssrType", "status", "submittedAt", "expectedProcessingTime"),
+        "dashboard": ("id", "containerNumber", "ssrType", "status", "submittedAt", "version"),
+    }
+
+    def summary(self) -> Dict[str, Any]:
+        """Entry for the container's bounded ``recentSSRs`` list."""
+        return {name: self.get(name) for name in ("id", "ssrType", "status", "submittedAt")}
+
+
+class EventRecord(Record):
+    """One journal entry (a tool call or a state transition); written once, never updated."""
+    FIELDS = ("id", "type", "at", "containerNumber", "tool", "status", "durationMs", "data", "version")
+    __slots__ = FIELDS
+    UNIQUE_KEY = True
+    PROFILE_FIELDS = {
+        "voice": ("id", "type", "at", "containerNumber", "data"),
+        "dashboard": ("id", "type", "at", "containerNumber", "tool", "status", "durationMs", "data"),
+    }
+
+
+def _encode(value, out):
+    if isinstance(value, Record):
+        out(value.to_json())
+    elif isinstance(value, dict):
+        out(b"{")
+        first = True
+        for key, item in value.items():
+            if not first:
+                out(b",")
+            first = False
+            out(_dumps(str(key)).encode("utf-8"))
+            out(b":")
+            _encode(item, out)
+        out(b"}")
+    elif isinstance(value, (list, tuple)):
+        out(b"[")
+        for i, item in enumerate(value):
+            if i:
+                out(b",")
+            _encode(item, out)
+        out(b"]")
+    else:
+        out(_dumps(value).encode("utf-8"))
+
+
+def encode_json(value) -> bytes:
+    """Encode a payload, splicing in each record's cached JSON verbatim."""
+    parts: List[bytes] = []
+    _encode(value, parts.append)
+    return b"".join(parts)
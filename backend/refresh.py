@@ -0,0 +1,55 @@
+"""Periodic rebuild of in-memory views of storage.
+
+The yard occupancy counts and the berth schedule are loaded from storage at
+startup and then adjusted only for the writes made through this process.
+Under ``uvicorn --workers N`` (or several pods) the other processes write
+too, so each view is also rebuilt every ``interval`` seconds and a write
+made elsewhere shows up within one interval.  ``fetch`` runs in the thread
+pool; ``install`` swaps its result in on the event loop, where every reader
+and writer of the view runs, so none of them sees a half-built view.
+"""
+import asyncio
+import logging
+from typing import Any, Callable, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicRefresh:
+    def __init__(self, name: str, fetch: Callable[[], Any], install: Callable[[Any], None], interval: float):
+        self.name = name
+        self.fetch = fetch
+        self.install = install
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def refresh(self):
+        self.install(await run_in_threadpool(self.fetch))
+
+    def start(self):
+        if self.running or self.interval <= 0:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run(), name=f"{self.name}-refresh")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Refreshing %s from storage failed; keeping the current one", self.name)
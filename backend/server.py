@@ -1,21 +1,147 @@
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+import time
+_import_started = time.perf_counter()
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 from typing import Dict, List, Optional
-import json
 import asyncio
 from datetime import datetime, timedelta
+import hmac
+import logging
 import uuid
 import os
-from pymongo import MongoClient
-from bson import ObjectId
+from berth_schedule import BerthSchedule
+from charges import ChargeEngine
+from gate_lane import GateLane
+from gatepass_expiry import GatepassExpiryScheduler
+from ids import generator, new_gatepass_id, new_ssr_id
+from journal import EventJournal, JournalMiddleware
+from logs import LogContextMiddleware, bind, parse_sample_rates, setup_logging, shutdown_logging
+from loop_monitor import LoopLagMonitor
+from pickup import PARTY_FIELDS, pickup_blockers
+from profiler import ProfilerMiddleware, SamplingProfiler
+from readiness import ReadinessProbe
+from refresh import PeriodicRefresh
+from records import FULL, PROFILES, encode_json, format_utc, parse_utc
+from storage import MemoryStorage, MongoStorage, Storage
+from traffic_capture import TrafficCaptureMiddleware, TrafficRecorder
+from worker_lease import WorkerIdLease
+from yard import YardOccupancy
+from metrics import (
+    BROADCAST_DROPPED,
+    BROADCAST_QUEUE_DEPTH,
+    BROADCAST_SEND_SECONDS,
+    GATEPASS_EXPIRY_PENDING,
+    JOURNAL_PENDING,
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    IMPORT_SECONDS,
+    REGISTRY,
+    TIME_TO_READY_SECONDS,
+    TOOL_FAILURES,
+    TOOL_RESPONSE_BYTES,
+    WS_CONNECTIONS,
+    WS_CONNECTIONS_TOTAL,
+    MetricsMiddleware,
+    stage,
+)
 
-# MongoDB connection
+logger = logging.getLogger(__name__)
+
+# Storage engine (MongoDB or in-memory), opened lazily by the lifespan handler
 mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = MongoClient(mongo_url)
-db = client.westports_db
+storage: Optional[Storage] = None
+
+def get_storage() -> Storage:
+    """The open storage engine; the endpoints only run between lifespan startup and shutdown."""
+    if storage is None:
+        raise RuntimeError("Storage is not connected")
+    return storage
+
+# Cold-start timings, reported by /api/health and /api/metrics
+startup_timings: Dict[str, Optional[float]] = {"importSeconds": None, "timeToReadySeconds": None}
+
+def create_storage() -> Storage:
+    backend = os.environ.get('STORAGE_BACKEND', 'mongo').lower()
+    if backend == 'memory':
+        return MemoryStorage(
+            path=os.environ.get('MEMORY_STORE_PATH') or None,
+            compact_every=int(os.environ.get('MEMORY_STORE_COMPACT_EVERY', '10000')),
+            fsync=os.environ.get('MEMORY_STORE_FSYNC', 'false').lower() == 'true',
+            max_events=int(os.environ.get('MEMORY_STORE_MAX_EVENTS', '100000')),
+        )
+    if backend != 'mongo':
+        raise ValueError(f"Unknown STORAGE_BACKEND {backend!r} (expected 'mongo' or 'memory')")
+    return MongoStorage(
+        mongo_url,
+        maxPoolSize=int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+        minPoolSize=int(os.environ.get('MONGO_MIN_POOL_SIZE', '0')),
+        serverSelectionTimeoutMS=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+        connectTimeoutMS=int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+    )
+
+def connect_database():
+    global storage
+    storage = create_storage()
+    storage.connect()
 
-app = FastAPI(title="Westports AI Voice Agent API")
+def close_database():
+    global storage
+    if storage is not None:
+        storage.close()
+    storage = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global traffic_recorder
+    setup_logging()
+    if os.environ.get('LOOP_MONITOR_ENABLED', 'true').lower() != 'false':
+        loop_monitor.start()
+    await run_in_threadpool(connect_database)
+    await run_in_threadpool(initialize_database)
+    if worker_lease:
+        await run_in_threadpool(worker_lease.acquire)
+        worker_lease.start()
+    journal.start()
+    if traffic_capture_path:
+        traffic_recorder = await run_in_threadpool(TrafficRecorder, traffic_capture_path)
+    await run_in_threadpool(gate_lane.load)
+    await run_in_threadpool(berth_schedule.load)
+    await run_in_threadpool(yard.load)
+    berth_schedule_refresh.start()
+    yard_refresh.start()
+    if os.environ.get('GATEPASS_EXPIRY_ENABLED', 'true').lower() != 'false':
+        await run_in_threadpool(gatepass_expiry.load)
+        gatepass_expiry.start()
+    time_to_ready = startup_timings["timeToReadySeconds"] = time.perf_counter() - _import_started
+    TIME_TO_READY_SECONDS.set(time_to_ready)
+    logger.info("Ready in %.0fms (import %.0fms)", time_to_ready * 1000,
+                (startup_timings["importSeconds"] or 0.0) * 1000, extra=startup_timings)
+    try:
+        yield
+    finally:
+        # Graceful drain: stop expiring, flush queued events, close sockets, then the pool
+        await gatepass_expiry.stop()
+        await yard_refresh.stop()
+        await berth_schedule_refresh.stop()
+        await manager.shutdown(timeout=float(os.environ.get('SHUTDOWN_DRAIN_TIMEOUT_MS', '5000')) / 1000)
+        await loop_monitor.stop()
+        if traffic_recorder:
+            traffic_recorder.close()
+            traffic_recorder = None
+        await run_in_threadpool(journal.close)
+        if worker_lease:
+            await worker_lease.stop()
+            await run_in_threadpool(worker_lease.release)
+        await run_in_threadpool(close_database)
+        await run_in_threadpool(shutdown_logging)
+
+app = FastAPI(title="Westports AI Voice Agent API", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -25,27 +151,180 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+
+# Ultravox tool names by endpoint, used to label per-tool metrics
+TOOL_NAMES = {
+    "/api/containers/status": "getContainerStatus",
+    "/api/containers/update": "updateContainerStatus",
+    "/api/gatepass/generate": "generateEGatepass",
+    "/api/vessels/schedule": "checkVesselSchedule",
+    "/api/ssr/submit": "submitSSR",
+}
+
+# Opt-in sampling profiler, armed through the admin API
+profiler = SamplingProfiler()
+app.add_middleware(ProfilerMiddleware, profiler=profiler)
+
+# Optional capture of tool calls for time-scaled replay (benchmarks/replay.py)
+traffic_capture_path = os.environ.get('TRAFFIC_CAPTURE_PATH')
+# The recorder (and its file) is opened by the lifespan handler, not at import
+traffic_recorder: Optional[TrafficRecorder] = None
+if traffic_capture_path:
+    app.add_middleware(TrafficCaptureMiddleware, get_recorder=lambda: traffic_recorder, paths=TOOL_NAMES)
+
+# Id worker for gatepass, SSR and event ids: ID_WORKER_ID when set (unique per process across
+# every host), otherwise leased from storage at startup so workers and pods never share one
+worker_lease = None if os.environ.get('ID_WORKER_ID') else WorkerIdLease(
+    lambda: storage, generator, ttl=float(os.environ.get('ID_WORKER_LEASE_TTL_SECONDS', '60')))
+
+# Write-behind journal of tool calls and state transitions (per-container timelines).
+# Keep {worker} in JOURNAL_SPILL_PATH so each worker process spills to its own file;
+# relative paths are resolved next to this module, not the working directory.
+journal_spill_path = os.environ.get('JOURNAL_SPILL_PATH', 'event_journal.{worker}.spill.jsonl')
+journal = EventJournal(
+    lambda: storage,
+    spill_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), journal_spill_path) if journal_spill_path else None,
+    batch_size=int(os.environ.get('JOURNAL_BATCH_SIZE', '500')),
+    max_pending=int(os.environ.get('JOURNAL_MAX_PENDING', '50000')),
+)
+JOURNAL_PENDING.set_function(lambda: len(journal))
+app.add_middleware(JournalMiddleware, journal=journal, tools=TOOL_NAMES)
+
+# Call id, tool and container on every log record of a tool call (outermost, so it times the whole call)
+app.add_middleware(
+    LogContextMiddleware,
+    tools=TOOL_NAMES,
+    sample_rates=parse_sample_rates(os.environ.get('LOG_SAMPLE_RATES')),
+    slow_ms=float(os.environ.get('LOG_SLOW_MS', '500')),
+)
 
 # WebSocket connection manager
 class ConnectionManager:
     def __init__(self):
         self.active_connections: List[WebSocket] = []
+        self.queue: Optional[asyncio.Queue] = None
+        self._sender: Optional[asyncio.Task] = None
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.append(websocket)
+        WS_CONNECTIONS_TOTAL.inc()
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
+
+    def pending(self) -> int:
+        return self.queue.qsize() if self.queue is not None else 0
 
     async def broadcast(self, message: dict):
-        for connection in self.active_connections:
+        """Queue an event for fan-out; sending happens off the request path."""
+        self._ensure_sender().put_nowait(message)
+
+    def _ensure_sender(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self.queue is None or self._sender is None or self._sender.done() or self._sender.get_loop() is not loop:
+            self.queue = asyncio.Queue()
+            self._sender = loop.create_task(self._drain(self.queue))
+        return self.queue
+
+    async def _drain(self, queue: asyncio.Queue):
+        while True:
+            message = await queue.get()
+            try:
+                await self._send(message)
+            finally:
+                queue.task_done()
+
+    async def _send(self, message: dict):
+        if not self.active_connections:
+            return
+        # Encode once for every connection; records splice in their cached JSON
+        text = encode_json(message).decode("utf-8")
+        with BROADCAST_SEND_SECONDS.time():
+            for connection in list(self.active_connections):
+                try:
+                    await connection.send_text(text)
+                except Exception:
+                    BROADCAST_DROPPED.inc()
+
+    async def shutdown(self, timeout: float = 5.0):
+        """Flush pending broadcasts, then close every WebSocket."""
+        if self.queue is not None and self._sender is not None and not self._sender.done():
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Dropping %d undelivered broadcasts on shutdown", self.pending())
+            self._sender.cancel()
+        for connection in list(self.active_connections):
             try:
-                await connection.send_text(json.dumps(message))
-            except:
+                await connection.close(code=1001)
+            except Exception:
                 pass
+        self.active_connections.clear()
 
 manager = ConnectionManager()
+WS_CONNECTIONS.set_function(lambda: len(manager.active_connections))
+BROADCAST_QUEUE_DEPTH.set_function(manager.pending)
+
+
+# How many SSR summaries each container keeps in recentSSRs
+SSR_RECENT_LIMIT = int(os.environ.get('SSR_RECENT_LIMIT', '5'))
+
+# Response profile for tool calls without ?profile= (voice, full or dashboard)
+RESPONSE_PROFILE_DEFAULT = os.environ.get('RESPONSE_PROFILE_DEFAULT', FULL)
+
+
+def response_profile(profile: Optional[str] = None) -> str:
+    """Response profile from ``?profile=``, falling back to RESPONSE_PROFILE_DEFAULT."""
+    profile = profile or RESPONSE_PROFILE_DEFAULT
+    if profile not in PROFILES:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "message": f"Unknown response profile '{profile}'. Use one of: {', '.join(PROFILES)}",
+                "systemSource": "API"
+            }
+        )
+    return profile
+
+
+def tool_response(tool: str, payload: dict, profile: str = FULL) -> Response:
+    """Serialize a tool result, timing the encode as its own stage."""
+    with stage(tool, "serialize"):
+        body = encode_json(payload)
+    TOOL_RESPONSE_BYTES.labels(tool, profile).observe(len(body))
+    return Response(body, media_type="application/json")
+
+
+def container_not_found(tool: str, container_number: str) -> HTTPException:
+    TOOL_FAILURES.labels(tool, "not_found").inc()
+    return HTTPException(
+        status_code=404,
+        detail={
+            "success": False,
+            "message": f"Container {container_number} not found in our system",
+            "systemSource": "OPUS/ETP"
+        }
+    )
+
+
+def voyage_not_found(voyage_number: str) -> HTTPException:
+    return HTTPException(
+        status_code=404,
+        detail={"success": False, "message": f"Voyage {voyage_number} not found in CBAS system",
+                "systemSource": "CBAS"}
+    )
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    tool = TOOL_NAMES.get(request.url.path)
+    if tool:
+        TOOL_FAILURES.labels(tool, "request_validation").inc()
+    return await request_validation_exception_handler(request, exc)
 
 # Pydantic models
 class ContainerStatus(BaseModel):
@@ -64,16 +343,43 @@ class GatepassRequest(BaseModel):
 class VesselScheduleRequest(BaseModel):
     vesselName: Optional[str] = None
     voyageNumber: Optional[str] = None
+    # Schedule questions instead of one vessel: arrivals in the next hours, or who is at a berth
+    berth: Optional[str] = None
+    withinHours: Optional[float] = Field(None, gt=0, le=336)
+
+class VesselUpdate(BaseModel):
+    voyageNumber: str
+    eta: Optional[datetime] = None
+    etd: Optional[datetime] = None
+    berth: Optional[str] = None
+    status: Optional[str] = None
 
 class SSRRequest(BaseModel):
     containerNumber: str
     ssrType: str
     requestDetails: str
 
+class ProfilerStartRequest(BaseModel):
+    endpoint: Optional[str] = None
+    samplePercent: float = Field(0.0, ge=0, le=100)
+    durationSeconds: float = Field(60.0, gt=0, le=3600)
+    intervalMs: float = Field(5.0, ge=1, le=1000)
+
+# Admin endpoints require the X-Admin-Token header to match ADMIN_TOKEN
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    if not admin_token or not x_admin_token or not hmac.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(
+            status_code=403,
+            detail={"success": False, "message": "Admin token required"}
+        )
+
 # Initialize database with sample data
 def initialize_database():
+    get_storage().ensure_indexes()
+
     # Check if data already exists
-    if db.containers.count_documents({}) > 0:
+    if get_storage().containers.count() > 0:
         return
     
     # Sample containers data
@@ -100,7 +406,7 @@ def initialize_database():
             "consignee": "ABC TRADING SDN BHD",
             "shippingAgent": "MAERSK MALAYSIA",
             "portOfLoading": "SINGAPORE",
-            "ssrHistory": []
+            "recentSSRs": []
         },
         {
             "id": str(uuid.uuid4()),
@@ -124,7 +430,7 @@ def initialize_database():
             "consignee": "XYZ LOGISTICS",
             "shippingAgent": "EVERGREEN SHIPPING",
             "portOfLoading": "HONG KONG",
-            "ssrHistory": []
+            "recentSSRs": []
         },
         {
             "id": str(uuid.uuid4()),
@@ -148,12 +454,12 @@ def initialize_database():
             "consignee": "GLOBAL IMPORTS",
             "shippingAgent": "MSC MALAYSIA",
             "portOfLoading": "ROTTERDAM",
-            "ssrHistory": []
+            "recentSSRs": []
         }
     ]
     
     # Insert containers
-    db.containers.insert_many(containers_data)
+    get_storage().containers.insert_many(containers_data)
     
     # Sample vessels data
     vessels_data = [
@@ -181,10 +487,65 @@ def initialize_database():
         }
     ]
     
-    db.vessels.insert_many(vessels_data)
+    get_storage().vessels.insert_many(vessels_data)
+
+# Event-loop lag monitor
+loop_monitor = LoopLagMonitor(
+    interval=float(os.environ.get('LOOP_LAG_INTERVAL_MS', '100')) / 1000,
+    threshold=float(os.environ.get('LOOP_LAG_THRESHOLD_MS', '100')) / 1000,
+)
+
+# Readiness probe: cached, rate-limited storage checks (Mongo ping plus index check)
+readiness_probe = ReadinessProbe(
+    lambda: storage,
+    ttl=float(os.environ.get('READINESS_CACHE_TTL_MS', '2000')) / 1000,
+    timeout=float(os.environ.get('READINESS_TIMEOUT_MS', '2000')) / 1000,
+)
+
+# Dwell/storage charges: per-container (cached per day) for the tools, batch for the yard
+charge_engine = ChargeEngine(free_days=int(os.environ.get('STORAGE_FREE_DAYS', '3')))
 
-# Initialize database on startup
-initialize_database()
+# Hot map of ACTIVE gatepasses for gate-lane lookups, loaded at startup
+gate_lane = GateLane(lambda: storage)
+
+async def on_gatepass_expired(gatepass, container):
+    gate_lane.deactivate(gatepass.id)
+    journal.record("gatepassExpired", gatepass.get("containerNumber"), data={
+        "gatepassId": gatepass.id, "activeGatepassCleared": container is not None,
+    })
+    logger.info("Gatepass %s expired", gatepass.id,
+                extra={"gatepassId": gatepass.id, "containerNumber": gatepass.get("containerNumber")})
+    await manager.broadcast({
+        "type": "gatepassExpired",
+        "gatepass": gatepass,
+        "containerNumber": gatepass.get("containerNumber"),
+        "activeGatepassCleared": container is not None,
+        "timestamp": datetime.utcnow().isoformat(),
+        "action": "GATEPASS_EXPIRED"
+    })
+
+# Per-block yard occupancy, loaded at startup and adjusted on container moves
+yard = YardOccupancy(lambda: storage)
+
+# Interval index of vessel stays per berth, loaded at startup and refreshed on schedule writes
+berth_schedule = BerthSchedule(
+    lambda: storage,
+    history=timedelta(days=float(os.environ.get('BERTH_SCHEDULE_HISTORY_DAYS', '30'))),
+)
+
+# Both are also rebuilt from storage periodically, to pick up other workers' writes (0 disables)
+yard_refresh = PeriodicRefresh("yard", yard.fetch, yard.install,
+                               interval=float(os.environ.get('YARD_REFRESH_SECONDS', '30')))
+berth_schedule_refresh = PeriodicRefresh("berth schedule", berth_schedule.fetch, berth_schedule.install,
+                                         interval=float(os.environ.get('BERTH_SCHEDULE_REFRESH_SECONDS', '30')))
+
+# Min-heap of ACTIVE gatepasses by validUntil; expires each pass when it falls due
+gatepass_expiry = GatepassExpiryScheduler(
+    lambda: storage,
+    on_expired=on_gatepass_expired,
+    batch_size=int(os.environ.get('GATEPASS_EXPIRY_BATCH_SIZE', '500')),
+)
+GATEPASS_EXPIRY_PENDING.set_function(lambda: len(gatepass_expiry))
 
 # WebSocket endpoint
 @app.websocket("/ws")
@@ -194,36 +555,41 @@ async def websocket_endpoint(websocket: WebSocket):
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
 
 # Ultravox Tool Endpoints
 @app.post("/api/containers/status")
-async def get_container_status(request: ContainerStatus):
+async def get_container_status(request: ContainerStatus, profile: str = Depends(response_profile)):
     """Ultravox tool: Get container status from ETP/OPUS system"""
-    print(f"🔍 Tool Call: getContainerStatus for {request.containerNumber}")
+    tool = "getContainerStatus"
+    bind(containerNumber=request.containerNumber)
+    logger.info("Container status query")
     
-    container = db.containers.find_one({"containerNumber": request.containerNumber})
+    with stage(tool, "db"):
+        container = get_storage().containers.get(request.containerNumber, profile)
     
     if container:
-        # Remove MongoDB ObjectId for JSON serialization
-        container.pop('_id', None)
-        
         # Emit real-time update to frontend
-        await manager.broadcast({
-            "type": "containerQueried",
-            "containerNumber": request.containerNumber,
-            "timestamp": datetime.utcnow().isoformat(),
-            "data": container,
-            "action": "STATUS_QUERY"
-        })
+        with stage(tool, "broadcast"):
+            await manager.broadcast({
+                "type": "containerQueried",
+                "containerNumber": request.containerNumber,
+                "timestamp": datetime.utcnow().isoformat(),
+                "data": container,
+                "action": "STATUS_QUERY"
+            })
         
-        return {
+        return tool_response(tool, {
             "success": True,
             "data": container,
+            "chargeBreakdown": charge_engine.for_container(container),
             "message": f"Container {request.containerNumber} found successfully in ETP system",
             "systemSource": "ETP/OPUS"
-        }
+        }, profile)
     else:
+        TOOL_FAILURES.labels(tool, "not_found").inc()
         raise HTTPException(
             status_code=404,
             detail={
@@ -234,11 +600,15 @@ async def get_container_status(request: ContainerStatus):
         )
 
 @app.post("/api/containers/update")
-async def update_container_status(request: ContainerUpdate):
+async def update_container_status(request: ContainerUpdate, profile: str = Depends(response_profile)):
     """Ultravox tool: Update container status in OPUS system"""
-    print(f"🔄 Tool Call: updateContainerStatus for {request.containerNumber} to {request.newStatus}")
+    tool = "updateContainerStatus"
+    bind(containerNumber=request.containerNumber)
+    logger.info("Container status update to %s", request.newStatus,
+                extra={"newStatus": request.newStatus, "location": request.location})
     
-    container = db.containers.find_one({"containerNumber": request.containerNumber})
+    with stage(tool, "db"):
+        container = get_storage().containers.get(request.containerNumber)
     
     if container:
         old_status = container["status"]
@@ -258,50 +628,60 @@ async def update_container_status(request: ContainerUpdate):
             update_data["gateOutTime"] = datetime.utcnow().isoformat()
             update_data["availableForPickup"] = False
         
-        db.containers.update_one(
-            {"containerNumber": request.containerNumber},
-            {"$set": update_data}
-        )
-        
-        # Get updated container
-        updated_container = db.containers.find_one({"containerNumber": request.containerNumber})
-        updated_container.pop('_id', None)
+        with stage(tool, "db"):
+            updated_container = get_storage().containers.update(request.containerNumber, update_data)
+        if updated_container is None:
+            raise container_not_found(tool, request.containerNumber)
+        changed_blocks = yard.apply(container, updated_container)
+        journal.record("containerStatusChanged", request.containerNumber, data={
+            "from": old_status,
+            "to": request.newStatus,
+            "location": updated_container.get("location"),
+            "version": updated_container.get("version"),
+        })
         
         # Emit real-time update to frontend
-        await manager.broadcast({
-            "type": "containerUpdated",
-            "containerNumber": request.containerNumber,
-            "oldStatus": old_status,
-            "newStatus": request.newStatus,
-            "timestamp": datetime.utcnow().isoformat(),
-            "data": updated_container,
-            "action": "STATUS_UPDATE"
-        })
+        with stage(tool, "broadcast"):
+            await manager.broadcast({
+                "type": "containerUpdated",
+                "containerNumber": request.containerNumber,
+                "oldStatus": old_status,
+                "newStatus": request.newStatus,
+                "timestamp": datetime.utcnow().isoformat(),
+                "data": updated_container,
+                "action": "STATUS_UPDATE"
+            })
+            if changed_blocks:
+                await manager.broadcast({
+                    "type": "yardOccupancyChanged",
+                    "containerNumber": request.containerNumber,
+                    "blocks": [yard.block(block) for block in changed_blocks],
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "action": "YARD_OCCUPANCY"
+                })
         
-        return {
+        return tool_response(tool, {
             "success": True,
-            "data": updated_container,
+            "data": updated_container.project(profile),
             "message": f"Container {request.containerNumber} successfully updated from {old_status} to {request.newStatus} in OPUS system",
             "systemSource": "OPUS/ETP"
-        }
+        }, profile)
     else:
-        raise HTTPException(
-            status_code=404,
-            detail={
-                "success": False,
-                "message": f"Container {request.containerNumber} not found in our system",
-                "systemSource": "OPUS/ETP"
-            }
-        )
+        raise container_not_found(tool, request.containerNumber)
 
 @app.post("/api/gatepass/generate")
-async def generate_gatepass(request: GatepassRequest):
+async def generate_gatepass(request: GatepassRequest, profile: str = Depends(response_profile)):
     """Ultravox tool: Generate eGatepass through ETP system"""
-    print(f"📋 Tool Call: generateEGatepass for {request.containerNumber} by {request.haulierCompany}")
+    tool = "generateEGatepass"
+    bind(containerNumber=request.containerNumber)
+    logger.info("eGatepass request by %s", request.haulierCompany,
+                extra={"haulierCompany": request.haulierCompany, "truckNumber": request.truckNumber})
     
-    container = db.containers.find_one({"containerNumber": request.containerNumber})
+    with stage(tool, "db"):
+        container = get_storage().containers.get(request.containerNumber)
     
     if not container:
+        TOOL_FAILURES.labels(tool, "not_found").inc()
         raise HTTPException(
             status_code=404,
             detail={
@@ -310,19 +690,15 @@ async def generate_gatepass(request: GatepassRequest):
             }
         )
     
-    # Validation checks
-    validation_errors = []
-    
-    if container["edoStatus"] != "RELEASED":
-        validation_errors.append("EDO not released by shipping agent")
-    
-    if container["customsStatus"] != "CLEARED":
-        validation_errors.append("Customs clearance pending")
-    
-    if not container["availableForPickup"]:
-        validation_errors.append(f"Container status {container['status']} not eligible for pickup")
+    # Validation checks (materialized on the container; derived here only for documents not yet backfilled)
+    with stage(tool, "validation"):
+        if "pickupBlockers" in container:
+            validation_errors = list(container["pickupBlockers"])
+        else:
+            validation_errors = pickup_blockers(container)
     
     if validation_errors:
+        TOOL_FAILURES.labels(tool, "validation").inc()
         raise HTTPException(
             status_code=400,
             detail={
@@ -333,11 +709,12 @@ async def generate_gatepass(request: GatepassRequest):
             }
         )
     
-    # Generate gatepass
-    gatepass_id = f"GP{int(datetime.utcnow().timestamp())}"
+    # Generate gatepass; the haulier pays terminal fees plus storage accrued up to today
+    breakdown = charge_engine.for_container(container)
+    gatepass_id = new_gatepass_id()
     valid_until = datetime.utcnow() + timedelta(hours=48)
     
-    gatepass = {
+    document = {
         "id": gatepass_id,
         "containerNumber": request.containerNumber,
         "haulierCompany": request.haulierCompany,
@@ -346,7 +723,8 @@ async def generate_gatepass(request: GatepassRequest):
         "validUntil": valid_until.isoformat(),
         "status": "ACTIVE",
         "generatedBy": "AISHA_AI_AGENT",
-        "charges": container["charges"],
+        "charges": breakdown["totalCharges"],
+        "storageCharges": breakdown["storageCharges"],
         "containerDetails": {
             "type": container["containerType"],
             "size": container["size"],
@@ -355,62 +733,73 @@ async def generate_gatepass(request: GatepassRequest):
         }
     }
     
-    # Save gatepass
-    db.gatepasses.insert_one(gatepass.copy())
-    
-    # Update container with active gatepass
-    db.containers.update_one(
-        {"containerNumber": request.containerNumber},
-        {"$set": {"activeGatepass": gatepass_id}}
-    )
+    with stage(tool, "db"):
+        # Save gatepass
+        gatepass = get_storage().gatepasses.insert(document)
+        
+        # Update container with active gatepass
+        get_storage().containers.update(request.containerNumber, {"activeGatepass": gatepass_id})
+    gate_lane.activate(gatepass)
+    gatepass_expiry.schedule(gatepass)
+    journal.record("gatepassGenerated", request.containerNumber, data={
+        "gatepassId": gatepass_id,
+        "haulierCompany": request.haulierCompany,
+        "truckNumber": request.truckNumber,
+        "validUntil": gatepass.get("validUntil"),
+    })
     
     # Emit real-time update to frontend
-    await manager.broadcast({
-        "type": "gatepassGenerated",
-        "gatepass": gatepass,
-        "containerNumber": request.containerNumber,
-        "timestamp": datetime.utcnow().isoformat(),
-        "action": "GATEPASS_GENERATED"
-    })
+    with stage(tool, "broadcast"):
+        await manager.broadcast({
+            "type": "gatepassGenerated",
+            "gatepass": gatepass,
+            "containerNumber": request.containerNumber,
+            "timestamp": datetime.utcnow().isoformat(),
+            "action": "GATEPASS_GENERATED"
+        })
     
-    return {
+    return tool_response(tool, {
         "success": True,
-        "data": gatepass,
+        "data": gatepass.project(profile),
+        "chargeBreakdown": breakdown,
         "message": f"eGatepass {gatepass_id} generated successfully for container {request.containerNumber}. Valid until {valid_until.strftime('%Y-%m-%d %H:%M:%S')}",
         "systemSource": "ETP"
-    }
+    }, profile)
 
 @app.post("/api/vessels/schedule")
-async def check_vessel_schedule(request: VesselScheduleRequest):
+async def check_vessel_schedule(request: VesselScheduleRequest, profile: str = Depends(response_profile)):
     """Ultravox tool: Check vessel schedule from CBAS system"""
-    print(f"🚢 Tool Call: checkVesselSchedule for {request.vesselName or request.voyageNumber}")
+    tool = "checkVesselSchedule"
+    if not request.vesselName and not request.voyageNumber and (request.berth or request.withinHours):
+        return await check_berth_schedule(request, profile)
+    logger.info("Vessel schedule query for %s", request.vesselName or request.voyageNumber,
+                extra={"vesselName": request.vesselName, "voyageNumber": request.voyageNumber})
     
-    query = {}
-    if request.vesselName:
-        query["vesselName"] = {"$regex": request.vesselName, "$options": "i"}
-    elif request.voyageNumber:
-        query["voyageNumber"] = request.voyageNumber.upper()
-    
-    vessel = db.vessels.find_one(query)
+    with stage(tool, "db"):
+        if request.voyageNumber and not request.vesselName:
+            vessel = get_storage().vessels.find_by_voyage(request.voyageNumber.upper(), profile)
+        else:
+            # With no filter at all the empty pattern matches the first vessel
+            vessel = get_storage().vessels.find_by_name(request.vesselName or "", profile)
     
     if vessel:
-        vessel.pop('_id', None)
+        with stage(tool, "broadcast"):
+            await manager.broadcast({
+                "type": "vesselQueried",
+                "vesselName": vessel["vesselName"],
+                "timestamp": datetime.utcnow().isoformat(),
+                "data": vessel,
+                "action": "VESSEL_SCHEDULE_QUERY"
+            })
         
-        await manager.broadcast({
-            "type": "vesselQueried",
-            "vesselName": vessel["vesselName"],
-            "timestamp": datetime.utcnow().isoformat(),
-            "data": vessel,
-            "action": "VESSEL_SCHEDULE_QUERY"
-        })
-        
-        return {
+        return tool_response(tool, {
             "success": True,
             "data": vessel,
             "message": "Vessel schedule information retrieved from CBAS system",
             "systemSource": "CBAS"
-        }
+        }, profile)
     else:
+        TOOL_FAILURES.labels(tool, "not_found").inc()
         raise HTTPException(
             status_code=404,
             detail={
@@ -420,14 +809,40 @@ async def check_vessel_schedule(request: VesselScheduleRequest):
             }
         )
 
+async def check_berth_schedule(request: VesselScheduleRequest, profile: str):
+    """checkVesselSchedule without a vessel: arrivals within the next hours, or a berth's occupancy"""
+    tool = "checkVesselSchedule"
+    now = datetime.utcnow()
+    logger.info("Berth schedule query for %s within %gh", request.berth or "any berth", request.withinHours or 0,
+                extra={"berth": request.berth, "withinHours": request.withinHours})
+    with stage(tool, "db"):
+        hours = request.withinHours or 0
+        if request.berth:
+            berth = request.berth.upper()
+            vessels = berth_schedule.occupancy(berth, now, now + timedelta(hours=hours, microseconds=1), profile)
+            message = f"{len(vessels)} vessel(s) at berth {berth} " + (f"in the next {hours:g} hours" if hours else "now")
+        else:
+            vessels = berth_schedule.arrivals(now, now + timedelta(hours=hours), profile)
+            message = f"{len(vessels)} vessel(s) arriving in the next {hours:g} hours"
+    return tool_response(tool, {
+        "success": True,
+        "data": vessels,
+        "message": f"{message} according to the CBAS schedule",
+        "systemSource": "CBAS"
+    }, profile)
+
 @app.post("/api/ssr/submit")
-async def submit_ssr(request: SSRRequest):
+async def submit_ssr(request: SSRRequest, profile: str = Depends(response_profile)):
     """Ultravox tool: Submit Special Service Request to ETP system"""
-    print(f"📝 Tool Call: submitSSR for {request.containerNumber} - {request.ssrType}")
+    tool = "submitSSR"
+    bind(containerNumber=request.containerNumber)
+    logger.info("SSR submission (%s)", request.ssrType, extra={"ssrType": request.ssrType})
     
-    container = db.containers.find_one({"containerNumber": request.containerNumber})
+    with stage(tool, "db"):
+        container = get_storage().containers.get(request.containerNumber)
     
     if not container:
+        TOOL_FAILURES.labels(tool, "not_found").inc()
         raise HTTPException(
             status_code=404,
             detail={
@@ -436,8 +851,8 @@ async def submit_ssr(request: SSRRequest):
             }
         )
     
-    ssr_id = f"SSR{int(datetime.utcnow().timestamp())}"
-    ssr = {
+    ssr_id = new_ssr_id()
+    document = {
         "id": ssr_id,
         "containerNumber": request.containerNumber,
         "ssrType": request.ssrType,
@@ -448,53 +863,372 @@ async def submit_ssr(request: SSRRequest):
         "expectedProcessingTime": "24-48 hours"
     }
     
-    # Save SSR
-    db.ssr_requests.insert_one(ssr.copy())
-    
-    # Update container SSR history
-    db.containers.update_one(
-        {"containerNumber": request.containerNumber},
-        {"$push": {"ssrHistory": ssr_id}}
-    )
+    with stage(tool, "db"):
+        # Save SSR
+        ssr = get_storage().ssr_requests.insert(document)
+        
+        # Keep a short summary on the container; the full history lives in ssr_requests
+        get_storage().containers.update(request.containerNumber, {}, push={"recentSSRs": ssr.summary()},
+                                        keep_last=SSR_RECENT_LIMIT)
+    journal.record("ssrSubmitted", request.containerNumber, data={"ssrId": ssr_id, "ssrType": request.ssrType})
     
     # Emit real-time update
-    await manager.broadcast({
-        "type": "ssrSubmitted",
-        "ssr": ssr,
-        "containerNumber": request.containerNumber,
-        "timestamp": datetime.utcnow().isoformat(),
-        "action": "SSR_SUBMITTED"
-    })
+    with stage(tool, "broadcast"):
+        await manager.broadcast({
+            "type": "ssrSubmitted",
+            "ssr": ssr,
+            "containerNumber": request.containerNumber,
+            "timestamp": datetime.utcnow().isoformat(),
+            "action": "SSR_SUBMITTED"
+        })
     
-    return {
+    return tool_response(tool, {
         "success": True,
-        "data": ssr,
+        "data": ssr.project(profile),
         "message": f"SSR {ssr_id} submitted successfully for {request.ssrType}. Expected processing time: 24-48 hours",
         "systemSource": "ETP"
-    }
+    }, profile)
+
+@app.get("/api/gate/lookup")
+async def gate_lookup(truckNumber: Optional[str] = None, gatepassId: Optional[str] = None):
+    """Gate lane: resolve a truck plate or gatepass id to its container and pickup eligibility"""
+    if not truckNumber and not gatepassId:
+        raise HTTPException(
+            status_code=400,
+            detail={"success": False, "message": "Provide truckNumber or gatepassId", "systemSource": "ETP/WSS"}
+        )
+    matches = gate_lane.lookup(truck_number=truckNumber, gatepass_id=gatepassId)
+    if not matches:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "success": False,
+                "message": f"No gatepass found for {f'gatepass {gatepassId}' if gatepassId else f'truck {truckNumber}'}",
+                "systemSource": "ETP/WSS"
+            }
+        )
+    return Response(encode_json({
+        "success": True,
+        "data": matches,
+        "eligible": any(match["eligible"] for match in matches),
+        "systemSource": "ETP/WSS"
+    }), media_type="application/json")
+
+@app.get("/api/containers/{container_number}/ssr")
+async def get_ssr_history(container_number: str, limit: int = Query(20, ge=1, le=100),
+                          cursor: Optional[str] = None, profile: str = Depends(response_profile)):
+    """SSR history of a container, newest first; pass ``nextCursor`` back as ``cursor`` for the next page"""
+    before = None
+    if cursor:
+        submitted_at, separator, ssr_id = cursor.partition("|")
+        if not separator:
+            raise HTTPException(
+                status_code=400,
+                detail={"success": False, "message": "Invalid cursor", "systemSource": "ETP"}
+            )
+        before = (submitted_at, ssr_id)
+
+    # One extra row tells us whether another page exists
+    ssrs = get_storage().ssr_requests.find_by_container(container_number, limit + 1, before, profile)
+    next_cursor = None
+    if len(ssrs) > limit:
+        ssrs = ssrs[:limit]
+        next_cursor = f"{ssrs[-1].get('submittedAt')}|{ssrs[-1].key}"
+
+    return Response(encode_json({
+        "success": True,
+        "data": ssrs,
+        "nextCursor": next_cursor,
+        "systemSource": "ETP"
+    }), media_type="application/json")
+
+@app.get("/api/containers/{container_number}/events")
+async def get_container_events(container_number: str, limit: int = Query(100, ge=1, le=1000),
+                               cursor: Optional[str] = None, types: Optional[List[str]] = Query(None, alias="type"),
+                               profile: str = Depends(response_profile)):
+    """Journal of a container's tool calls and state changes, oldest first (``type`` may repeat,
+    e.g. ``type=containerStatusChanged`` for its status timeline); pass ``nextCursor`` back as ``cursor``"""
+    # One extra row tells us whether another page exists
+    events = get_storage().events.find_by_container(container_number, limit + 1, cursor, types, profile)
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = events[-1].key
+
+    return Response(encode_json({
+        "success": True,
+        "data": events,
+        "nextCursor": next_cursor,
+        "systemSource": "OPUS/ETP"
+    }), media_type="application/json")
+
+@app.get("/api/pickup")
+async def list_pickup(consignee: Optional[str] = None, agent: Optional[str] = None, eligible: bool = True,
+                      limit: int = Query(50, ge=1, le=500), cursor: Optional[str] = None,
+                      profile: str = Depends(response_profile)):
+    """Containers a consignee or shipping agent can collect (``eligible=false`` lists the blocked
+    ones with their ``pickupBlockers``), in container-number order; pass ``nextCursor`` back as ``cursor``"""
+    parties = {name: value for name, value in (("consignee", consignee), ("agent", agent)) if value}
+    if len(parties) != 1:
+        raise HTTPException(
+            status_code=400,
+            detail={"success": False, "message": "Provide exactly one of consignee or agent", "systemSource": "ETP"}
+        )
+    (party, value), = parties.items()
+
+    # One extra row tells us whether another page exists
+    containers = get_storage().containers.find_pickup(PARTY_FIELDS[party], value, eligible, limit + 1, cursor, profile)
+    next_cursor = None
+    if len(containers) > limit:
+        containers = containers[:limit]
+        next_cursor = containers[-1].key
+
+    return Response(encode_json({
+        "success": True,
+        "data": containers,
+        "nextCursor": next_cursor,
+        "systemSource": "ETP"
+    }), media_type="application/json")
+
+@app.get("/api/charges/summary")
+async def get_charges_summary(top: int = Query(10, ge=0, le=100)):
+    """Storage charges across the whole yard as of today: totals, dwell bands and the longest dwellers"""
+    def price_yard():
+        priced = charge_engine.for_yard(get_storage().containers.all())
+        return charge_engine.summarize(priced, top)
+
+    summary = await run_in_threadpool(price_yard)
+    return Response(encode_json({
+        "success": True,
+        "data": dict(summary, asOf=datetime.utcnow().date().isoformat(), freeDays=charge_engine.free_days),
+        "systemSource": "ETP"
+    }), media_type="application/json")
+
+@app.get("/api/yard/blocks")
+async def list_yard_blocks():
+    """Containers and TEU per yard block (by row and status), from the live occupancy map"""
+    return Response(encode_json({
+        "success": True,
+        "data": yard.summary(),
+        "systemSource": "OPUS"
+    }), media_type="application/json")
+
+@app.get("/api/yard/blocks/{block}")
+async def get_yard_block(block: str, row: Optional[int] = Query(None, ge=0), limit: int = Query(50, ge=1, le=500),
+                         cursor: Optional[str] = None, profile: str = Depends(response_profile)):
+    """One block's occupancy plus its containers (or one row's) in container-number order;
+    pass ``nextCursor`` back as ``cursor`` for the next page"""
+    block = block.upper()
+    # One extra row tells us whether another page exists
+    containers = get_storage().containers.find_in_block(block, row, limit + 1, cursor, profile)
+    next_cursor = None
+    if len(containers) > limit:
+        containers = containers[:limit]
+        next_cursor = containers[-1].key
+
+    return Response(encode_json({
+        "success": True,
+        "data": yard.block(block),
+        "containers": containers,
+        "nextCursor": next_cursor,
+        "systemSource": "OPUS"
+    }), media_type="application/json")
+
+def schedule_window(start: Optional[datetime], end: Optional[datetime], hours: float):
+    """``from``/``to`` query parameters as naive UTC, defaulting to the next ``hours`` from now"""
+    start = parse_utc(start) or datetime.utcnow()
+    end = parse_utc(end) or start + timedelta(hours=hours)
+    if end <= start:
+        raise HTTPException(
+            status_code=400,
+            detail={"success": False, "message": "'to' must be after 'from'", "systemSource": "CBAS"}
+        )
+    return start, end
+
+@app.get("/api/vessels/arrivals")
+async def list_arrivals(start: Optional[datetime] = Query(None, alias="from"), end: Optional[datetime] = Query(None, alias="to"),
+                        hours: float = Query(12, gt=0, le=24 * 90), profile: str = Depends(response_profile)):
+    """Vessels arriving between ``from`` and ``to`` (default: the next ``hours``), in ETA order"""
+    start, end = schedule_window(start, end, hours)
+    return Response(encode_json({
+        "success": True,
+        "data": berth_schedule.arrivals(start, end, profile),
+        "from": format_utc(start),
+        "to": format_utc(end),
+        "systemSource": "CBAS"
+    }), media_type="application/json")
+
+@app.get("/api/vessels/departures")
+async def list_departures(start: Optional[datetime] = Query(None, alias="from"), end: Optional[datetime] = Query(None, alias="to"),
+                          hours: float = Query(12, gt=0, le=24 * 90), profile: str = Depends(response_profile)):
+    """Vessels departing between ``from`` and ``to`` (default: the next ``hours``), in ETD order"""
+    start, end = schedule_window(start, end, hours)
+    return Response(encode_json({
+        "success": True,
+        "data": berth_schedule.departures(start, end, profile),
+        "from": format_utc(start),
+        "to": format_utc(end),
+        "systemSource": "CBAS"
+    }), media_type="application/json")
+
+@app.get("/api/berths")
+async def list_berth_occupancy(at: Optional[datetime] = None, profile: str = Depends(response_profile)):
+    """Vessels alongside every occupied berth at ``at`` (default: now)"""
+    instant = parse_utc(at) or datetime.utcnow()
+    return Response(encode_json({
+        "success": True,
+        "data": berth_schedule.at(instant, profile),
+        "at": format_utc(instant),
+        "systemSource": "CBAS"
+    }), media_type="application/json")
+
+@app.get("/api/berths/{berth}/occupancy")
+async def get_berth_occupancy(berth: str, start: Optional[datetime] = Query(None, alias="from"),
+                              end: Optional[datetime] = Query(None, alias="to"), hours: float = Query(24, gt=0, le=24 * 90),
+                              profile: str = Depends(response_profile)):
+    """Vessels alongside ``berth`` at any time between ``from`` and ``to`` (default: the next ``hours``)"""
+    start, end = schedule_window(start, end, hours)
+    return Response(encode_json({
+        "success": True,
+        "data": berth_schedule.occupancy(berth.upper(), start, end, profile),
+        "berth": berth.upper(),
+        "from": format_utc(start),
+        "to": format_utc(end),
+        "systemSource": "CBAS"
+    }), media_type="application/json")
+
+@app.post("/api/vessels/update")
+async def update_vessel_schedule(request: VesselUpdate, profile: str = Depends(response_profile)):
+    """Reschedule a voyage (ETA/ETD, berth, status) and refresh the berth index"""
+    fields = request.model_dump(exclude={"voyageNumber"}, exclude_none=True)
+    for name in ("eta", "etd"):
+        if name in fields:
+            fields[name] = format_utc(fields[name])
+    if "berth" in fields:
+        fields["berth"] = fields["berth"].upper()
+    vessel = get_storage().vessels.find_by_voyage(request.voyageNumber.upper())
+    if vessel is None:
+        raise voyage_not_found(request.voyageNumber)
+    eta, etd = parse_utc(fields.get("eta", vessel.get("eta"))), parse_utc(fields.get("etd", vessel.get("etd")))
+    if eta is not None and etd is not None and etd <= eta:
+        raise HTTPException(
+            status_code=400,
+            detail={"success": False, "message": "ETD must be after ETA", "systemSource": "CBAS"}
+        )
+    updated = get_storage().vessels.update(request.voyageNumber.upper(), fields)
+    if updated is None:
+        raise voyage_not_found(request.voyageNumber)
+    berth_schedule.upsert(updated)
+    journal.record("vesselUpdated", data=dict(fields, voyageNumber=updated.get("voyageNumber")))
+    await manager.broadcast({
+        "type": "vesselUpdated",
+        "voyageNumber": updated.get("voyageNumber"),
+        "timestamp": datetime.utcnow().isoformat(),
+        "data": updated,
+        "action": "VESSEL_SCHEDULE_UPDATE"
+    })
+    return Response(encode_json({
+        "success": True,
+        "data": updated.project(profile),
+        "message": f"Voyage {updated.get('voyageNumber')} schedule updated in CBAS system",
+        "systemSource": "CBAS"
+    }), media_type="application/json")
 
 # Dashboard API
 @app.get("/api/dashboard")
-async def get_dashboard_data():
-    """Get all dashboard data"""
-    containers = list(db.containers.find({}, {"_id": 0}))
-    vessels = list(db.vessels.find({}, {"_id": 0}))
-    gatepasses = list(db.gatepasses.find({}, {"_id": 0}))
-    ssr_requests = list(db.ssr_requests.find({}, {"_id": 0}))
+async def get_dashboard_data(profile: Optional[str] = None):
+    """Get all dashboard data (``?profile=dashboard`` for the fields the frontend renders)"""
+    profile = response_profile(profile or FULL)
+    containers = get_storage().containers.all(profile)
+    vessels = get_storage().vessels.all(profile)
+    gatepasses = get_storage().gatepasses.all(profile)
+    ssr_requests = get_storage().ssr_requests.all(profile)
     
-    return {
+    return Response(encode_json({
         "success": True,
         "data": {
             "containers": containers,
             "vessels": vessels,
             "gatepasses": gatepasses,
-            "ssrRequests": ssr_requests
+            "ssrRequests": ssr_requests,
+            "yardBlocks": yard.summary()["blocks"]
         }
-    }
+    }), media_type="application/json")
 
 @app.get("/api/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.utcnow().isoformat(),
+        "eventLoop": loop_monitor.snapshot(),
+        "startup": startup_timings
+    }
+
+@app.get("/api/health/live")
+async def liveness_check():
+    """Liveness: the process is up and the event loop is serving requests"""
+    return {"status": "alive", "timestamp": datetime.utcnow().isoformat()}
+
+@app.get("/api/health/ready")
+async def readiness_check():
+    """Readiness: MongoDB is reachable and required indexes are present"""
+    if storage is None:
+        return JSONResponse(status_code=503, content={"status": "starting", "checkedAt": datetime.utcnow().isoformat()})
+    result = await readiness_probe.check()
+    return JSONResponse(status_code=200 if result["status"] == "ready" else 503, content=result)
+
+@app.get("/api/health/stalls")
+async def get_loop_stalls():
+    """Recent event-loop stalls with the stack of the blocking frame"""
+    return {"success": True, "data": loop_monitor.recent_stalls()}
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Prometheus text exposition of request, tool-stage and WebSocket metrics"""
+    return Response(content=REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+# Admin: sampling profiler
+@app.post("/api/admin/profiler/start", dependencies=[Depends(require_admin)])
+async def start_profiler(request: ProfilerStartRequest):
+    """Profile one endpoint, or a percentage of all requests, for a time window"""
+    if not request.endpoint and request.samplePercent <= 0:
+        raise HTTPException(
+            status_code=400,
+            detail={"success": False, "message": "Specify an endpoint or a samplePercent above 0"}
+        )
+    # Join a previous sampler thread off the loop; start() itself must run on the loop thread
+    await run_in_threadpool(profiler.stop)
+    profiler.start(
+        endpoint=request.endpoint,
+        sample_percent=request.samplePercent,
+        duration=request.durationSeconds,
+        interval=request.intervalMs / 1000,
+    )
+    logger.info("Profiler armed for %s (%ss)", request.endpoint or f"{request.samplePercent}% of requests",
+                request.durationSeconds)
+    return {"success": True, "data": profiler.status()}
+
+@app.post("/api/admin/profiler/stop", dependencies=[Depends(require_admin)])
+async def stop_profiler():
+    # stop() joins the sampler thread (up to a second): keep that off the event loop
+    await run_in_threadpool(profiler.stop)
+    return {"success": True, "data": profiler.status()}
+
+@app.get("/api/admin/profiler", dependencies=[Depends(require_admin)])
+async def get_profiler_status():
+    return {"success": True, "data": profiler.status()}
+
+@app.get("/api/admin/profiler/profile", dependencies=[Depends(require_admin)])
+async def download_profile():
+    """Aggregated samples as collapsed stacks (flamegraph.pl / speedscope input)"""
+    return Response(
+        content=profiler.collapsed(),
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="profile-{datetime.utcnow().strftime("%Y%m%dT%H%M%S")}.folded"'}
+    )
+
+import_seconds = startup_timings["importSeconds"] = time.perf_counter() - _import_started
+IMPORT_SECONDS.set(import_seconds)
 
 if __name__ == "__main__":
     import uvicorn
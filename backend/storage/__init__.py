@@ -0,0 +1,24 @@
+"""Pluggable storage engines behind the tool endpoints.
+
+``STORAGE_BACKEND=mongo`` (default) uses MongoDB; ``STORAGE_BACKEND=memory``
+runs without any external database.
+"""
+from storage.base import (
+    ContainerRepository, EventRepository, GatepassRepository, SSRRepository, Storage, VesselRepository,
+    WorkerLeaseRepository,
+)
+from storage.memory import MemoryStorage
+from storage.mongo import REQUIRED_INDEXES, MongoStorage
+
+__all__ = [
+    "ContainerRepository",
+    "EventRepository",
+    "GatepassRepository",
+    "MemoryStorage",
+    "MongoStorage",
+    "REQUIRED_INDEXES",
+    "SSRRepository",
+    "Storage",
+    "VesselRepository",
+    "WorkerLeaseRepository",
+]
@@ -0,0 +1,179 @@
+"""Repository interfaces the API endpoints are written against.
+
+Reads return immutable typed records (``records.py``); writes accept either
+records or plain dicts shaped like the MongoDB documents.  Every write bumps
+the document's ``version``, which keys the cached JSON encoding.  Read
+methods taking a ``profile`` return records trimmed to that response profile.
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from records import FULL, ContainerRecord, EventRecord, GatepassRecord, SSRRecord, VesselRecord
+
+
+class ContainerRepository(ABC):
+    @abstractmethod
+    def get(self, container_number: str, profile: str = FULL) -> Optional[ContainerRecord]:
+        """Container by number, or None."""
+
+    @abstractmethod
+    def update(self, container_number: str, fields: Dict, push: Optional[Dict[str, Any]] = None,
+               keep_last: Optional[int] = None, expected: Optional[Dict] = None) -> Optional[ContainerRecord]:
+        """Set ``fields`` (and append to arrays in ``push``, keeping the newest ``keep_last``);
+        return the updated container.
+
+        With ``expected``, only update if those fields currently hold those values.
+        """
+
+    @abstractmethod
+    def insert_many(self, documents: Iterable[Union[ContainerRecord, Dict]]):
+        pass
+
+    @abstractmethod
+    def find_pickup(self, party_field: str, party: str, eligible: bool = True, limit: int = 50,
+                    after: Optional[str] = None, profile: str = FULL) -> List[ContainerRecord]:
+        """Containers of a consignee/agent (``party_field``) by pickup eligibility,
+        in container-number order, starting after the ``after`` container number."""
+
+    @abstractmethod
+    def find_in_block(self, block: str, row: Optional[int] = None, limit: int = 50, after: Optional[str] = None,
+                      profile: str = FULL) -> List[ContainerRecord]:
+        """Containers in a yard block (and row), in container-number order,
+        starting after the ``after`` container number."""
+
+    @abstractmethod
+    def yard_counts(self) -> List[Dict]:
+        """Container counts per ``yardBlock``, ``yardRow``, ``status`` and ``size``
+        (as ``count``), over containers that are in a yard block."""
+
+    @abstractmethod
+    def count(self) -> int:
+        pass
+
+    @abstractmethod
+    def all(self, profile: str = FULL) -> List[ContainerRecord]:
+        pass
+
+
+class VesselRepository(ABC):
+    @abstractmethod
+    def find_by_name(self, pattern: str, profile: str = FULL) -> Optional[VesselRecord]:
+        """First vessel whose name matches ``pattern`` (case-insensitive regex)."""
+
+    @abstractmethod
+    def find_by_voyage(self, voyage_number: str, profile: str = FULL) -> Optional[VesselRecord]:
+        pass
+
+    @abstractmethod
+    def update(self, voyage_number: str, fields: Dict) -> Optional[VesselRecord]:
+        """Set ``fields`` on the voyage; return the updated vessel, or None if unknown."""
+
+    @abstractmethod
+    def find_overlapping(self, start: datetime, end: Optional[datetime] = None, berth: Optional[str] = None,
+                         profile: str = FULL) -> List[VesselRecord]:
+        """Vessels whose stay (``eta`` to ``etd``) overlaps ``start``..``end`` (open-ended
+        without ``end``), optionally at one berth, in ``eta`` order."""
+
+    @abstractmethod
+    def insert_many(self, documents: Iterable[Union[VesselRecord, Dict]]):
+        pass
+
+    @abstractmethod
+    def all(self, profile: str = FULL) -> List[VesselRecord]:
+        pass
+
+
+class GatepassRepository(ABC):
+    @abstractmethod
+    def insert(self, document: Union[GatepassRecord, Dict]) -> GatepassRecord:
+        pass
+
+    @abstractmethod
+    def get(self, gatepass_id: str) -> Optional[GatepassRecord]:
+        pass
+
+    @abstractmethod
+    def find_by_truck(self, plate: str) -> List[GatepassRecord]:
+        """Gatepasses of any status for a plate as ``normalize_plate`` spells it (``truckPlate``)."""
+
+    @abstractmethod
+    def find_active(self) -> List[GatepassRecord]:
+        """Every gatepass with status ACTIVE, earliest ``validUntil`` first."""
+
+    @abstractmethod
+    def update(self, gatepass_id: str, fields: Dict, expected: Optional[Dict] = None) -> Optional[GatepassRecord]:
+        """Set ``fields`` if the gatepass exists (and matches ``expected``); return it updated."""
+
+    @abstractmethod
+    def all(self, profile: str = FULL) -> List[GatepassRecord]:
+        pass
+
+
+class SSRRepository(ABC):
+    @abstractmethod
+    def insert(self, document: Union[SSRRecord, Dict]) -> SSRRecord:
+        pass
+
+    @abstractmethod
+    def find_by_container(self, container_number: str, limit: int = 20,
+                          before: Optional[Tuple[str, str]] = None, profile: str = FULL) -> List[SSRRecord]:
+        """A container's SSRs, newest first, strictly older than ``before`` (submittedAt, id)."""
+
+    @abstractmethod
+    def all(self, profile: str = FULL) -> List[SSRRecord]:
+        pass
+
+
+class EventRepository(ABC):
+    @abstractmethod
+    def insert_many(self, documents: Iterable[Union[EventRecord, Dict]]) -> int:
+        """Append events, skipping ids already stored (replays are idempotent); return how many were new."""
+
+    @abstractmethod
+    def find_by_container(self, container_number: str, limit: int = 100, after: Optional[str] = None,
+                          types: Optional[Iterable[str]] = None, profile: str = FULL) -> List[EventRecord]:
+        """A container's events oldest first (id order), after the ``after`` id, optionally of some types."""
+
+
+class WorkerLeaseRepository(ABC):
+    @abstractmethod
+    def claim(self, owner: str, ttl: float, max_worker: int) -> Optional[int]:
+        """Lease the lowest worker id in ``0..max_worker`` that is free, expired or already ``owner``'s,
+        for ``ttl`` seconds; None if every id is held."""
+
+    @abstractmethod
+    def renew(self, worker_id: int, owner: str, ttl: float) -> bool:
+        """Extend ``owner``'s lease by ``ttl`` seconds; False if it no longer holds ``worker_id``."""
+
+    @abstractmethod
+    def release(self, worker_id: int, owner: str):
+        pass
+
+
+class Storage(ABC):
+    """A storage engine: one repository per collection plus lifecycle hooks."""
+
+    name = "base"
+    containers: ContainerRepository
+    vessels: VesselRepository
+    gatepasses: GatepassRepository
+    ssr_requests: SSRRepository
+    events: EventRepository
+    worker_leases: WorkerLeaseRepository
+
+    @abstractmethod
+    def connect(self):
+        """Open connections / load persisted state. Called once at startup."""
+
+    @abstractmethod
+    def close(self):
+        pass
+
+    @abstractmethod
+    def ensure_indexes(self):
+        pass
+
+    @abstractmethod
+    def health_checks(self) -> Dict[str, Dict]:
+        """Blocking readiness checks: ``{name: {"ok": bool, "latencyMs": float, ...}}``."""
@@ -0,0 +1,502 @@
+"""In-memory storage engine with hash indexes and optional persistence.
+
+Every collection is a table of immutable records keyed by an internal row
+id, with hash indexes on the fields the endpoints look up by (container
+number, voyage, truck, gatepass/SSR id), so tool calls never scan.  Updates
+swap in a new record (copy-on-write), so reads hand out the stored record
+itself instead of a copy.  With a ``path``, state survives restarts: writes
+are appended to ``oplog.jsonl`` and folded into ``snapshot.json`` on
+compaction and at shutdown.
+
+Journal events are the exception: the engine keeps only the latest
+``max_events`` of them, in memory, outside the oplog and snapshot (their
+durable home is MongoDB), so the journal cannot grow either without bound.
+"""
+import json
+import os
+import re
+import threading
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from datetime import datetime
+from time import monotonic, perf_counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, Union, cast
+
+from records import FULL, ContainerRecord, EventRecord, GatepassRecord, Record, SSRRecord, VesselRecord, format_utc
+from storage.base import (
+    ContainerRepository, EventRepository, GatepassRepository, SSRRepository, Storage, VesselRepository,
+    WorkerLeaseRepository,
+)
+
+SNAPSHOT_FILE = "snapshot.json"
+OPLOG_FILE = "oplog.jsonl"
+
+
+def _clone(value):
+    """Copy a JSON-shaped document; much cheaper than copy.deepcopy."""
+    if isinstance(value, dict):
+        return {k: _clone(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_clone(v) for v in value]
+    return value
+
+
+IndexField = Union[str, Tuple[str, ...]]
+
+
+def _index_value(record: Record, field: IndexField):
+    if isinstance(field, tuple):
+        return tuple(record.get(name) for name in field)
+    return record.get(field)
+
+
+class Table:
+    """Records addressed by row id, with hash indexes on selected fields.
+
+    An index on a tuple of fields is keyed by the tuple of their values.
+    Writers hold ``lock``; readers copy what they iterate while holding it,
+    so a write from another thread (the journal writer) cannot resize a dict
+    under them.
+    """
+
+    def __init__(self, name: str, record_type: Type[Record], indexed_fields: Iterable[IndexField],
+                 lock: Optional[threading.RLock] = None):
+        self.name = name
+        self.record_type = record_type
+        self.lock = lock or threading.RLock()
+        self.rows: Dict[int, Record] = {}
+        # value -> row ids in insertion order (dict keys, so re-indexing a row is O(1))
+        self.indexes: Dict[IndexField, Dict[Any, Dict[int, None]]] = {
+            field: defaultdict(dict) for field in indexed_fields
+        }
+        self._next_row = 0
+
+    def insert(self, record: Record) -> int:
+        row = self._next_row
+        self._next_row += 1
+        self.rows[row] = record
+        for field, index in self.indexes.items():
+            index[_index_value(record, field)][row] = None
+        return row
+
+    def delete(self, row: int):
+        record = self.rows.pop(row)
+        for field, index in self.indexes.items():
+            value = _index_value(record, field)
+            bucket = index[value]
+            del bucket[row]
+            if not bucket:
+                del index[value]
+
+    def rows_for(self, field: IndexField, value) -> List[int]:
+        with self.lock:
+            return list(self.indexes[field].get(value, {}))
+
+    def first_row(self, field: IndexField, value) -> Optional[int]:
+        with self.lock:
+            return next(iter(self.indexes[field].get(value, {})), None)
+
+    def first(self, field: IndexField, value) -> Optional[Record]:
+        with self.lock:
+            row = self.first_row(field, value)
+            return self.rows[row] if row is not None else None
+
+    def find(self, field: IndexField, value) -> List[Record]:
+        with self.lock:
+            return [self.rows[row] for row in self.indexes[field].get(value, {})]
+
+    def records(self) -> List[Record]:
+        with self.lock:
+            return list(self.rows.values())
+
+    def update(self, row: int, fields: Dict, push: Optional[Dict[str, Any]] = None,
+               keep_last: Optional[int] = None) -> Record:
+        record = self.rows[row]
+        updated = record.replace(fields, push, keep_last=keep_last)
+        for field, index in self.indexes.items():
+            old_value, new_value = _index_value(record, field), _index_value(updated, field)
+            if old_value != new_value:
+                bucket = index[old_value]
+                del bucket[row]
+                if not bucket:
+                    del index[old_value]
+                index[new_value][row] = None
+        self.rows[row] = updated
+        return updated
+
+    def clear(self):
+        self.rows.clear()
+        for index in self.indexes.values():
+            index.clear()
+        self._next_row = 0
+
+
+class MemoryContainers(ContainerRepository):
+    def __init__(self, storage: "MemoryStorage"):
+        self.storage = storage
+        self.table = storage.tables["containers"]
+
+    def get(self, container_number: str, profile: str = FULL) -> Optional[ContainerRecord]:
+        record = self.table.first("containerNumber", container_number)
+        return record.project(profile) if record is not None else None
+
+    def update(self, container_number: str, fields: Dict, push: Optional[Dict[str, Any]] = None,
+               keep_last: Optional[int] = None, expected: Optional[Dict] = None) -> Optional[ContainerRecord]:
+        return cast(Optional[ContainerRecord], self.storage.update_one(
+            "containers", "containerNumber", container_number, fields, push, keep_last, expected))
+
+    def insert_many(self, documents: Iterable[Union[ContainerRecord, Dict]]):
+        self.storage.insert_many("containers", documents)
+
+    def find_pickup(self, party_field: str, party: str, eligible: bool = True, limit: int = 50,
+                    after: Optional[str] = None, profile: str = FULL) -> List[ContainerRecord]:
+        # Only this party's containers with that eligibility are touched, never the whole table
+        records = sorted(self.table.find((party_field, "pickupEligible"), (party, eligible)),
+                         key=lambda record: record.containerNumber)
+        if after is not None:
+            records = records[bisect_right([record.containerNumber for record in records], after):]
+        return [record.project(profile) for record in records[:limit]]
+
+    def find_in_block(self, block: str, row: Optional[int] = None, limit: int = 50, after: Optional[str] = None,
+                      profile: str = FULL) -> List[ContainerRecord]:
+        records = sorted((record for record in self.table.find("yardBlock", block)
+                          if row is None or record.get("yardRow") == row),
+                         key=lambda record: record.containerNumber)
+        if after is not None:
+            records = records[bisect_right([record.containerNumber for record in records], after):]
+        return [record.project(profile) for record in records[:limit]]
+
+    def yard_counts(self) -> List[Dict]:
+        counts: Counter = Counter()
+        with self.storage.lock:
+            for block, rows in self.table.indexes["yardBlock"].items():
+                if block is None:
+                    continue
+                for row in rows:
+                    record = self.table.rows[row]
+                    counts[(block, record.get("yardRow"), record.get("status"), record.get("size"))] += 1
+        return [{"yardBlock": block, "yardRow": row, "status": status, "size": size, "count": count}
+                for (block, row, status, size), count in counts.items()]
+
+    def count(self) -> int:
+        return len(self.table.rows)
+
+    def all(self, profile: str = FULL) -> List[ContainerRecord]:
+        return [record.project(profile) for record in self.table.records()]
+
+
+class MemoryVessels(VesselRepository):
+    def __init__(self, storage: "MemoryStorage"):
+        self.storage = storage
+        self.table = storage.tables["vessels"]
+
+    def find_by_name(self, pattern: str, profile: str = FULL) -> Optional[VesselRecord]:
+        # The vessel list is small; a regex scan mirrors MongoDB's $regex semantics
+        try:
+            regex = re.compile(pattern, re.IGNORECASE)
+        except re.error:
+            regex = re.compile(re.escape(pattern), re.IGNORECASE)
+        for record in self.table.records():
+            if regex.search(record.get("vesselName") or ""):
+                return record.project(profile)
+        return None
+
+    def find_by_voyage(self, voyage_number: str, profile: str = FULL) -> Optional[VesselRecord]:
+        record = self.table.first("voyageNumber", voyage_number)
+        return record.project(profile) if record is not None else None
+
+    def update(self, voyage_number: str, fields: Dict) -> Optional[VesselRecord]:
+        return cast(Optional[VesselRecord], self.storage.update_one("vessels", "voyageNumber", voyage_number, fields))
+
+    def find_overlapping(self, start: datetime, end: Optional[datetime] = None, berth: Optional[str] = None,
+                         profile: str = FULL) -> List[VesselRecord]:
+        # A port calls at most a few thousand voyages; scan and compare the canonical
+        # "...Z" strings, which order like the times they encode
+        since, until = format_utc(start), format_utc(end) if end is not None else None
+        matches = [
+            record for record in self.table.records()
+            if record.get("eta") and record.get("etd") and record.get("etd") > since
+            and (until is None or record.get("eta") < until) and (berth is None or record.get("berth") == berth)
+        ]
+        matches.sort(key=lambda record: record.get("eta"))
+        return [record.project(profile) for record in matches]
+
+    def insert_many(self, documents: Iterable[Union[VesselRecord, Dict]]):
+        self.storage.insert_many("vessels", documents)
+
+    def all(self, profile: str = FULL) -> List[VesselRecord]:
+        return [record.project(profile) for record in self.table.records()]
+
+
+class MemoryGatepasses(GatepassRepository):
+    def __init__(self, storage: "MemoryStorage"):
+        self.storage = storage
+        self.table = storage.tables["gatepasses"]
+
+    def insert(self, document: Union[GatepassRecord, Dict]) -> GatepassRecord:
+        return cast(GatepassRecord, self.storage.insert_many("gatepasses", [document])[0])
+
+    def get(self, gatepass_id: str) -> Optional[GatepassRecord]:
+        return cast(Optional[GatepassRecord], self.table.first("id", gatepass_id))
+
+    def find_by_truck(self, plate: str) -> List[GatepassRecord]:
+        return cast(List[GatepassRecord], self.table.find("truckPlate", plate))
+
+    def find_active(self) -> List[GatepassRecord]:
+        active = cast(List[GatepassRecord], self.table.find("status", "ACTIVE"))
+        return sorted(active, key=lambda record: record.get("validUntil") or "")
+
+    def update(self, gatepass_id: str, fields: Dict, expected: Optional[Dict] = None) -> Optional[GatepassRecord]:
+        return cast(Optional[GatepassRecord],
+                    self.storage.update_one("gatepasses", "id", gatepass_id, fields, expected=expected))
+
+    def all(self, profile: str = FULL) -> List[GatepassRecord]:
+        return [record.project(profile) for record in self.table.records()]
+
+
+class MemorySSRRequests(SSRRepository):
+    def __init__(self, storage: "MemoryStorage"):
+        self.storage = storage
+        self.table = storage.tables["ssr_requests"]
+
+    def insert(self, document: Union[SSRRecord, Dict]) -> SSRRecord:
+        return cast(SSRRecord, self.storage.insert_many("ssr_requests", [document])[0])
+
+    def find_by_container(self, container_number: str, limit: int = 20,
+                          before: Optional[Tuple[str, str]] = None, profile: str = FULL) -> List[SSRRecord]:
+        records = sorted(self.table.find("containerNumber", container_number),
+                         key=lambda record: (record.get("submittedAt") or "", record.get("id") or ""), reverse=True)
+        if before is not None:
+            records = [record for record in records
+                       if (record.get("submittedAt") or "", record.get("id") or "") < tuple(before)]
+        return [record.project(profile) for record in records[:limit]]
+
+    def all(self, profile: str = FULL) -> List[SSRRecord]:
+        return [record.project(profile) for record in self.table.records()]
+
+
+class MemoryEvents(EventRepository):
+    def __init__(self, storage: "MemoryStorage"):
+        self.storage = storage
+        self.table = storage.tables["events"]
+
+    def insert_many(self, documents: Iterable[Union[EventRecord, Dict]]) -> int:
+        with self.storage.lock:
+            fresh = [doc for doc in documents if self.table.first_row("id", doc.get("id")) is None]
+            inserted = len(self.storage.insert_many("events", fresh))
+            # Evict the oldest events (rows are kept in insertion order)
+            while len(self.table.rows) > self.storage.max_events:
+                self.table.delete(next(iter(self.table.rows)))
+            return inserted
+
+    def find_by_container(self, container_number: str, limit: int = 100, after: Optional[str] = None,
+                          types: Optional[Iterable[str]] = None, profile: str = FULL) -> List[EventRecord]:
+        types = set(types) if types else None
+        records = sorted((record for record in self.table.find("containerNumber", container_number)
+                          if types is None or record.get("type") in types), key=lambda record: record.key)
+        if after is not None:
+            records = records[bisect_right([record.key for record in records], after):]
+        return [record.project(profile) for record in records[:limit]]
+
+
+class MemoryWorkerLeases(WorkerLeaseRepository):
+    """Leases within this process; the memory engine is never shared between processes."""
+
+    def __init__(self, storage: "MemoryStorage"):
+        self.storage = storage
+        self.leases: Dict[int, Tuple[str, float]] = {}
+
+    def claim(self, owner: str, ttl: float, max_worker: int) -> Optional[int]:
+        with self.storage.lock:
+            now = monotonic()
+            for worker_id in range(max_worker + 1):
+                holder, expires = self.leases.get(worker_id, (owner, now))
+                if holder == owner or expires <= now:
+                    self.leases[worker_id] = (owner, now + ttl)
+                    return worker_id
+            return None
+
+    def renew(self, worker_id: int, owner: str, ttl: float) -> bool:
+        with self.storage.lock:
+            if self.leases.get(worker_id, (None, 0.0))[0] != owner:
+                return False
+            self.leases[worker_id] = (owner, monotonic() + ttl)
+            return True
+
+    def release(self, worker_id: int, owner: str):
+        with self.storage.lock:
+            if self.leases.get(worker_id, (None, 0.0))[0] == owner:
+                del self.leases[worker_id]
+
+
+class MemoryStorage(Storage):
+    name = "memory"
+
+    RECORD_TYPES = {
+        "containers": ContainerRecord,
+        "vessels": VesselRecord,
+        "gatepasses": GatepassRecord,
+        "ssr_requests": SSRRecord,
+        "events": EventRecord,
+    }
+
+    # Hash-indexed fields per collection
+    INDEXES = {
+        "containers": (
+            "containerNumber",
+            ("consignee", "pickupEligible"),
+            ("shippingAgent", "pickupEligible"),
+            "yardBlock",
+        ),
+        "vessels": ("voyageNumber",),
+        "gatepasses": ("id", "truckPlate", "containerNumber", "status"),
+        "ssr_requests": ("id", "containerNumber"),
+        "events": ("id", "containerNumber"),
+    }
+
+    # Kept in memory only (bounded by max_events), never logged or snapshotted
+    VOLATILE = frozenset({"events"})
+
+    def __init__(self, path: Optional[str] = None, compact_every: int = 10000, fsync: bool = False,
+                 max_events: int = 100_000):
+        self.path = path
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.max_events = max_events
+        self.lock = threading.RLock()
+        self.tables = {name: Table(name, self.RECORD_TYPES[name], fields, self.lock)
+                       for name, fields in self.INDEXES.items()}
+        self.containers = MemoryContainers(self)
+        self.vessels = MemoryVessels(self)
+        self.gatepasses = MemoryGatepasses(self)
+        self.ssr_requests = MemorySSRRequests(self)
+        self.events = MemoryEvents(self)
+        self.worker_leases = MemoryWorkerLeases(self)
+        self._oplog = None
+        self._ops_since_snapshot = 0
+
+    # Lifecycle
+    def connect(self):
+        if not self.path:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        with self.lock:
+            self._load()
+            self._oplog = open(os.path.join(self.path, OPLOG_FILE), "a", encoding="utf-8")
+
+    def close(self):
+        with self.lock:
+            if self._oplog is not None:
+                self.snapshot()
+                self._oplog.close()
+                self._oplog = None
+
+    def ensure_indexes(self):
+        # Hash indexes are maintained on every write
+        pass
+
+    def health_checks(self) -> Dict[str, Dict]:
+        started = perf_counter()
+        with self.lock:
+            counts = {name: len(table.rows) for name, table in self.tables.items()}
+        check = {"ok": True, "documents": counts, "persistent": bool(self.path)}
+        if self.path and self._oplog is None:
+            check = dict(check, ok=False, error="persistence log is not open")
+        check["latencyMs"] = round((perf_counter() - started) * 1000, 3)
+        return {"memory": check}
+
+    # Writes
+    def insert_many(self, collection: str, documents: Iterable[Union[Record, Dict]]) -> List[Record]:
+        inserted = []
+        with self.lock:
+            table = self.tables[collection]
+            for document in documents:
+                if not isinstance(document, Record):
+                    document = _clone(document)
+                record = table.record_type.new(document)
+                table.insert(record)
+                if collection not in self.VOLATILE:
+                    self.log({"op": "insert", "c": collection, "d": record.to_doc()})
+                inserted.append(record)
+        return inserted
+
+    def update_one(self, collection: str, field: str, value, fields: Dict,
+                   push: Optional[Dict[str, Any]] = None, keep_last: Optional[int] = None,
+                   expected: Optional[Dict] = None) -> Optional[Record]:
+        """Update the first record where ``field == value`` (and ``expected`` holds); return the new version."""
+        with self.lock:
+            table = self.tables[collection]
+            row = table.first_row(field, value)
+            if row is None:
+                return None
+            current = table.rows[row]
+            if expected and any(current.get(name) != wanted for name, wanted in expected.items()):
+                return None
+            record = table.update(row, _clone(fields), _clone(push), keep_last)
+            if collection in self.VOLATILE:
+                return record
+            op = {"op": "update", "c": collection, "f": field, "k": value, "set": fields, "push": push}
+            if keep_last is not None:
+                op["keep"] = keep_last
+            self.log(op)
+            return record
+
+    # Persistence
+    def log(self, op: Dict):
+        if self._oplog is None:
+            return
+        self._oplog.write(json.dumps(op, separators=(",", ":")) + "\n")
+        self._oplog.flush()
+        if self.fsync:
+            os.fsync(self._oplog.fileno())
+        self._ops_since_snapshot += 1
+        if self._ops_since_snapshot >= self.compact_every:
+            self.snapshot()
+
+    def snapshot(self):
+        """Write all tables to snapshot.json atomically and truncate the oplog."""
+        with self.lock:
+            target = os.path.join(self.path, SNAPSHOT_FILE)
+            temp = target + ".tmp"
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump({name: [record.to_doc() for record in table.rows.values()]
+                           for name, table in self.tables.items() if name not in self.VOLATILE}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, target)
+            if self._oplog is not None:
+                self._oplog.truncate(0)
+                self._oplog.seek(0)
+            self._ops_since_snapshot = 0
+
+    def _load(self):
+        for table in self.tables.values():
+            table.clear()
+        snapshot = os.path.join(self.path, SNAPSHOT_FILE)
+        if os.path.exists(snapshot):
+            with open(snapshot, encoding="utf-8") as f:
+                for name, documents in json.load(f).items():
+                    if name in self.tables:
+                        table = self.tables[name]
+                        for document in documents:
+                            # new() materializes derived fields missing from older snapshots
+                            table.insert(table.record_type.new(document))
+        oplog = os.path.join(self.path, OPLOG_FILE)
+        if os.path.exists(oplog):
+            with open(oplog, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        break  # torn final write from a crash
+                    self._apply(op)
+                    self._ops_since_snapshot += 1
+
+    def _apply(self, op: Dict):
+        table = self.tables[op["c"]]
+        if op["op"] == "insert":
+            table.insert(table.record_type.from_doc(op["d"]))
+        elif op["op"] == "update":
+            row = table.first_row(op["f"], op["k"])
+            if row is not None:
+                table.update(row, op.get("set") or {}, op.get("push"), op.get("keep"))
@@ -0,0 +1,394 @@
+"""MongoDB storage engine (pymongo)."""
+import logging
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from pymongo import ASCENDING, DESCENDING, MongoClient, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from records import FULL, ContainerRecord, EventRecord, GatepassRecord, SSRRecord, VesselRecord, format_utc, parse_utc
+from storage.base import (
+    ContainerRepository, EventRepository, GatepassRepository, SSRRepository, Storage, VesselRepository,
+    WorkerLeaseRepository,
+)
+
+logger = logging.getLogger(__name__)
+
+NO_ID = {"_id": 0}
+
+# Indexes the tool endpoints depend on; readiness fails if any are missing
+REQUIRED_INDEXES: Dict[str, List[Dict[str, Any]]] = {
+    "containers": [
+        {"keys": [("containerNumber", ASCENDING)], "unique": True},
+        # Pickup listings per consignee/agent, paged by container number
+        {"keys": [("consignee", ASCENDING), ("pickupEligible", ASCENDING), ("containerNumber", ASCENDING)]},
+        {"keys": [("shippingAgent", ASCENDING), ("pickupEligible", ASCENDING), ("containerNumber", ASCENDING)]},
+        # Yard block listings (whole block or one row), paged by container number
+        {"keys": [("yardBlock", ASCENDING), ("containerNumber", ASCENDING)]},
+        {"keys": [("yardBlock", ASCENDING), ("yardRow", ASCENDING), ("containerNumber", ASCENDING)]},
+    ],
+    "vessels": [
+        {"keys": [("voyageNumber", ASCENDING)]},
+        # Schedule range queries: arrivals by eta, stays overlapping a window, one berth's calendar
+        {"keys": [("eta", ASCENDING)]},
+        {"keys": [("etd", ASCENDING)]},
+        {"keys": [("berth", ASCENDING), ("eta", ASCENDING)]},
+    ],
+    "gatepasses": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("containerNumber", ASCENDING)]},
+        {"keys": [("truckPlate", ASCENDING)]},
+        # ACTIVE passes for the gate-lane map, in expiry order
+        {"keys": [("status", ASCENDING), ("validUntil", ASCENDING)]},
+    ],
+    "ssr_requests": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        # Serves a container's SSR history newest-first, page by page
+        {"keys": [("containerNumber", ASCENDING), ("submittedAt", DESCENDING), ("id", DESCENDING)]},
+    ],
+    "events": [
+        # Unique so journal replays can skip events already written
+        {"keys": [("id", ASCENDING)], "unique": True},
+        # A container's timeline in id (creation) order
+        {"keys": [("containerNumber", ASCENDING), ("id", ASCENDING)]},
+    ],
+    "worker_leases": [
+        # Let MongoDB drop leases their process stopped renewing
+        {"keys": [("expiresAt", ASCENDING)], "expireAfterSeconds": 0},
+    ],
+}
+
+
+def index_options(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """``create_index`` keyword arguments for a ``REQUIRED_INDEXES`` entry."""
+    options = {"unique": spec.get("unique", False)}
+    if "expireAfterSeconds" in spec:
+        options["expireAfterSeconds"] = spec["expireAfterSeconds"]
+    return options
+
+
+class MongoContainers(ContainerRepository):
+    def __init__(self, collection):
+        self.collection = collection
+
+    def get(self, container_number: str, profile: str = FULL) -> Optional[ContainerRecord]:
+        return ContainerRecord.from_doc(
+            self.collection.find_one({"containerNumber": container_number}, ContainerRecord.projection(profile)),
+            profile,
+        )
+
+    def update(self, container_number: str, fields: Dict, push: Optional[Dict[str, Any]] = None,
+               keep_last: Optional[int] = None, expected: Optional[Dict] = None) -> Optional[ContainerRecord]:
+        update: Dict[str, Dict] = {"$inc": {"version": 1}}
+        if fields:
+            update["$set"] = fields
+        if push and keep_last is not None:
+            update["$push"] = {name: {"$each": [value], "$slice": -keep_last} for name, value in push.items()}
+        elif push:
+            update["$push"] = push
+        # One round trip for write + read-back
+        doc = self.collection.find_one_and_update(
+            dict(expected or {}, containerNumber=container_number),
+            update,
+            projection=NO_ID,
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            return None
+        derived = ContainerRecord.derived(doc)
+        if any(doc.get(name) != value for name, value in derived.items()):
+            # Materialize pickup eligibility from the post-update document.  Conditional on
+            # the version: if another write got in first, it materializes from newer state.
+            result = self.collection.update_one(
+                {"containerNumber": container_number, "version": doc.get("version")},
+                {"$set": derived, "$inc": {"version": 1}},
+            )
+            if result.modified_count:
+                doc = dict(doc, **derived, version=doc.get("version") + 1)
+        return ContainerRecord.from_doc(doc)
+
+    def insert_many(self, documents: Iterable[Union[ContainerRecord, Dict]]):
+        self.collection.insert_many([ContainerRecord.new(doc).to_doc() for doc in documents])
+
+    def find_pickup(self, party_field: str, party: str, eligible: bool = True, limit: int = 50,
+                    after: Optional[str] = None, profile: str = FULL) -> List[ContainerRecord]:
+        query = {party_field: party, "pickupEligible": eligible}
+        if after is not None:
+            query["containerNumber"] = {"$gt": after}
+        cursor = (self.collection.find(query, ContainerRecord.projection(profile))
+                  .sort("containerNumber", ASCENDING).limit(limit))
+        return [ContainerRecord.from_doc(doc, profile) for doc in cursor]
+
+    def find_in_block(self, block: str, row: Optional[int] = None, limit: int = 50, after: Optional[str] = None,
+                      profile: str = FULL) -> List[ContainerRecord]:
+        query: Dict[str, Any] = {"yardBlock": block}
+        if row is not None:
+            query["yardRow"] = row
+        if after is not None:
+            query["containerNumber"] = {"$gt": after}
+        cursor = (self.collection.find(query, ContainerRecord.projection(profile))
+                  .sort("containerNumber", ASCENDING).limit(limit))
+        return [ContainerRecord.from_doc(doc, profile) for doc in cursor]
+
+    def yard_counts(self) -> List[Dict]:
+        cursor = self.collection.aggregate([
+            {"$match": {"yardBlock": {"$ne": None}}},
+            {"$group": {
+                "_id": {"yardBlock": "$yardBlock", "yardRow": "$yardRow", "status": "$status", "size": "$size"},
+                "count": {"$sum": 1},
+            }},
+        ])
+        return [dict(group["_id"], count=group["count"]) for group in cursor]
+
+    def count(self) -> int:
+        return self.collection.count_documents({})
+
+    def all(self, profile: str = FULL) -> List[ContainerRecord]:
+        return [ContainerRecord.from_doc(doc, profile) for doc in self.collection.find({}, ContainerRecord.projection(profile))]
+
+
+def vessel_to_bson(doc: Dict) -> Dict:
+    """``eta``/``etd`` as BSON dates, so they range-query and sort by time."""
+    return dict(doc, **{name: parse_utc(doc[name]) for name in VesselRecord.TIME_FIELDS if doc.get(name)})
+
+
+def _vessel(doc: Optional[Dict], profile: str = FULL):
+    if doc is None:
+        return None
+    # Documents not yet migrated still hold strings; from_doc keeps those as they are
+    times = {name: format_utc(doc[name]) for name in VesselRecord.TIME_FIELDS if isinstance(doc.get(name), datetime)}
+    return VesselRecord.from_doc(dict(doc, **times) if times else doc, profile)
+
+
+class MongoVessels(VesselRepository):
+    def __init__(self, collection):
+        self.collection = collection
+
+    def find_by_name(self, pattern: str, profile: str = FULL) -> Optional[VesselRecord]:
+        return _vessel(self.collection.find_one(
+            {"vesselName": {"$regex": pattern, "$options": "i"}}, VesselRecord.projection(profile)), profile)
+
+    def find_by_voyage(self, voyage_number: str, profile: str = FULL) -> Optional[VesselRecord]:
+        return _vessel(
+            self.collection.find_one({"voyageNumber": voyage_number}, VesselRecord.projection(profile)), profile)
+
+    def update(self, voyage_number: str, fields: Dict) -> Optional[VesselRecord]:
+        return _vessel(self.collection.find_one_and_update(
+            {"voyageNumber": voyage_number},
+            {"$set": vessel_to_bson(fields), "$inc": {"version": 1}},
+            projection=NO_ID,
+            return_document=ReturnDocument.AFTER,
+        ))
+
+    def find_overlapping(self, start: datetime, end: Optional[datetime] = None, berth: Optional[str] = None,
+                         profile: str = FULL) -> List[VesselRecord]:
+        query: Dict[str, Any] = {"etd": {"$gt": parse_utc(start)}}
+        if end is not None:
+            query["eta"] = {"$lt": parse_utc(end)}
+        if berth is not None:
+            query["berth"] = berth
+        cursor = self.collection.find(query, VesselRecord.projection(profile)).sort("eta", ASCENDING)
+        return [_vessel(doc, profile) for doc in cursor]
+
+    def insert_many(self, documents: Iterable[Union[VesselRecord, Dict]]):
+        self.collection.insert_many([vessel_to_bson(VesselRecord.new(doc).to_doc()) for doc in documents])
+
+    def all(self, profile: str = FULL) -> List[VesselRecord]:
+        return [_vessel(doc, profile) for doc in self.collection.find({}, VesselRecord.projection(profile))]
+
+
+class MongoGatepasses(GatepassRepository):
+    def __init__(self, collection):
+        self.collection = collection
+
+    def insert(self, document: Union[GatepassRecord, Dict]) -> GatepassRecord:
+        record = GatepassRecord.new(document)
+        self.collection.insert_one(record.to_doc())
+        return record
+
+    def get(self, gatepass_id: str) -> Optional[GatepassRecord]:
+        return GatepassRecord.from_doc(self.collection.find_one({"id": gatepass_id}, NO_ID))
+
+    def find_by_truck(self, plate: str) -> List[GatepassRecord]:
+        return [GatepassRecord.from_doc(doc) for doc in self.collection.find({"truckPlate": plate}, NO_ID)]
+
+    def find_active(self) -> List[GatepassRecord]:
+        cursor = self.collection.find({"status": "ACTIVE"}, NO_ID).sort("validUntil", ASCENDING)
+        return [GatepassRecord.from_doc(doc) for doc in cursor]
+
+    def update(self, gatepass_id: str, fields: Dict, expected: Optional[Dict] = None) -> Optional[GatepassRecord]:
+        return GatepassRecord.from_doc(self.collection.find_one_and_update(
+            dict(expected or {}, id=gatepass_id),
+            {"$set": fields, "$inc": {"version": 1}},
+            projection=NO_ID,
+            return_document=ReturnDocument.AFTER,
+        ))
+
+    def all(self, profile: str = FULL) -> List[GatepassRecord]:
+        return [GatepassRecord.from_doc(doc, profile) for doc in self.collection.find({}, GatepassRecord.projection(profile))]
+
+
+class MongoSSRRequests(SSRRepository):
+    def __init__(self, collection):
+        self.collection = collection
+
+    def insert(self, document: Union[SSRRecord, Dict]) -> SSRRecord:
+        record = SSRRecord.new(document)
+        self.collection.insert_one(record.to_doc())
+        return record
+
+    def find_by_container(self, container_number: str, limit: int = 20,
+                          before: Optional[Tuple[str, str]] = None, profile: str = FULL) -> List[SSRRecord]:
+        query: Dict[str, Any] = {"containerNumber": container_number}
+        if before is not None:
+            submitted_at, ssr_id = before
+            query["$or"] = [
+                {"submittedAt": {"$lt": submitted_at}},
+                {"submittedAt": submitted_at, "id": {"$lt": ssr_id}},
+            ]
+        cursor = (self.collection.find(query, SSRRecord.projection(profile))
+                  .sort([("submittedAt", DESCENDING), ("id", DESCENDING)])
+                  .limit(limit))
+        return [SSRRecord.from_doc(doc, profile) for doc in cursor]
+
+    def all(self, profile: str = FULL) -> List[SSRRecord]:
+        return [SSRRecord.from_doc(doc, profile) for doc in self.collection.find({}, SSRRecord.projection(profile))]
+
+
+class MongoEvents(EventRepository):
+    def __init__(self, collection):
+        self.collection = collection
+
+    def insert_many(self, documents: Iterable[Union[EventRecord, Dict]]) -> int:
+        documents = [EventRecord.new(doc).to_doc() for doc in documents]
+        if not documents:
+            return 0
+        try:
+            return len(self.collection.insert_many(documents, ordered=False).inserted_ids)
+        except BulkWriteError as exc:
+            # Duplicate ids are events a previous attempt already wrote
+            if any(error.get("code") != 11000 for error in exc.details.get("writeErrors", [])):
+                raise
+            return exc.details.get("nInserted", 0)
+
+    def find_by_container(self, container_number: str, limit: int = 100, after: Optional[str] = None,
+                          types: Optional[Iterable[str]] = None, profile: str = FULL) -> List[EventRecord]:
+        query: Dict[str, Any] = {"containerNumber": container_number}
+        if after is not None:
+            query["id"] = {"$gt": after}
+        if types:
+            query["type"] = {"$in": list(types)}
+        cursor = (self.collection.find(query, EventRecord.projection(profile))
+                  .sort("id", ASCENDING).limit(limit))
+        return [EventRecord.from_doc(doc, profile) for doc in cursor]
+
+
+class MongoWorkerLeases(WorkerLeaseRepository):
+    """One document per leased worker id (``_id``), so the unique ``_id`` index arbitrates claims."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def claim(self, owner: str, ttl: float, max_worker: int) -> Optional[int]:
+        now = datetime.utcnow()
+        held = {doc["_id"] for doc in self.collection.find({"expiresAt": {"$gt": now}, "owner": {"$ne": owner}},
+                                                           {"_id": 1})}
+        for worker_id in range(max_worker + 1):
+            if worker_id in held:
+                continue
+            try:
+                # Takes over an expired (or our own) lease; inserts when the id was never leased
+                self.collection.update_one(
+                    {"_id": worker_id, "$or": [{"expiresAt": {"$lte": now}}, {"owner": owner}]},
+                    {"$set": {"owner": owner, "expiresAt": now + timedelta(seconds=ttl)}}, upsert=True)
+            except DuplicateKeyError:
+                # Another process leased it since we looked
+                continue
+            return worker_id
+        return None
+
+    def renew(self, worker_id: int, owner: str, ttl: float) -> bool:
+        result = self.collection.update_one({"_id": worker_id, "owner": owner},
+                                            {"$set": {"expiresAt": datetime.utcnow() + timedelta(seconds=ttl)}})
+        return result.matched_count == 1
+
+    def release(self, worker_id: int, owner: str):
+        self.collection.delete_one({"_id": worker_id, "owner": owner})
+
+
+class MongoStorage(Storage):
+    name = "mongo"
+
+    def __init__(self, url: str, db_name: str = "westports_db", **client_options):
+        self.url = url
+        self.db_name = db_name
+        self.client_options = client_options
+        self.client: Optional[MongoClient] = None
+        self.db: Any = None
+
+    def connect(self):
+        self.client = MongoClient(self.url, **self.client_options)
+        self.use_database(self.client[self.db_name])
+
+    def use_database(self, db):
+        self.db = db
+        self.containers = MongoContainers(db.containers)
+        self.vessels = MongoVessels(db.vessels)
+        self.gatepasses = MongoGatepasses(db.gatepasses)
+        self.ssr_requests = MongoSSRRequests(db.ssr_requests)
+        self.events = MongoEvents(db.events)
+        self.worker_leases = MongoWorkerLeases(db.worker_leases)
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+        self.client = None
+        self.db = None
+
+    def ensure_indexes(self):
+        """Build every required index; raises if any can't be, rather than serving with readiness stuck red."""
+        failed = []
+        for collection, specs in REQUIRED_INDEXES.items():
+            for spec in specs:
+                try:
+                    self.db[collection].create_index(spec["keys"], **index_options(spec))
+                except Exception as e:
+                    logger.error("Could not create index on %s: %s", collection, e)
+                    hint = " (duplicate legacy ids: run `python -m migrations.unique_ids`)" if isinstance(
+                        e, DuplicateKeyError) else ""
+                    failed.append(f"{collection}.{'_'.join(field for field, _ in spec['keys'])}{hint}")
+        if failed:
+            raise RuntimeError(f"Could not create required indexes: {', '.join(failed)}")
+
+    def health_checks(self) -> Dict[str, Dict]:
+        checks: Dict[str, Dict[str, Any]] = {}
+
+        started = perf_counter()
+        try:
+            self.db.client.admin.command("ping")
+            checks["mongo"] = {"ok": True}
+        except Exception as exc:
+            checks["mongo"] = {"ok": False, "error": str(exc)}
+        checks["mongo"]["latencyMs"] = round((perf_counter() - started) * 1000, 3)
+        if not checks["mongo"]["ok"]:
+            return checks
+
+        started = perf_counter()
+        try:
+            missing = self.missing_indexes()
+            checks["indexes"] = {"ok": not missing, "missing": missing}
+        except Exception as exc:
+            checks["indexes"] = {"ok": False, "error": str(exc)}
+        checks["indexes"]["latencyMs"] = round((perf_counter() - started) * 1000, 3)
+        return checks
+
+    def missing_indexes(self) -> List[str]:
+        missing = []
+        for collection, specs in REQUIRED_INDEXES.items():
+            present = [list(info["key"]) for info in self.db[collection].index_information().values()]
+            for spec in specs:
+                keys = [(field, direction) for field, direction in spec["keys"]]
+                if keys not in present:
+                    missing.append(f"{collection}.{'_'.join(field for field, _ in keys)}")
+        return missing
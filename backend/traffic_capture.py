@@ -0,0 +1,129 @@
+"""Optional capture of live tool-call traffic for later replay.
+
+Enabled by setting ``TRAFFIC_CAPTURE_PATH``.  Each captured tool call is one
+compact JSON line with its offset from the start of the capture, so
+``benchmarks/replay.py`` can reproduce the real arrival pattern:
+
+    {"capture":1,"startedAt":"2025-07-01T08:00:00.000000"}
+    {"t":12.034512,"p":"/api/containers/status","q":"profile=voice","b":{"containerNumber":"ABCD1234567"},"s":200,"ms":3.1}
+
+``q`` (the query string, e.g. the response profile) is present only when
+the call had one.
+
+Paths ending in ``.gz`` are gzip-compressed.  Requests are handed to a
+writer thread through a queue, so the event loop never waits on disk.
+"""
+import gzip
+import json
+import logging
+import queue
+import threading
+from datetime import datetime
+from time import perf_counter
+from typing import Callable, Collection, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class TrafficRecorder:
+    def __init__(self, path: str, max_pending: int = 100000):
+        self.path = path
+        self.started = perf_counter()
+        self.recorded = 0
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        opener = gzip.open if path.endswith(".gz") else open
+        self._file = opener(path, "at", encoding="utf-8")
+        self._write({"capture": 1, "startedAt": datetime.utcnow().isoformat()})
+        self._writer = threading.Thread(target=self._drain, name="traffic-capture", daemon=True)
+        self._writer.start()
+
+    def offset(self) -> float:
+        return perf_counter() - self.started
+
+    def record(self, offset: float, path: str, body: bytes, status: int, duration: float, query: str = ""):
+        try:
+            payload = json.loads(body) if body else None
+        except ValueError:
+            payload = body.decode("utf-8", "replace")
+        entry = {"t": round(offset, 6), "p": path}
+        if query:
+            entry["q"] = query
+        entry.update(b=payload, s=status, ms=round(duration * 1000, 3))
+        try:
+            self._queue.put_nowait(entry)
+            self.recorded += 1
+        except queue.Full:
+            # Never slow down live calls for the sake of the capture
+            self.dropped += 1
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def _drain(self):
+        while True:
+            entry = self._queue.get()
+            if entry is _STOP:
+                break
+            self._write(entry)
+            # Write everything already queued before flushing once
+            while True:
+                try:
+                    entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    self._file.flush()
+                    return
+                self._write(entry)
+            self._file.flush()
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._writer.join(timeout=5)
+        self._file.close()
+        if self.dropped:
+            logger.warning("Traffic capture dropped %d requests (writer fell behind)", self.dropped)
+
+
+class TrafficCaptureMiddleware:
+    """Pure ASGI middleware recording request bodies and outcomes of tool calls.
+
+    ``get_recorder`` returns the recorder, or None while there is none (before
+    startup opens the capture file and after shutdown closes it).
+    """
+
+    def __init__(self, app, get_recorder: Callable[[], Optional[TrafficRecorder]], paths: Collection[str]):
+        self.app = app
+        self.get_recorder = get_recorder
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        recorder = self.get_recorder()
+        if recorder is None or scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        offset = recorder.offset()
+        chunks = []
+        status_code = 500
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            recorder.record(offset, scope["path"], b"".join(chunks), status_code, recorder.offset() - offset,
+                            scope.get("query_string", b"").decode("latin-1"))
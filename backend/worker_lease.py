@@ -0,0 +1,82 @@
+"""Lease this process a worker id for ``ids.generator`` from storage.
+
+Without ``ID_WORKER_ID`` the id generator would fall back to the process
+id, which collides across containers (which mostly run as pid 1 or 7) and
+between pids 1024 apart; two workers issuing the same id in one
+millisecond fail the gatepass/SSR insert and make the journal drop events
+as "already written".  Instead each process claims the lowest free worker
+id in storage for ``ttl`` seconds and renews it every third of that.  A
+process that dies stops renewing, so its id frees up once the lease
+expires; one that finds its lease taken over (it stalled past the ttl)
+leases a fresh id before issuing more.
+"""
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Callable, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from ids import MAX_WORKER, IdGenerator
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerIdLease:
+    def __init__(self, get_storage: Callable, generator: IdGenerator, ttl: float = 60.0):
+        self.get_storage = get_storage
+        self.generator = generator
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.worker_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def acquire(self) -> int:
+        """Claim a worker id and start issuing ids as it (blocking)."""
+        worker_id = self.get_storage().worker_leases.claim(self.owner, self.ttl, MAX_WORKER)
+        if worker_id is None:
+            raise RuntimeError(f"All {MAX_WORKER + 1} id worker ids are leased; set ID_WORKER_ID or stop "
+                               "stale workers")
+        self.worker_id = worker_id
+        self.generator.use_worker_id(worker_id)
+        logger.info("Leased id worker %d", worker_id)
+        return worker_id
+
+    def renew(self) -> bool:
+        """Extend the lease (blocking); leases a new id if this one was lost."""
+        if self.worker_id is None:
+            self.acquire()
+            return False
+        if self.get_storage().worker_leases.renew(self.worker_id, self.owner, self.ttl):
+            return True
+        logger.error("Lost the lease on id worker %d; leasing another", self.worker_id)
+        self.acquire()
+        return False
+
+    def release(self):
+        if self.worker_id is not None:
+            self.get_storage().worker_leases.release(self.worker_id, self.owner)
+            self.worker_id = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="worker-lease")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                await run_in_threadpool(self.renew)
+            except Exception:
+                logger.exception("Could not renew the lease on id worker %s", self.worker_id)
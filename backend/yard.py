@@ -0,0 +1,135 @@
+"""Yard block occupancy from structured container locations.
+
+A container's free-text ``location`` ("Block A-15", "CIC-01") is parsed
+into ``yardBlock`` and ``yardRow`` whenever its record is created or
+replaced (``ContainerRecord.derived``), and both are indexed.  A container
+that has gated out is no longer in any block.
+
+``YardOccupancy`` keeps a count per block (by row, status and TEU), built
+at startup from one grouped storage query and then adjusted by ``apply``
+for each container change made through this server, so yard questions
+("how many boxes in Block A?", "what is in customs inspection?") never scan
+the containers.  Changes made by other worker processes arrive with the
+periodic rebuild (``refresh.py``), as does a change of this process's that
+raced a rebuild's query.
+"""
+import re
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from charges import is_large
+
+# Container fields the yard position depends on
+INPUT_FIELDS = ("location", "status")
+
+# "Block A-15" is row 15 of stacking block A; facility codes like "CIC-01" parse the same way
+_LOCATION = re.compile(r"^\s*(?:BLOCK\s+)?([A-Z]+)\s*-\s*0*(\d+)\s*$", re.IGNORECASE)
+
+# Blocks that are facilities rather than stacking blocks
+AREAS = {"CIC": "Customs Inspection Centre"}
+
+
+def parse_location(location: Optional[str]) -> Tuple[Optional[str], Optional[int]]:
+    """(block, row) of a location string; (None, None) when it names no yard block."""
+    match = _LOCATION.match(location or "")
+    if match is None:
+        return None, None
+    return match.group(1).upper(), int(match.group(2))
+
+
+def yard_fields(container) -> Dict[str, Any]:
+    block, row = (None, None) if container.get("status") == "GATED_OUT" else parse_location(container.get("location"))
+    return {"yardBlock": block, "yardRow": row}
+
+
+def area_name(block: str) -> str:
+    return AREAS.get(block, f"Block {block}")
+
+
+class BlockCounts:
+    """Containers in one block, by row and status, with their TEU."""
+
+    def __init__(self):
+        self.containers = 0
+        self.teu = 0
+        self.rows: Counter = Counter()
+        self.by_status: Counter = Counter()
+
+    def add(self, row: Optional[int], status: Optional[str], large: bool, count: int = 1):
+        self.containers += count
+        self.teu += count * (2 if large else 1)
+        self.rows[row] += count
+        self.by_status[status] += count
+        # Drop zeroed keys so an emptied row or status disappears from the map
+        if self.rows[row] <= 0:
+            del self.rows[row]
+        if self.by_status[status] <= 0:
+            del self.by_status[status]
+
+
+class YardOccupancy:
+    def __init__(self, get_storage: Callable):
+        self.get_storage = get_storage
+        self.blocks: Dict[str, BlockCounts] = {}
+
+    def load(self):
+        """Rebuild the counts from storage (one grouped query over the block index)."""
+        self.install(self.fetch())
+
+    def fetch(self) -> Dict[str, BlockCounts]:
+        blocks: Dict[str, BlockCounts] = {}
+        for group in self.get_storage().containers.yard_counts():
+            blocks.setdefault(group["yardBlock"], BlockCounts()).add(
+                group.get("yardRow"), group.get("status"), is_large(group.get("size")), group["count"])
+        return blocks
+
+    def install(self, blocks: Dict[str, BlockCounts]):
+        self.blocks = blocks
+
+    def apply(self, old, new) -> List[str]:
+        """Move one container's count from its ``old`` to its ``new`` state (either may
+        be None); return the blocks whose counts changed."""
+        before, after = _position(old), _position(new)
+        if before == after:
+            return []
+        changed = []
+        for position, count in ((before, -1), (after, 1)):
+            if position is None:
+                continue
+            block, row, status, large = position
+            counts = self.blocks.setdefault(block, BlockCounts())
+            counts.add(row, status, large, count)
+            if counts.containers <= 0:
+                del self.blocks[block]
+            if block not in changed:
+                changed.append(block)
+        return changed
+
+    def block(self, block: str) -> Dict:
+        """Occupancy of one block (zero when it is empty or unknown)."""
+        counts = self.blocks.get(block) or BlockCounts()
+        return {
+            "block": block,
+            "area": area_name(block),
+            "containers": counts.containers,
+            "teu": counts.teu,
+            "byStatus": dict(sorted(counts.by_status.items(), key=lambda item: str(item[0]))),
+            "rows": {str(row): count for row, count in sorted(counts.rows.items(), key=lambda item: item[0] or 0)},
+        }
+
+    def summary(self) -> Dict:
+        blocks = [self.block(block) for block in sorted(self.blocks)]
+        return {
+            "containers": sum(block["containers"] for block in blocks),
+            "teu": sum(block["teu"] for block in blocks),
+            "blocks": blocks,
+        }
+
+
+def _position(container) -> Optional[Tuple[str, Optional[int], Optional[str], bool]]:
+    if container is None:
+        return None
+    fields = yard_fields(container)
+    if fields["yardBlock"] is None:
+        return None
+    return fields["yardBlock"], fields["yardRow"], container.get("status"), is_large(container.get("size"))
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Berth schedule queries: interval index vs. scanning the vessels.
+
+Builds a schedule of ``--vessels`` voyages laid end to end on the berths of
+``benchmarks.datagen`` (stays of 12-96 hours with gaps between them, from
+the loaded horizon into the future), loads it into the in-memory engine and
+the ``BerthSchedule`` index, then measures, with responses encoded as the
+endpoints do:
+
+* ``occupancy``: one berth over a random 1-72 hour window;
+* ``arrivals``: port-wide arrivals in a random 12 hour window;
+* ``at``: every berth at a random instant;
+* the storage path (``find_overlapping``, a scan in the in-memory engine)
+  for the same occupancy windows, as a baseline;
+
+and checks the index and storage answers agree on every sampled window:
+
+    python -m benchmarks.berth_schedule --vessels 100k --queries 20000
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from benchmarks.datagen import BERTHS, parse_scale, voyage_number
+from benchmarks.stats import summarize
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+NOW = datetime(2025, 7, 1)
+HISTORY = timedelta(days=30)
+
+
+def generate_schedule(count: int, rng: random.Random) -> List[Dict]:
+    vessels = []
+    free_from = {berth: NOW - HISTORY for berth in BERTHS}
+    for i in range(count):
+        berth = rng.choice(BERTHS)
+        eta = free_from[berth] + timedelta(hours=rng.randint(1, 24))
+        etd = eta + timedelta(hours=rng.randint(12, 96))
+        free_from[berth] = etd
+        vessels.append({
+            "vesselName": f"BENCH VESSEL {i:05d}",
+            "voyageNumber": voyage_number(i),
+            "eta": eta.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "etd": etd.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "berth": berth,
+            "status": "SCHEDULED",
+        })
+    return vessels
+
+
+def _timed(queries: int, query: Callable) -> List[float]:
+    latencies = []
+    for i in range(queries):
+        started = time.perf_counter()
+        query(i)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def run(args) -> Dict:
+    from berth_schedule import BerthSchedule
+    from records import encode_json
+    from storage import MemoryStorage
+
+    count = parse_scale(args.vessels)
+    rng = random.Random(args.seed)
+    storage = MemoryStorage()
+    storage.vessels.insert_many(generate_schedule(count, rng))
+    last_etd = max(vessel.get("etd") for vessel in storage.vessels.all())
+    span_hours = int((datetime.fromisoformat(last_etd[:-1]) - NOW).total_seconds() // 3600)
+
+    schedule = BerthSchedule(lambda: storage, history=HISTORY)
+    started = time.perf_counter()
+    schedule.load(now=NOW)
+    load_seconds = time.perf_counter() - started
+
+    windows = []
+    for _ in range(args.queries):
+        start = NOW + timedelta(hours=rng.randint(0, span_hours))
+        windows.append((rng.choice(BERTHS), start, start + timedelta(hours=rng.randint(1, 72))))
+
+    def occupancy(i):
+        berth, start, end = windows[i]
+        encode_json({"success": True, "data": schedule.occupancy(berth, start, end, "voice")})
+
+    def arrivals(i):
+        start = windows[i][1]
+        encode_json({"success": True, "data": schedule.arrivals(start, start + timedelta(hours=12), "voice")})
+
+    def at(i):
+        encode_json({"success": True, "data": schedule.at(windows[i][1], "voice")})
+
+    def scan(i):
+        berth, start, end = windows[i]
+        encode_json({"success": True, "data": storage.vessels.find_overlapping(start, end, berth, "voice")})
+
+    scans = min(args.scans, args.queries)
+    results = {
+        "occupancy": summarize(_timed(args.queries, occupancy)),
+        "arrivals": summarize(_timed(args.queries, arrivals)),
+        "at": summarize(_timed(args.queries, at)),
+        "storageScan": summarize(_timed(scans, scan)),
+    }
+
+    mismatches = 0
+    for berth, start, end in windows[:scans]:
+        hot = [vessel.get("voyageNumber") for vessel in schedule.occupancy(berth, start, end)]
+        scanned = [vessel.get("voyageNumber") for vessel in storage.vessels.find_overlapping(start, end, berth)]
+        mismatches += hot != scanned
+
+    return {
+        "vessels": count,
+        "berths": len(BERTHS),
+        "indexedStays": len(schedule),
+        "loadSeconds": round(load_seconds, 3),
+        "queries": results,
+        "speedup": round(results["storageScan"]["p50Ms"] / max(results["occupancy"]["p50Ms"], 1e-6), 1),
+        "verified": scans,
+        "mismatches": mismatches,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark berth schedule queries")
+    parser.add_argument("--vessels", default="10k", help="scheduled voyages (10k, 100k or a number)")
+    parser.add_argument("--queries", type=int, default=20_000, help="queries of each kind against the index")
+    parser.add_argument("--scans", type=int, default=200, help="occupancy windows also answered by scanning")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    report.update(python=platform.python_version(), host=platform.node())
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    queries = report["queries"]
+    print(f"occupancy p50 {queries['occupancy']['p50Ms']}ms vs scan {queries['storageScan']['p50Ms']}ms "
+          f"({report['speedup']}x); arrivals p50 {queries['arrivals']['p50Ms']}ms, "
+          f"all berths p50 {queries['at']['p50Ms']}ms", file=sys.stderr)
+    if report["mismatches"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
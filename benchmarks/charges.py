@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Dwell/storage charge engine over a synthetic yard.
+
+Builds ``--containers`` containers as the string columns stored in the
+documents (ISO discharge and gate-out dates, sizes, fixed charges), then
+measures:
+
+* the vectorized ``for_yard`` pass (best of ``--repeat``) plus ``summarize``;
+* ``yard_frame`` over ``--records`` record-shaped dicts, the extra step the
+  ``/api/charges/summary`` endpoint pays to get from storage to columns;
+* the per-container path used by the tools, cold and warm (cached per day);
+
+and checks the two paths agree on a sample:
+
+    python -m benchmarks.charges --containers 1m
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import date
+from typing import Dict, List
+
+from benchmarks.datagen import parse_scale
+from benchmarks.stats import summarize
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+AS_OF = date(2025, 7, 20)
+
+
+def synthetic_yard(count: int, seed: int):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    as_of = np.datetime64(AS_OF, "D")
+    discharged = as_of - rng.integers(-2, 90, count).astype("timedelta64[D]")
+    gated_out = discharged + rng.integers(0, 30, count).astype("timedelta64[D]")
+    discharge_strings = np.datetime_as_string(discharged, unit="D").astype(object)
+    discharge_strings[rng.random(count) < 0.1] = None  # still on the vessel
+    gate_out_strings = np.char.add(np.datetime_as_string(gated_out, unit="D"), "T08:00:00").astype(object)
+    gate_out_strings[rng.random(count) >= 0.2] = None
+    frame = pd.DataFrame({
+        "containerNumber": [f"BNCH{i:07d}" for i in range(count)],
+        "dischargeDate": pd.array(discharge_strings, dtype="string"),
+        "gateOutTime": pd.array(gate_out_strings, dtype="string"),
+        "size": pd.array(rng.choice(["20ST", "40ST", "40HC", "45HC"], count), dtype="string"),
+        "charges": rng.integers(100, 2000, count).astype(float),
+    })
+    return frame
+
+
+def _records(frame, count: int) -> List[Dict]:
+    subset = frame.head(count).astype(object).where(frame.head(count).notna(), None)
+    return subset.to_dict("records")
+
+
+def run(args) -> Dict:
+    from charges import ChargeEngine, yard_frame
+
+    count = parse_scale(args.containers)
+    started = time.perf_counter()
+    frame = synthetic_yard(count, args.seed)
+    build_seconds = time.perf_counter() - started
+
+    engine = ChargeEngine()
+    batch_seconds = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        priced = engine.for_yard(frame, AS_OF)
+        batch_seconds.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    engine.summarize(priced)
+    summary_seconds = time.perf_counter() - started
+
+    records = _records(frame, min(parse_scale(args.records), count))
+    started = time.perf_counter()
+    yard_frame(records)
+    frame_seconds = time.perf_counter() - started
+
+    # Single-container path: a fresh engine (each distinct key priced on first sight), then the same containers again
+    single_engine = ChargeEngine()
+    sample = records[:args.single]
+    cold, warm = [], []
+    for latencies in (cold, warm):
+        for container in sample:
+            started = time.perf_counter()
+            single_engine.for_container(container, AS_OF)
+            latencies.append(time.perf_counter() - started)
+
+    mismatches = 0
+    for container, row in zip(records[:args.verify], priced.head(args.verify).itertuples()):
+        single = single_engine.for_container(container, AS_OF)
+        if (single["dwellDays"], single["storageCharges"], single["totalCharges"]) != (
+                row.dwellDays, row.storageCharges, row.totalCharges):
+            mismatches += 1
+
+    best = min(batch_seconds)
+    return {
+        "containers": count,
+        "buildSeconds": round(build_seconds, 3),
+        "batch": {
+            "bestSeconds": round(best, 3),
+            "meanSeconds": round(sum(batch_seconds) / len(batch_seconds), 3),
+            "containersPerSecond": round(count / best, 1),
+            "summarizeSeconds": round(summary_seconds, 3),
+        },
+        "yardFrame": {"records": len(records), "seconds": round(frame_seconds, 3)},
+        "single": {
+            "cold": _micros(cold),
+            "warm": _micros(warm),
+            "cachedKeys": len(single_engine._cache),
+        },
+        "verified": min(args.verify, len(records)),
+        "mismatches": mismatches,
+    }
+
+
+def _micros(seconds: List[float]) -> Dict:
+    """``summarize`` in microseconds; the single-container path is well under a millisecond."""
+    stats = summarize([value * 1000 for value in seconds])
+    return {key.replace("Ms", "Us"): value for key, value in stats.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dwell/storage charge engine")
+    parser.add_argument("--containers", default="1m", help="yard size (10k, 100k, 1m or a number)")
+    parser.add_argument("--records", default="100k", help="record dicts converted by yard_frame")
+    parser.add_argument("--single", type=int, default=100_000, help="containers priced one at a time")
+    parser.add_argument("--verify", type=int, default=10_000, help="containers checked batch vs single")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    report.update(python=platform.python_version(), host=platform.node())
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    print(f"{report['containers']} containers priced in {report['batch']['bestSeconds']}s "
+          f"({report['batch']['containersPerSecond']}/s); single p50 {report['single']['warm']['p50Us']}us warm, "
+          f"{report['single']['cold']['p50Us']}us cold", file=sys.stderr)
+    if report["mismatches"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Compare two load-test reports: python -m benchmarks.compare base.json new.json"""
+import argparse
+import json
+
+METRICS = ("throughput", "p50Ms", "p95Ms", "p99Ms", "meanBytes")
+
+
+def _delta(old: float, new: float) -> str:
+    if not old:
+        return "   n/a"
+    return f"{(new - old) / old * 100:+6.1f}%"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    rows = [("overall", baseline["overall"], candidate["overall"])]
+    for name, stats in candidate["endpoints"].items():
+        rows.append((name, baseline["endpoints"].get(name, {}), stats))
+    rows.append(("broadcast lag", baseline.get("broadcast", {}), candidate.get("broadcast", {})))
+
+    print(f"{'':24}" + "".join(f"{metric:>26}" for metric in METRICS))
+    for name, old, new in rows:
+        cells = []
+        for metric in METRICS:
+            if metric not in new:
+                cells.append(f"{'':>26}")
+                continue
+            before, after = old.get(metric, 0), new[metric]
+            cells.append(f"{before:>9} -> {after:>9} {_delta(before, after)}")
+        print(f"{name:24}" + "".join(cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""Synthetic terminal data for benchmarks.
+
+Generates containers, vessels, gatepasses and SSRs shaped like the seed data
+in ``backend/server.py`` and bulk-loads them into a local MongoDB:
+
+    python -m benchmarks.datagen --scale 100k --mongo-url mongodb://localhost:27017 --drop
+
+Generation is deterministic for a given ``--seed`` and container numbers are
+a pure function of their index (``container_number(i)``), so workload
+generators can address the data set without querying it.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+OWNER_PREFIXES = ["MSKU", "MSCU", "EGHU", "TGHU", "CMAU", "OOLU", "HLXU", "ABCD"]
+STATUSES = ["ARRIVED", "DISCHARGED", "AVAILABLE_FOR_DELIVERY", "CUSTOMS_HOLD", "GATED_OUT", "DAMAGED"]
+STATUS_WEIGHTS = [15, 35, 25, 10, 10, 5]
+SIZES = ["20ST", "40ST", "40HC", "45HC"]
+TYPES = ["DV", "RF", "OT", "FR"]
+CONSIGNEES = [f"CONSIGNEE {i:03d} SDN BHD" for i in range(200)]
+AGENTS = ["MAERSK MALAYSIA", "MSC MALAYSIA", "EVERGREEN SHIPPING", "CMA CGM MALAYSIA", "ONE MALAYSIA", "HAPAG-LLOYD"]
+HAULIERS = [f"HAULIER {i:02d} LOGISTICS" for i in range(50)]
+PORTS = ["SINGAPORE", "HONG KONG", "ROTTERDAM", "SHANGHAI", "BUSAN", "JEBEL ALI", "COLOMBO"]
+BERTHS = [f"CT{t}-B{b}" for t in (1, 2, 3) for b in range(1, 9)]
+SSR_TYPES = ["ITT", "STORAGE_EXTENSION", "REEFER_MONITORING", "INSPECTION", "RESTOW"]
+BLOCKS = "ABCDEFGHJK"
+
+
+def container_number(i: int) -> str:
+    """Unique, valid-looking container number (ABCD1234567) for index ``i``."""
+    return f"{OWNER_PREFIXES[i % len(OWNER_PREFIXES)]}{i:07d}"
+
+
+def truck_number(i: int) -> str:
+    return f"W{chr(65 + i % 26)}{chr(65 + (i // 26) % 26)}{i % 10000:04d}"
+
+
+def voyage_number(i: int) -> str:
+    return f"V{i:05d}{'EW'[i % 2]}"
+
+
+def generate_vessels(count: int, rng: random.Random, now: datetime) -> List[Dict]:
+    vessels = []
+    for i in range(count):
+        eta = now + timedelta(hours=rng.randint(-240, 240))
+        vessels.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "vesselName": f"BENCH VESSEL {i:05d}",
+            "imoNumber": str(9000000 + i),
+            "voyageNumber": voyage_number(i),
+            "eta": eta.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "etd": (eta + timedelta(hours=rng.randint(12, 96))).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "berth": rng.choice(BERTHS),
+            "status": rng.choice(["SCHEDULED", "ALONGSIDE", "DISCHARGING", "DEPARTED"]),
+            "agent": rng.choice(AGENTS),
+            "version": 1,
+        })
+    return vessels
+
+
+def generate_containers(count: int, vessel_count: int, rng: random.Random, now: datetime) -> Iterator[Dict]:
+    from pickup import pickup_fields
+    from yard import yard_fields
+
+    for i in range(count):
+        status = rng.choices(STATUSES, STATUS_WEIGHTS)[0]
+        vessel = rng.randrange(vessel_count)
+        arrival = now - timedelta(days=rng.randint(0, 30))
+        discharged = status != "ARRIVED"
+        location = (f"CIC-{rng.randint(1, 9):02d}" if status == "CUSTOMS_HOLD"
+                    else f"Block {rng.choice(BLOCKS)}-{rng.randint(1, 40):02d}")
+        edo = "RELEASED" if rng.random() < 0.8 else "PENDING"
+        customs = "HOLD" if status == "CUSTOMS_HOLD" else ("CLEARED" if rng.random() < 0.85 else "PENDING")
+        container = {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "containerNumber": container_number(i),
+            "status": status,
+            "location": location,
+            "vesselName": f"BENCH VESSEL {vessel:05d}",
+            "voyageNumber": voyage_number(vessel),
+            "arrivalDate": arrival.strftime("%Y-%m-%d"),
+            "dischargeDate": (arrival + timedelta(days=1)).strftime("%Y-%m-%d") if discharged else None,
+            "containerType": rng.choice(TYPES),
+            "size": rng.choice(SIZES),
+            "weight": str(rng.randint(2200, 30480)),
+            "availableForPickup": status in ("DISCHARGED", "AVAILABLE_FOR_DELIVERY"),
+            "charges": float(rng.randint(100, 2000)),
+            "currency": "MYR",
+            "edoStatus": edo,
+            "customsStatus": customs,
+            "activeGatepass": None,
+            "lastUpdated": now.isoformat(),
+            "consignee": rng.choice(CONSIGNEES),
+            "shippingAgent": rng.choice(AGENTS),
+            "portOfLoading": rng.choice(PORTS),
+            "recentSSRs": [],
+            "version": 1,
+        }
+        container.update(pickup_fields(container))
+        container.update(yard_fields(container))
+        yield container
+
+
+def generate_gatepasses(count: int, container_count: int, rng: random.Random, now: datetime) -> Iterator[Dict]:
+    for i in range(count):
+        generated = now - timedelta(hours=rng.randint(0, 72))
+        yield {
+            "id": f"GPBENCH{i:08d}",
+            "containerNumber": container_number(rng.randrange(container_count)),
+            "haulierCompany": rng.choice(HAULIERS),
+            "truckNumber": truck_number(i),
+            "generatedAt": generated.isoformat(),
+            "validUntil": (generated + timedelta(hours=48)).isoformat(),
+            "status": "ACTIVE",
+            "generatedBy": "BENCHMARK",
+            "charges": float(rng.randint(100, 2000)),
+            "containerDetails": {
+                "type": rng.choice(TYPES),
+                "size": rng.choice(SIZES),
+                "weight": str(rng.randint(2200, 30480)),
+                "location": f"Block {rng.choice(BLOCKS)}-{rng.randint(1, 40):02d}",
+            },
+            "version": 1,
+        }
+
+
+def generate_ssrs(count: int, container_count: int, rng: random.Random, now: datetime) -> Iterator[Dict]:
+    for i in range(count):
+        yield {
+            "id": f"SSRBENCH{i:08d}",
+            "containerNumber": container_number(rng.randrange(container_count)),
+            "ssrType": rng.choice(SSR_TYPES),
+            "requestDetails": "Synthetic benchmark request",
+            "status": "SUBMITTED",
+            "submittedAt": (now - timedelta(minutes=rng.randint(0, 60 * 24 * 30))).isoformat(),
+            "submittedBy": "BENCHMARK",
+            "expectedProcessingTime": "24-48 hours",
+            "version": 1,
+        }
+
+
+def _batched(docs: Iterator[Dict], size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def dataset(containers: int, seed: int = 42, now: datetime = None) -> Dict[str, Iterator[Dict]]:
+    """Lazily generated collections for a data set of ``containers`` containers."""
+    now = now or datetime.utcnow()
+    vessel_count = max(containers // 1000, 50)
+    return {
+        "vessels": iter(generate_vessels(vessel_count, random.Random(seed), now)),
+        "containers": generate_containers(containers, vessel_count, random.Random(seed + 1), now),
+        "gatepasses": generate_gatepasses(containers // 10, containers, random.Random(seed + 2), now),
+        "ssr_requests": generate_ssrs(containers // 5, containers, random.Random(seed + 3), now),
+    }
+
+
+def load(db, containers: int, seed: int = 42, batch_size: int = 5000, drop: bool = False) -> Dict[str, int]:
+    from storage.mongo import vessel_to_bson
+
+    counts = {}
+    for name, docs in dataset(containers, seed).items():
+        if drop:
+            db[name].drop()
+        started = time.perf_counter()
+        inserted = 0
+        for batch in _batched(docs, batch_size):
+            if name == "vessels":
+                # Vessel times are stored as BSON dates, as MongoVessels writes them
+                batch = [vessel_to_bson(doc) for doc in batch]
+            db[name].insert_many(batch, ordered=False)
+            inserted += len(batch)
+        counts[name] = inserted
+        print(f"  {name}: {inserted} documents in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return counts
+
+
+def parse_scale(value: str) -> int:
+    value = value.lower()
+    return SCALES[value] if value in SCALES else int(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load synthetic terminal data into MongoDB")
+    parser.add_argument("--scale", default="10k", help="10k, 100k, 1m or an explicit container count")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="westports_db")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--drop", action="store_true", help="drop the collections first")
+    args = parser.parse_args(argv)
+
+    from pymongo import MongoClient
+
+    containers = parse_scale(args.scale)
+    client = MongoClient(args.mongo_url)
+    print(f"Loading {containers} containers into {args.db}", file=sys.stderr)
+    counts = load(client[args.db], containers, args.seed, args.batch_size, args.drop)
+    client.close()
+    print(counts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Gate-lane lookup throughput against the 5k lookups/sec single-core target.
+
+In-process (default), the lookup path itself is measured on one thread: the
+hot ACTIVE-gatepass map, the container read from the in-memory engine and
+the eligibility check, with the response encoded as the endpoint would:
+
+    python -m benchmarks.gate_lookup --containers 100k --duration 10
+
+With ``--url`` the running server's ``/api/gate/lookup`` is driven over HTTP
+instead (start it with ``--workers 1`` to hold it to one core):
+
+    python -m benchmarks.gate_lookup --url http://localhost:8001 --containers 100k --concurrency 32
+
+Lookups alternate between plates and gatepass ids from ``benchmarks.datagen``;
+``--miss-ratio`` sends a share of unknown plates to exercise the storage
+fallback.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks.datagen import dataset, parse_scale, truck_number
+from benchmarks.stats import summarize
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+
+def _queries(rng: random.Random, gatepasses: int, miss_ratio: float) -> Tuple[Dict, bool]:
+    i = rng.randrange(gatepasses)
+    if rng.random() < miss_ratio:
+        return {"truckNumber": f"XX{i:06d}"}, True
+    if i % 2:
+        return {"truckNumber": truck_number(i)}, False
+    return {"gatepassId": f"GPBENCH{i:08d}"}, False
+
+
+def run_in_process(args) -> Dict:
+    from gate_lane import GateLane
+    from records import encode_json
+    from storage import MemoryStorage
+
+    containers = parse_scale(args.containers)
+    storage = MemoryStorage()
+    for name, docs in dataset(containers, args.seed).items():
+        storage.insert_many(name, docs)
+    lane = GateLane(lambda: storage)
+    started = time.perf_counter()
+    lane.load()
+    load_seconds = time.perf_counter() - started
+    gatepasses = len(storage.tables["gatepasses"].rows)
+
+    rng = random.Random(args.seed)
+    latencies: List[float] = []
+    misses = 0
+    deadline = time.perf_counter() + args.duration
+    run_started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        query, miss = _queries(rng, gatepasses, args.miss_ratio)
+        started = time.perf_counter()
+        matches = lane.lookup(truck_number=query.get("truckNumber"), gatepass_id=query.get("gatepassId"))
+        encode_json({"success": True, "data": matches})
+        latencies.append(time.perf_counter() - started)
+        misses += miss
+    elapsed = time.perf_counter() - run_started
+    return {
+        "mode": "in-process",
+        "activeGatepasses": len(lane.active),
+        "loadSeconds": round(load_seconds, 3),
+        "lookups": dict(summarize(latencies), throughput=round(len(latencies) / elapsed, 1), misses=misses),
+        "elapsed": elapsed,
+    }
+
+
+async def run_http(args) -> Dict:
+    import httpx
+
+    from benchmarks.loadtest import wait_until_ready
+
+    containers = parse_scale(args.containers)
+    gatepasses = containers // 10
+    await wait_until_ready(args.url, args.ready_timeout)
+    latencies: List[float] = []
+    errors = 0
+    misses = 0
+    deadline = time.perf_counter() + args.duration
+
+    async def worker(rng: random.Random):
+        nonlocal errors, misses
+        while time.perf_counter() < deadline:
+            query, miss = _queries(rng, gatepasses, args.miss_ratio)
+            started = time.perf_counter()
+            try:
+                response = await client.get("/api/gate/lookup", params=query)
+                ok = response.status_code in (200, 404)
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+                misses += miss
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=10.0) as client:
+        run_started = time.perf_counter()
+        await asyncio.gather(*(worker(random.Random(args.seed + i)) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - run_started
+    return {
+        "mode": "http",
+        "url": args.url,
+        "concurrency": args.concurrency,
+        "lookups": dict(summarize(latencies), throughput=round(len(latencies) / elapsed, 1),
+                        misses=misses, errors=errors),
+        "elapsed": elapsed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark gate-lane lookups")
+    parser.add_argument("--url", help="benchmark a running server over HTTP instead of in-process")
+    parser.add_argument("--containers", default="100k", help="data set size (as benchmarks.datagen --scale)")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=32, help="HTTP mode only")
+    parser.add_argument("--miss-ratio", type=float, default=0.05, help="share of lookups for unknown plates")
+    parser.add_argument("--target", type=float, default=5000.0, help="lookups/sec required to pass")
+    parser.add_argument("--ready-timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_http(args)) if args.url else run_in_process(args)
+    report.pop("elapsed")
+    throughput = report["lookups"]["throughput"]
+    report.update(target=args.target, passed=throughput >= args.target,
+                  python=platform.python_version(), host=platform.node())
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    lookups = report["lookups"]
+    print(f"{throughput} lookups/s (target {args.target:.0f}: {'PASS' if report['passed'] else 'FAIL'}), "
+          f"p50 {lookups['p50Ms']}ms, p99 {lookups['p99Ms']}ms", file=sys.stderr)
+    if not report["passed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
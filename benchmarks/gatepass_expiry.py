@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Gatepass expiry scheduler with a large number of outstanding passes.
+
+Loads ``--gatepasses`` ACTIVE passes (``benchmarks.datagen`` documents, one
+container each) into the in-memory engine, rebuilds the scheduler from the
+ACTIVE query, then replays a simulated clock in ``--tick`` steps until every
+pass has expired:
+
+    python -m benchmarks.gatepass_expiry --gatepasses 100k --tick 60
+
+For comparison it also times one ``find_active`` scan, which is what a
+periodic full-scan sweeper would pay on every tick regardless of how many
+passes are due.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from benchmarks.datagen import generate_gatepasses, parse_scale
+from benchmarks.stats import summarize
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+
+def build_storage(count: int, seed: int, now: datetime):
+    from storage import MemoryStorage
+
+    storage = MemoryStorage()
+    gatepasses = list(generate_gatepasses(count, count, random.Random(seed), now))
+    # One container per pass, pointing at it, so every expiry also clears activeGatepass
+    for i, gatepass in enumerate(gatepasses):
+        gatepass["containerNumber"] = f"EXPU{i:07d}"
+    storage.insert_many("gatepasses", gatepasses)
+    storage.insert_many("containers", [
+        {"containerNumber": gatepass["containerNumber"], "activeGatepass": gatepass["id"], "version": 1}
+        for gatepass in gatepasses
+    ])
+    return storage
+
+
+async def run(args) -> Dict:
+    from gatepass_expiry import GatepassExpiryScheduler
+
+    count = parse_scale(args.gatepasses)
+    now = datetime(2025, 6, 1)
+    storage = build_storage(count, args.seed, now)
+    callbacks = 0
+
+    async def on_expired(gatepass, container):
+        nonlocal callbacks
+        callbacks += 1
+
+    scheduler = GatepassExpiryScheduler(lambda: storage, on_expired=on_expired, batch_size=args.batch_size)
+    started = time.perf_counter()
+    scheduler.load()
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    storage.gatepasses.find_active()
+    scan_seconds = time.perf_counter() - started
+
+    # Replay the clock from the earliest generatedAt past the last validUntil
+    clock = now - timedelta(hours=72)
+    end = now + timedelta(hours=49)
+    tick = timedelta(seconds=args.tick)
+    batch_latencies: List[float] = []
+    idle_ticks = 0
+    expired = 0
+    run_started = time.perf_counter()
+    while clock <= end:
+        if scheduler.next_due() is None or scheduler.next_due() > clock:
+            idle_ticks += 1
+        while True:
+            started = time.perf_counter()
+            done = await scheduler.expire_due(clock)
+            if not done and (scheduler.next_due() is None or scheduler.next_due() > clock):
+                break
+            batch_latencies.append(time.perf_counter() - started)
+            expired += done
+        clock += tick
+    elapsed = time.perf_counter() - run_started
+
+    return {
+        "gatepasses": count,
+        "loadSeconds": round(load_seconds, 3),
+        "fullScanSeconds": round(scan_seconds, 3),
+        "ticks": int((end - (now - timedelta(hours=72))) / tick) + 1,
+        "idleTicks": idle_ticks,
+        "expired": expired,
+        "callbacks": callbacks,
+        "remaining": len(scheduler),
+        "batches": dict(summarize(batch_latencies), count=len(batch_latencies)),
+        "expiriesPerSecond": round(expired / elapsed, 1) if elapsed else None,
+        "elapsedSeconds": round(elapsed, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the gatepass expiry scheduler")
+    parser.add_argument("--gatepasses", default="100k", help="outstanding ACTIVE passes (10k, 100k, 1m or a number)")
+    parser.add_argument("--tick", type=float, default=60.0, help="simulated clock step in seconds")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    report.update(python=platform.python_version(), host=platform.node())
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    print(f"{report['expired']} expired at {report['expiriesPerSecond']}/s, load {report['loadSeconds']}s, "
+          f"batch p99 {report['batches']['p99Ms']}ms (full scan {report['fullScanSeconds']}s per tick)",
+          file=sys.stderr)
+    if report["expired"] != report["gatepasses"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""Concurrent tool-call load test with WebSocket listeners.
+
+Drives a running server with a weighted mix of Ultravox tool calls while
+N dashboard listeners stay connected to ``/ws``, then prints a JSON report
+with throughput, per-endpoint p50/p95/p99, response size and broadcast
+delivery lag:
+
+    python -m benchmarks.loadtest --url http://localhost:8001 --profile voice \\
+        --concurrency 32 --duration 30 --listeners 10 --containers 100000 --output run.json
+
+``--response-profile`` selects the server's response profile (voice, full,
+dashboard) so payload size and latency can be compared per profile.
+
+``--containers`` must match the ``--scale`` used with ``benchmarks.datagen``
+so generated container numbers hit existing documents.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+import websockets
+
+from benchmarks.datagen import SSR_TYPES, container_number, parse_scale, truck_number, voyage_number
+from benchmarks.stats import summarize
+
+# Tool name -> (endpoint, request body factory)
+TOOLS: Dict[str, Tuple[str, Callable[[random.Random, int], Dict]]] = {
+    "getContainerStatus": (
+        "/api/containers/status",
+        lambda rng, n: {"containerNumber": container_number(rng.randrange(n))},
+    ),
+    "updateContainerStatus": (
+        "/api/containers/update",
+        lambda rng, n: {
+            "containerNumber": container_number(rng.randrange(n)),
+            "newStatus": rng.choice(["DISCHARGED", "AVAILABLE_FOR_DELIVERY"]),
+        },
+    ),
+    "generateEGatepass": (
+        "/api/gatepass/generate",
+        lambda rng, n: {
+            "containerNumber": container_number(rng.randrange(n)),
+            "haulierCompany": "BENCHMARK HAULAGE SDN BHD",
+            "truckNumber": truck_number(rng.randrange(100000)),
+        },
+    ),
+    "checkVesselSchedule": (
+        "/api/vessels/schedule",
+        lambda rng, n: {"voyageNumber": voyage_number(rng.randrange(max(n // 1000, 50)))},
+    ),
+    "submitSSR": (
+        "/api/ssr/submit",
+        lambda rng, n: {
+            "containerNumber": container_number(rng.randrange(n)),
+            "ssrType": rng.choice(SSR_TYPES),
+            "requestDetails": "Benchmark request",
+        },
+    ),
+}
+
+# Workload profiles: relative weight of each tool in the call mix
+PROFILES = {
+    # What a voice agent actually does: mostly lookups, some follow-up actions
+    "voice": {
+        "getContainerStatus": 55,
+        "checkVesselSchedule": 15,
+        "updateContainerStatus": 10,
+        "generateEGatepass": 10,
+        "submitSSR": 10,
+    },
+    "read-heavy": {"getContainerStatus": 85, "checkVesselSchedule": 15},
+    "write-heavy": {"updateContainerStatus": 40, "generateEGatepass": 30, "submitSSR": 30},
+}
+
+# Server-side response profiles (?profile=)
+RESPONSE_PROFILES = ("voice", "full", "dashboard")
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.response_bytes: Dict[str, List[int]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.broadcast_lags: List[float] = []
+        self.broadcast_events = 0
+        self.recording = False
+
+    def record(self, tool: str, status, elapsed: float, size: int = 0):
+        if not self.recording:
+            return
+        self.statuses[tool][str(status)] += 1
+        if isinstance(status, int) and status < 500:
+            self.latencies[tool].append(elapsed)
+            if status == 200:
+                self.response_bytes[tool].append(size)
+        else:
+            self.errors[tool] += 1
+
+
+async def tool_worker(client: httpx.AsyncClient, recorder: Recorder, tools: List[str], weights: List[int],
+                      containers: int, rng: random.Random, deadline: float, params: Dict):
+    while time.perf_counter() < deadline:
+        tool = rng.choices(tools, weights)[0]
+        path, body = TOOLS[tool]
+        payload = body(rng, containers)
+        started = time.perf_counter()
+        size = 0
+        try:
+            response = await client.post(path, json=payload, params=params)
+            status = response.status_code
+            size = len(response.content)
+        except httpx.HTTPError as exc:
+            status = type(exc).__name__
+        recorder.record(tool, status, time.perf_counter() - started, size)
+
+
+async def ws_listener(url: str, recorder: Recorder, stop: asyncio.Event):
+    async with websockets.connect(url, max_queue=None) as ws:
+        while not stop.is_set():
+            try:
+                message = await asyncio.wait_for(ws.recv(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            received = datetime.utcnow()
+            event = json.loads(message)
+            if not recorder.recording or "timestamp" not in event:
+                continue
+            recorder.broadcast_events += 1
+            lag = (received - datetime.fromisoformat(event["timestamp"].rstrip("Z"))).total_seconds()
+            recorder.broadcast_lags.append(max(lag, 0.0))
+
+
+async def wait_until_ready(url: str, timeout: float):
+    """Poll the readiness endpoint so a cold server doesn't skew the run."""
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=url, timeout=2.0) as client:
+        while True:
+            try:
+                if (await client.get("/api/health/ready")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.perf_counter() > deadline:
+                raise SystemExit(f"Server at {url} not ready after {timeout}s")
+            await asyncio.sleep(0.5)
+
+
+async def run(args) -> Dict:
+    weights_by_tool = PROFILES[args.profile]
+    tools, weights = list(weights_by_tool), list(weights_by_tool.values())
+    containers = parse_scale(args.containers)
+    params = {"profile": args.response_profile} if args.response_profile else {}
+    recorder = Recorder()
+    stop = asyncio.Event()
+    ws_url = args.url.replace("http", "ws", 1).rstrip("/") + "/ws"
+    await wait_until_ready(args.url, args.ready_timeout)
+
+    listeners = [asyncio.create_task(ws_listener(ws_url, recorder, stop)) for _ in range(args.listeners)]
+    await asyncio.sleep(0.5 if listeners else 0)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        if args.warmup > 0:
+            deadline = time.perf_counter() + args.warmup
+            await asyncio.gather(*(
+                tool_worker(client, recorder, tools, weights, containers, random.Random(args.seed + i), deadline, params)
+                for i in range(args.concurrency)
+            ))
+        recorder.recording = True
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            tool_worker(client, recorder, tools, weights, containers, random.Random(args.seed + 1000 + i), deadline, params)
+            for i in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    # Give in-flight broadcasts a moment to land before closing listeners
+    await asyncio.sleep(1.0 if listeners else 0)
+    recorder.recording = False
+    stop.set()
+    for result in await asyncio.gather(*listeners, return_exceptions=True):
+        if isinstance(result, Exception):
+            print(f"WebSocket listener failed: {result!r}", file=sys.stderr)
+
+    endpoints = {}
+    all_latencies: List[float] = []
+    all_sizes: List[int] = []
+    for tool in tools:
+        latencies = recorder.latencies.get(tool, [])
+        sizes = recorder.response_bytes.get(tool, [])
+        all_latencies.extend(latencies)
+        all_sizes.extend(sizes)
+        endpoints[tool] = dict(
+            summarize(latencies),
+            throughput=round(len(latencies) / elapsed, 2),
+            meanBytes=round(sum(sizes) / len(sizes), 1) if sizes else 0.0,
+            errors=recorder.errors.get(tool, 0),
+            statusCodes=dict(recorder.statuses.get(tool, {})),
+        )
+
+    return {
+        "run": {
+            "startedAt": datetime.utcnow().isoformat(),
+            "url": args.url,
+            "profile": args.profile,
+            "responseProfile": args.response_profile or "server default",
+            "concurrency": args.concurrency,
+            "durationSeconds": round(elapsed, 3),
+            "listeners": args.listeners,
+            "containers": containers,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "host": platform.node(),
+        },
+        "overall": dict(
+            summarize(all_latencies),
+            throughput=round(len(all_latencies) / elapsed, 2),
+            meanBytes=round(sum(all_sizes) / len(all_sizes), 1) if all_sizes else 0.0,
+            errors=sum(recorder.errors.values()),
+        ),
+        "endpoints": endpoints,
+        "broadcast": dict(summarize(recorder.broadcast_lags), events=recorder.broadcast_events),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the tool API")
+    parser.add_argument("--url", default="http://localhost:8001")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="voice")
+    parser.add_argument("--response-profile", choices=RESPONSE_PROFILES,
+                        help="response profile requested with ?profile= (default: the server's)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds before the run")
+    parser.add_argument("--listeners", type=int, default=5, help="WebSocket listeners on /ws")
+    parser.add_argument("--containers", default="10k", help="data set size used with benchmarks.datagen")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--ready-timeout", type=float, default=60.0, help="seconds to wait for /api/health/ready")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the JSON report here as well as stdout")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    overall = report["overall"]
+    print(f"{overall['throughput']} req/s, p50 {overall['p50Ms']}ms, p95 {overall['p95Ms']}ms, "
+          f"p99 {overall['p99Ms']}ms, {overall['meanBytes']} bytes/response, "
+          f"broadcast p95 lag {report['broadcast']['p95Ms']}ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Time-scaled replay of captured tool-call traffic.
+
+Plays a capture written by the server's ``TRAFFIC_CAPTURE_PATH`` middleware
+back against a server, compressing the original inter-arrival times by
+``--speed`` (1x-50x):
+
+    python -m benchmarks.replay capture.jsonl.gz --url http://localhost:8001 --speed 10 --output replay.json
+
+Calls for the same container are sent strictly in captured order, each one
+waiting for the previous response, so status -> update -> gatepass bursts
+keep their shape; unrelated calls run concurrently on their own schedule.
+Each call is sent with its captured query string (``?profile=voice``), and
+latencies are reported per path and query.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.stats import summarize
+
+MAX_SPEED = 50.0
+
+
+def load_capture(path: str) -> Tuple[Dict, List[Dict]]:
+    opener = gzip.open if path.endswith(".gz") else open
+    header: Dict = {}
+    records: List[Dict] = []
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "capture" in entry:
+                # A file appended to across restarts has one header per session;
+                # keep offsets increasing by rebasing on the previous session end
+                base = records[-1]["t"] if records else 0.0
+                header = entry
+                header["_base"] = base
+                continue
+            entry["t"] += header.get("_base", 0.0)
+            records.append(entry)
+    records.sort(key=lambda r: r["t"])
+    return header, records
+
+
+def ordering_key(record: Dict) -> Optional[str]:
+    body = record.get("b")
+    if isinstance(body, dict) and body.get("containerNumber"):
+        return str(body["containerNumber"]).upper()
+    return None
+
+
+def group_records(records: List[Dict]) -> List[List[Dict]]:
+    """One sequential group per container; unrelated calls are independent."""
+    groups: Dict[str, List[Dict]] = defaultdict(list)
+    independent: List[List[Dict]] = []
+    for record in records:
+        key = ordering_key(record)
+        if key is None:
+            independent.append([record])
+        else:
+            groups[key].append(record)
+    return list(groups.values()) + independent
+
+
+class ReplayStats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.slips: List[float] = []
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.mismatches = 0
+        self.errors = 0
+
+
+async def play(client: httpx.AsyncClient, group: List[Dict], start: float, origin: float, speed: float,
+               stats: ReplayStats):
+    for record in group:
+        due = start + (record["t"] - origin) / speed
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        sent = time.perf_counter()
+        stats.slips.append(max(sent - due, 0.0))
+        path = record["p"] + (f"?{record['q']}" if record.get("q") else "")
+        body = record.get("b")
+        try:
+            if isinstance(body, (dict, list)):
+                response = await client.post(path, json=body)
+            else:
+                response = await client.post(path, content=(body or "").encode("utf-8"),
+                                             headers={"Content-Type": "application/json"})
+            status = response.status_code
+        except httpx.HTTPError as exc:
+            stats.errors += 1
+            stats.statuses[path][type(exc).__name__] += 1
+            continue
+        stats.latencies[path].append(time.perf_counter() - sent)
+        stats.statuses[path][str(status)] += 1
+        if "s" in record and status != record["s"]:
+            stats.mismatches += 1
+
+
+async def run(args) -> Dict:
+    header, records = load_capture(args.capture)
+    if args.limit:
+        records = records[:args.limit]
+    if not records:
+        raise SystemExit(f"No tool calls in {args.capture}")
+
+    groups = group_records(records)
+    origin = records[0]["t"]
+    captured_span = records[-1]["t"] - origin
+    stats = ReplayStats()
+
+    limits = httpx.Limits(max_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter() + 0.1
+        await asyncio.gather(*(play(client, group, start, origin, args.speed, stats) for group in groups))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "run": {
+            "startedAt": datetime.utcnow().isoformat(),
+            "url": args.url,
+            "capture": args.capture,
+            "captureStartedAt": header.get("startedAt"),
+            "speed": args.speed,
+            "requests": len(records),
+            "orderingGroups": len(groups),
+            "capturedSpanSeconds": round(captured_span, 3),
+            "replaySpanSeconds": round(elapsed, 3),
+        },
+        "overall": dict(
+            summarize([v for values in stats.latencies.values() for v in values]),
+            throughput=round(len(records) / elapsed, 2) if elapsed > 0 else 0.0,
+            errors=stats.errors,
+            statusMismatches=stats.mismatches,
+        ),
+        "endpoints": {
+            path: dict(summarize(values), statusCodes=dict(stats.statuses[path]))
+            for path, values in stats.latencies.items()
+        },
+        # How far behind schedule calls were sent; growing slip means the
+        # server (or a container's own call chain) could not keep up
+        "scheduleSlip": summarize(stats.slips),
+    }
+
+
+def speed_factor(value: str) -> float:
+    speed = float(value)
+    if not 1.0 <= speed <= MAX_SPEED:
+        raise argparse.ArgumentTypeError(f"speed must be between 1 and {MAX_SPEED:g}")
+    return speed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay captured tool calls against a server")
+    parser.add_argument("capture", help="capture file (.jsonl or .jsonl.gz)")
+    parser.add_argument("--url", default="http://localhost:8001")
+    parser.add_argument("--speed", type=speed_factor, default=1.0, help="time compression, 1-50")
+    parser.add_argument("--limit", type=int, help="replay only the first N calls")
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--output", help="write the JSON report here as well as stdout")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    overall, slip = report["overall"], report["scheduleSlip"]
+    print(f"{report['run']['requests']} calls at {args.speed:g}x: p95 {overall['p95Ms']}ms, "
+          f"p95 schedule slip {slip['p95Ms']}ms, {overall['statusMismatches']} status mismatches",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
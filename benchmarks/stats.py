@@ -0,0 +1,26 @@
+"""Latency summaries shared by the benchmark tools."""
+import math
+from typing import Dict, Sequence
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(seconds: Sequence[float]) -> Dict[str, float]:
+    """Count, mean and tail latencies in milliseconds."""
+    values = sorted(seconds)
+    if not values:
+        return {"count": 0, "meanMs": 0.0, "p50Ms": 0.0, "p95Ms": 0.0, "p99Ms": 0.0, "maxMs": 0.0}
+    return {
+        "count": len(values),
+        "meanMs": round(sum(values) / len(values) * 1000, 3),
+        "p50Ms": round(percentile(values, 50) * 1000, 3),
+        "p95Ms": round(percentile(values, 95) * 1000, 3),
+        "p99Ms": round(percentile(values, 99) * 1000, 3),
+        "maxMs": round(values[-1] * 1000, 3),
+    }
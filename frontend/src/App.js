@@ -5,7 +5,8 @@ const WestportsVoiceDashboard = () => {
         containers: [],
         vessels: [],
         gatepasses: [],
-        ssrRequests: []
+        ssrRequests: [],
+        yardBlocks: []
     });
     const [recentActivities, setRecentActivities] = useState([]);
     const [socket, setSocket] = useState(null);
@@ -61,7 +62,7 @@ const WestportsVoiceDashboard = () => {
 
     const fetchDashboardData = async () => {
         try {
-            const response = await fetch(`${backendUrl}/api/dashboard`);
+            const response = await fetch(`${backendUrl}/api/dashboard?profile=dashboard`);
             const result = await response.json();
             if (result.success) {
                 setDashboardData(result.data);
@@ -87,9 +88,35 @@ const WestportsVoiceDashboard = () => {
                 addActivity(`📋 eGatepass ${data.gatepass.id} generated for ${data.containerNumber}`, data.timestamp, 'gatepass');
                 showNotification(`eGatepass ${data.gatepass.id} generated successfully`, 'success');
                 break;
+            case 'gatepassExpired':
+                updateGatepassInState(data.gatepass);
+                if (data.activeGatepassCleared) {
+                    setDashboardData(prev => ({
+                        ...prev,
+                        containers: prev.containers.map(container =>
+                            container.activeGatepass === data.gatepass.id
+                                ? { ...container, activeGatepass: null }
+                                : container
+                        )
+                    }));
+                }
+                addActivity(`⌛ eGatepass ${data.gatepass.id} expired for ${data.containerNumber}`, data.timestamp, 'gatepass');
+                break;
             case 'vesselQueried':
                 addActivity(`🚢 Vessel ${data.vesselName} schedule queried via Aisha AI`, data.timestamp, 'vessel');
                 break;
+            case 'vesselUpdated':
+                setDashboardData(prev => ({
+                    ...prev,
+                    vessels: prev.vessels.map(vessel =>
+                        vessel.voyageNumber === data.voyageNumber ? data.data : vessel
+                    )
+                }));
+                addActivity(`🚢 Voyage ${data.voyageNumber} rescheduled: ETA ${data.data.eta}, berth ${data.data.berth}`, data.timestamp, 'vessel');
+                break;
+            case 'yardOccupancyChanged':
+                updateYardBlocksInState(data.blocks);
+                break;
             case 'ssrSubmitted':
                 addSSRToState(data.ssr);
                 addActivity(`📝 SSR ${data.ssr.id} submitted for ${data.containerNumber} (${data.ssr.ssrType})`, data.timestamp, 'ssr');
@@ -109,6 +136,23 @@ const WestportsVoiceDashboard = () => {
         }));
     };
 
+    const updateYardBlocksInState = (changedBlocks) => {
+        setDashboardData(prev => {
+            const blocks = new Map((prev.yardBlocks || []).map(block => [block.block, block]));
+            changedBlocks.forEach(block => {
+                if (block.containers > 0) {
+                    blocks.set(block.block, block);
+                } else {
+                    blocks.delete(block.block);
+                }
+            });
+            return {
+                ...prev,
+                yardBlocks: [...blocks.values()].sort((a, b) => a.block.localeCompare(b.block))
+            };
+        });
+    };
+
     const addGatepassToState = (newGatepass) => {
         setDashboardData(prev => ({
             ...prev,
@@ -116,6 +160,17 @@ const WestportsVoiceDashboard = () => {
         }));
     };
 
+    const updateGatepassInState = (updatedGatepass) => {
+        setDashboardData(prev => ({
+            ...prev,
+            gatepasses: prev.gatepasses.map(gatepass =>
+                gatepass.id === updatedGatepass.id
+                    ? updatedGatepass
+                    : gatepass
+            )
+        }));
+    };
+
     const addSSRToState = (newSSR) => {
         setDashboardData(prev => ({
             ...prev,
@@ -330,6 +385,23 @@ const WestportsVoiceDashboard = () => {
                 </div>
             </div>
 
+            {/* Yard Occupancy */}
+            {dashboardData.yardBlocks && dashboardData.yardBlocks.length > 0 && (
+                <div className="section">
+                    <h2>Yard Occupancy</h2>
+                    {dashboardData.yardBlocks.map(block => (
+                        <div key={block.block} className="gatepass-card">
+                            <div className="gatepass-id">{block.area}</div>
+                            <div className="gatepass-details">
+                                Containers: {block.containers} | 
+                                TEU: {block.teu} | 
+                                {Object.entries(block.byStatus).map(([status, count]) => ` ${status}: ${count}`).join(',')}
+                            </div>
+                        </div>
+                    ))}
+                </div>
+            )}
+
             {/* Recent Gatepasses */}
             {dashboardData.gatepasses.length > 0 && (
                 <div className="section">
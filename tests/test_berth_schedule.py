@@ -0,0 +1,121 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+
+from berth_schedule import BerthIntervals, BerthSchedule
+from records import VesselRecord
+from refresh import PeriodicRefresh
+from storage import MemoryStorage
+
+NOW = datetime(2025, 7, 1)
+
+VESSELS = [
+    {"voyageNumber": "V1", "eta": "2025-06-30T06:00:00Z", "etd": "2025-07-01T02:00:00Z", "berth": "CT1-B3"},
+    {"voyageNumber": "V2", "eta": "2025-07-01T04:00:00Z", "etd": "2025-07-02T12:00:00Z", "berth": "CT1-B3"},
+    {"voyageNumber": "V3", "eta": "2025-07-01T10:00:00Z", "etd": "2025-07-06T00:00:00Z", "berth": "CT2-B1"},
+    {"voyageNumber": "V4", "eta": "2025-07-03T00:00:00Z", "etd": "2025-07-04T00:00:00Z", "berth": "CT1-B3"},
+    # Long gone: outside the loaded horizon
+    {"voyageNumber": "V0", "eta": "2025-05-01T00:00:00Z", "etd": "2025-05-03T00:00:00Z", "berth": "CT1-B3"},
+]
+
+
+def voyages(vessels):
+    return [vessel["voyageNumber"] for vessel in vessels]
+
+
+class BerthIntervalsTest(unittest.TestCase):
+    def test_overlap_walk_is_bounded_by_longest_stay(self):
+        intervals = BerthIntervals()
+        day = timedelta(days=1)
+        intervals.add((NOW, NOW + 10 * day, "LONG"))
+        for i in range(1, 8):
+            intervals.add((NOW + i * day, NOW + i * day + timedelta(hours=6), f"S{i}"))
+        stays = intervals.overlapping(NOW + 3 * day + timedelta(hours=1), NOW + 5 * day)
+        self.assertEqual([voyage for _, _, voyage in stays], ["LONG", "S3", "S4"])
+        intervals.remove((NOW, NOW + 10 * day, "LONG"))
+        self.assertEqual(len(intervals), 7)
+
+
+class BerthScheduleTest(unittest.TestCase):
+    """Interval index over berth occupancy, refreshed incrementally"""
+
+    def setUp(self):
+        self.storage = MemoryStorage()
+        self.storage.vessels.insert_many(VESSELS)
+        self.schedule = BerthSchedule(lambda: self.storage, history=timedelta(days=7))
+        self.schedule.load(now=NOW)
+
+    def test_load_skips_stays_before_the_horizon(self):
+        self.assertEqual(sorted(self.schedule.stays), ["V1", "V2", "V3", "V4"])
+
+    def test_arrivals_and_departures(self):
+        self.assertEqual(voyages(self.schedule.arrivals(NOW, NOW + timedelta(hours=12))), ["V2", "V3"])
+        self.assertEqual(voyages(self.schedule.departures(NOW, NOW + timedelta(days=2))), ["V1", "V2"])
+
+    def test_occupancy_and_instant(self):
+        friday = datetime(2025, 7, 4)
+        self.assertEqual(voyages(self.schedule.occupancy("CT1-B3", NOW, friday)), ["V1", "V2", "V4"])
+        at = self.schedule.at(NOW + timedelta(hours=11))
+        self.assertEqual({berth: voyages(vessels) for berth, vessels in at.items()},
+                         {"CT1-B3": ["V2"], "CT2-B1": ["V3"]})
+
+    def test_reschedule_moves_the_stay(self):
+        updated = self.storage.vessels.update("V4", {"berth": "CT2-B1", "eta": "2025-07-01T20:00:00Z"})
+        self.schedule.upsert(updated)
+        self.assertEqual(voyages(self.schedule.occupancy("CT1-B3", NOW, datetime(2025, 7, 4))), ["V1", "V2"])
+        self.assertEqual(voyages(self.schedule.arrivals(NOW, NOW + timedelta(days=1))), ["V2", "V3", "V4"])
+        self.schedule.remove("V4")
+        self.assertNotIn("V4", voyages(self.schedule.at(NOW + timedelta(hours=22))["CT2-B1"]))
+
+    def test_windows_before_the_horizon_use_storage(self):
+        may = datetime(2025, 5, 2)
+        self.assertEqual(voyages(self.schedule.occupancy("CT1-B3", may, may + timedelta(hours=1))), ["V0"])
+        self.assertEqual(voyages(self.schedule.arrivals(datetime(2025, 4, 30), may)), ["V0"])
+        self.assertEqual(voyages(self.schedule.departures(datetime(2025, 5, 3), may + timedelta(days=2))), ["V0"])
+
+    def test_hot_and_storage_paths_agree(self):
+        start, end = NOW, NOW + timedelta(days=3)
+        for berth in ("CT1-B3", "CT2-B1"):
+            self.assertEqual(voyages(self.schedule.occupancy(berth, start, end)),
+                             voyages(self.storage.vessels.find_overlapping(start, end, berth)))
+
+    def test_unscheduled_vessels_are_not_indexed(self):
+        self.schedule.upsert(VesselRecord.new({"voyageNumber": "TBA1", "berth": "CT1-B1"}))
+        self.assertNotIn("TBA1", self.schedule.stays)
+
+
+class BerthScheduleRefreshTest(unittest.IsolatedAsyncioTestCase):
+    """The index rebuilt periodically picks up schedule writes made by other workers"""
+
+    def setUp(self):
+        self.storage = MemoryStorage()
+        self.storage.vessels.insert_many(VESSELS)
+        self.schedule = BerthSchedule(lambda: self.storage, history=timedelta(days=7))
+        self.schedule.load(now=NOW)
+
+    async def test_write_made_elsewhere_is_eventually_seen(self):
+        refresh = PeriodicRefresh("berth schedule", lambda: self.schedule.fetch(now=NOW), self.schedule.install,
+                                  interval=0.01)
+        refresh.start()
+        self.addAsyncCleanup(refresh.stop)
+
+        # Another worker moves V4 to CT2-B1; this process's upsert() never hears of it
+        self.storage.vessels.update("V4", {"berth": "CT2-B1"})
+        friday = datetime(2025, 7, 4)
+        for _ in range(200):
+            if "V4" in voyages(self.schedule.occupancy("CT2-B1", NOW, friday)):
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(voyages(self.schedule.occupancy("CT2-B1", NOW, friday)), ["V3", "V4"])
+        self.assertEqual(voyages(self.schedule.occupancy("CT1-B3", NOW, friday)), ["V1", "V2"])
+
+    async def test_own_write_during_a_rebuild_is_kept(self):
+        fresh = await asyncio.to_thread(self.schedule.fetch, NOW)
+        # Written after the rebuild's query ran, before it is installed
+        self.schedule.upsert(self.storage.vessels.update("V2", {"etd": "2025-07-05T00:00:00Z"}))
+        self.schedule.install(fresh)
+        self.assertEqual(voyages(self.schedule.departures(datetime(2025, 7, 4, 12), datetime(2025, 7, 6))), ["V2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import random
+import unittest
+from datetime import date, timedelta
+
+from charges import ChargeEngine
+
+AS_OF = date(2025, 7, 20)
+
+
+class ChargeEngineTest(unittest.TestCase):
+    """Tiered dwell charges: single-container path, batch path and their agreement"""
+
+    def setUp(self):
+        self.engine = ChargeEngine(free_days=3)
+
+    def test_tiers(self):
+        self.assertEqual(self.engine.storage_charge(0, large=False), 0.0)
+        self.assertEqual(self.engine.storage_charge(7, large=False), 70.0)
+        # 7 days at 20 + 7 at 40 + 2 at 80 for a 40ft box
+        self.assertEqual(self.engine.storage_charge(16, large=True), 580.0)
+
+    def test_single_container(self):
+        container = {"dischargeDate": "2025-07-01", "size": "40HC", "charges": 100.0, "currency": "MYR"}
+        priced = self.engine.for_container(container, AS_OF)
+        self.assertEqual((priced["dwellDays"], priced["chargeableDays"]), (19, 16))
+        self.assertEqual((priced["storageCharges"], priced["totalCharges"]), (580.0, 680.0))
+        self.assertEqual(priced["freeDaysRemaining"], 0)
+
+    def test_dwell_stops_at_gate_out_and_needs_discharge(self):
+        gated_out = {"dischargeDate": "2025-07-01", "gateOutTime": "2025-07-05T09:30:00", "size": "20ST"}
+        self.assertEqual(self.engine.for_container(gated_out, AS_OF)["dwellDays"], 4)
+        arrived = {"dischargeDate": None, "size": "20ST", "charges": 50.0}
+        self.assertEqual(self.engine.for_container(arrived, AS_OF)["totalCharges"], 50.0)
+
+    def test_cache_is_per_day(self):
+        container = {"dischargeDate": "2025-07-10", "size": "20ST"}
+        self.assertEqual(self.engine.for_container(container, AS_OF)["dwellDays"], 10)
+        self.assertEqual(self.engine.for_container(container, AS_OF + timedelta(days=1))["dwellDays"], 11)
+        self.assertEqual(len(self.engine._cache), 1)
+
+    def test_batch_matches_single_container_path(self):
+        rng = random.Random(5)
+        containers = []
+        for i in range(500):
+            discharged = AS_OF - timedelta(days=rng.randint(-2, 60))
+            containers.append({
+                "containerNumber": f"TEST{i:07d}",
+                "dischargeDate": discharged.isoformat() if rng.random() < 0.9 else None,
+                "gateOutTime": ((discharged + timedelta(days=rng.randint(0, 30))).isoformat() + "T08:00:00"
+                                if rng.random() < 0.3 else None),
+                "size": rng.choice(["20ST", "40HC", "45HC", None]),
+                "charges": rng.choice([120.0, 450.5, None]),
+            })
+        priced = self.engine.for_yard(containers, AS_OF)
+        for container, row in zip(containers, priced.itertuples()):
+            single = self.engine.for_container(container, AS_OF)
+            self.assertEqual(
+                (single["dwellDays"], single["chargeableDays"], single["storageCharges"], single["totalCharges"]),
+                (row.dwellDays, row.chargeableDays, row.storageCharges, row.totalCharges),
+                container,
+            )
+
+        summary = self.engine.summarize(priced, top=3)
+        self.assertEqual(summary["containers"], 500)
+        self.assertEqual(sum(band["containers"] for band in summary["byDwell"]), 500)
+        self.assertAlmostEqual(summary["storageCharges"], float(priced["storageCharges"].sum()), places=2)
+        self.assertEqual(len(summary["longestDwell"]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from datetime import datetime
+
+import mongomock
+
+from gate_lane import ActiveGatepasses, GateLane, gate_eligibility, normalize_plate
+from records import ContainerRecord, GatepassRecord
+from storage import MemoryStorage, MongoStorage
+
+GATEPASS = {
+    "id": "GP1", "containerNumber": "ABCD1234567", "truckNumber": "WBE 1234-A",
+    "status": "ACTIVE", "validUntil": "2030-01-01T00:00:00",
+}
+CONTAINER = {
+    "containerNumber": "ABCD1234567", "status": "AVAILABLE_FOR_DELIVERY", "customsStatus": "CLEARED",
+    "edoStatus": "RELEASED", "activeGatepass": "GP1",
+}
+
+
+class ActiveGatepassesTest(unittest.TestCase):
+    """Hot map of ACTIVE gatepasses by id and normalized plate"""
+
+    def test_plates_normalized(self):
+        self.assertEqual(normalize_plate("wbe 1234-a"), "WBE1234A")
+
+    def test_add_and_remove(self):
+        active = ActiveGatepasses()
+        active.add(GatepassRecord.new(GATEPASS))
+        active.add(GatepassRecord.new(dict(GATEPASS, id="GP2")))
+        self.assertEqual(sorted(gp.id for gp in active.for_truck("WBE1234A")), ["GP1", "GP2"])
+        active.remove("GP1")
+        active.remove("GP2")
+        self.assertEqual(active.for_truck("WBE1234A"), [])
+        self.assertEqual(active.by_truck, {})
+
+
+class GateEligibilityTest(unittest.TestCase):
+    def test_eligible(self):
+        self.assertEqual(gate_eligibility(GatepassRecord.new(GATEPASS), ContainerRecord.new(CONTAINER)), [])
+
+    def test_expired_and_superseded(self):
+        gatepass = GatepassRecord.new(dict(GATEPASS, validUntil="2020-01-01T00:00:00"))
+        container = ContainerRecord.new(dict(CONTAINER, activeGatepass="GP9", customsStatus="HOLD"))
+        reasons = gate_eligibility(gatepass, container, now=datetime(2025, 1, 1))
+        self.assertEqual(len(reasons), 3)
+        self.assertIn("expired", reasons[0])
+
+
+class GateLaneTest(unittest.TestCase):
+    def setUp(self):
+        self.storage = MemoryStorage()
+        self.storage.containers.insert_many([CONTAINER])
+        self.storage.gatepasses.insert(GATEPASS)
+        self.storage.gatepasses.insert(dict(GATEPASS, id="GP0", truckNumber="XYZ1", status="EXPIRED"))
+        self.lane = GateLane(lambda: self.storage)
+        self.lane.load()
+
+    def test_load_keeps_only_active(self):
+        self.assertEqual(list(self.lane.active.by_id), ["GP1"])
+
+    def test_hot_lookup_by_plate_and_id(self):
+        by_plate = self.lane.lookup(truck_number="wbe1234a")
+        self.assertTrue(by_plate[0]["eligible"])
+        self.assertEqual(by_plate[0]["container"]["containerNumber"], "ABCD1234567")
+        self.assertEqual(self.lane.lookup(gatepass_id="GP1")[0]["gatepass"].id, "GP1")
+
+    def test_inactive_pass_falls_back_to_storage(self):
+        result = self.lane.lookup(gatepass_id="GP0")
+        self.assertFalse(result[0]["eligible"])
+        self.assertIn("EXPIRED", result[0]["reasons"][0])
+        self.assertEqual(self.lane.lookup(truck_number="NOPE"), [])
+
+    def test_inactive_pass_found_by_any_spelling_of_its_plate(self):
+        self.assertIn("EXPIRED", self.lane.lookup(truck_number="xyz-1")[0]["reasons"][0])
+
+
+class MongoGateLaneTest(GateLaneTest):
+    """The same lookups with the storage fallback querying MongoDB (mongomock)"""
+
+    def setUp(self):
+        self.storage = MongoStorage("mongodb://unused")
+        self.storage.use_database(mongomock.MongoClient().westports_db)
+        self.storage.ensure_indexes()
+        self.storage.containers.insert_many([CONTAINER])
+        self.storage.gatepasses.insert(GATEPASS)
+        self.storage.gatepasses.insert(dict(GATEPASS, id="GP0", truckNumber="XYZ 1", status="EXPIRED"))
+        self.lane = GateLane(lambda: self.storage)
+        self.lane.load()
+
+    def test_used_pass_found_by_lowercase_hyphenated_plate(self):
+        self.storage.gatepasses.update("GP1", {"status": "USED"})
+        self.lane.deactivate("GP1")
+        result = self.lane.lookup(truck_number="wbe 1234-a")
+        self.assertEqual(result[0]["gatepass"]["id"], "GP1")
+        self.assertIn("Gatepass GP1 is USED", result[0]["reasons"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+
+from gatepass_expiry import GatepassExpiryScheduler
+from storage import MemoryStorage
+
+NOW = datetime(2025, 6, 1, 12, 0, 0)
+
+
+def gatepass(gatepass_id, container_number, valid_until, status="ACTIVE"):
+    return {
+        "id": gatepass_id, "containerNumber": container_number, "truckNumber": "WBE1234A",
+        "status": status, "validUntil": valid_until.isoformat(),
+    }
+
+
+class GatepassExpirySchedulerTest(unittest.IsolatedAsyncioTestCase):
+    """Min-heap gatepass expiry: rebuild, conditional transitions and the loop"""
+
+    def setUp(self):
+        self.storage = MemoryStorage()
+        self.storage.containers.insert_many([
+            {"containerNumber": "AAAA0000001", "activeGatepass": "GP1"},
+            {"containerNumber": "AAAA0000002", "activeGatepass": "GP3"},  # GP2 superseded
+            {"containerNumber": "AAAA0000003", "activeGatepass": "GP4"},
+        ])
+        self.storage.gatepasses.insert(gatepass("GP1", "AAAA0000001", NOW - timedelta(minutes=5)))
+        self.storage.gatepasses.insert(gatepass("GP2", "AAAA0000002", NOW - timedelta(minutes=10)))
+        self.storage.gatepasses.insert(gatepass("GP4", "AAAA0000003", NOW + timedelta(hours=1)))
+        self.storage.gatepasses.insert(gatepass("GP0", "AAAA0000003", NOW - timedelta(days=1), status="USED"))
+        self.expired = []
+
+        async def on_expired(gp, container):
+            self.expired.append((gp, container))
+
+        self.scheduler = GatepassExpiryScheduler(lambda: self.storage, on_expired=on_expired)
+        self.scheduler.load()
+
+    def test_load_keeps_active_passes_in_due_order(self):
+        self.assertEqual(len(self.scheduler), 3)
+        self.assertEqual(self.scheduler.next_due(), NOW - timedelta(minutes=10))
+
+    async def test_expire_due_transitions_and_clears_active_gatepass(self):
+        self.assertEqual(await self.scheduler.expire_due(NOW), 2)
+        self.assertEqual(self.storage.gatepasses.get("GP1").status, "EXPIRED")
+        self.assertEqual(self.storage.gatepasses.get("GP2").status, "EXPIRED")
+        self.assertEqual(self.storage.gatepasses.get("GP4").status, "ACTIVE")
+        self.assertIsNone(self.storage.containers.get("AAAA0000001").activeGatepass)
+        # A newer pass on the container is left in place
+        self.assertEqual(self.storage.containers.get("AAAA0000002").activeGatepass, "GP3")
+        self.assertEqual(sorted(gp.id for gp, _ in self.expired), ["GP1", "GP2"])
+        self.assertEqual(len(self.scheduler), 1)
+
+    async def test_used_or_extended_passes_are_skipped(self):
+        self.storage.gatepasses.update("GP1", {"status": "USED"})
+        self.storage.gatepasses.update("GP2", {"validUntil": (NOW + timedelta(days=1)).isoformat()})
+        self.assertEqual(await self.scheduler.expire_due(NOW), 0)
+        self.assertEqual(self.storage.containers.get("AAAA0000001").activeGatepass, "GP1")
+        self.assertEqual(self.storage.gatepasses.get("GP2").status, "ACTIVE")
+
+    async def test_partial_batch_failure_retries_only_unexpired_passes(self):
+        update = self.storage.gatepasses.update
+
+        def fail_on_gp1(gatepass_id, fields, expected=None):
+            if gatepass_id == "GP1":
+                raise ConnectionError("storage unavailable")
+            return update(gatepass_id, fields, expected)
+
+        self.storage.gatepasses.update = fail_on_gp1
+        with self.assertRaises(ConnectionError):
+            await self.scheduler.expire_due(NOW)
+        # GP2 (due first) was expired and reported; GP1 is back on the heap
+        self.assertEqual([gp.id for gp, _ in self.expired], ["GP2"])
+        self.assertEqual(len(self.scheduler), 2)
+
+        self.storage.gatepasses.update = update
+        self.assertEqual(await self.scheduler.expire_due(NOW), 1)
+        self.assertEqual([gp.id for gp, _ in self.expired], ["GP2", "GP1"])
+        self.assertIsNone(self.storage.containers.get("AAAA0000001").activeGatepass)
+
+    async def test_loop_wakes_for_newly_scheduled_pass(self):
+        self.scheduler.max_sleep = 5.0
+        self.scheduler.load()
+        await self.scheduler.expire_due(datetime.utcnow())  # clear the fixtures' past-due passes
+        self.scheduler.start()
+        try:
+            await asyncio.sleep(0.05)
+            due = datetime.utcnow() + timedelta(milliseconds=100)
+            self.storage.containers.update("AAAA0000003", {"activeGatepass": "GP5"})
+            self.scheduler.schedule(self.storage.gatepasses.insert(gatepass("GP5", "AAAA0000003", due)))
+            await asyncio.sleep(0.5)
+        finally:
+            await self.scheduler.stop()
+        self.assertEqual(self.storage.gatepasses.get("GP5").status, "EXPIRED")
+        self.assertIsNone(self.storage.containers.get("AAAA0000003").activeGatepass)
+
+
+if __name__ == "__main__":
+    unittest.main()
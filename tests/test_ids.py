@@ -0,0 +1,146 @@
+import multiprocessing
+import os
+import unittest
+from array import array
+from datetime import datetime, timedelta
+
+import mongomock
+
+from ids import EPOCH, MAX_SEQUENCE, IdGenerator, generator, parse_id
+from storage import MemoryStorage, MongoStorage
+from worker_lease import WorkerIdLease
+
+IDS_PER_PROCESS = 500_000
+PROCESSES = 4
+
+
+def _generate(worker_id: int) -> bytes:
+    ids = IdGenerator(worker_id)
+    return array("q", (ids.next_int() for _ in range(IDS_PER_PROCESS))).tobytes()
+
+
+def _child_worker_id(_) -> tuple:
+    return generator.worker_id, os.getpid()
+
+
+def _leased_child_worker_id(_) -> int:
+    return generator.worker_id
+
+
+class FakeClock:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def __call__(self):
+        return self.seconds
+
+
+class IdGeneratorTest(unittest.TestCase):
+    """Time + worker + sequence ids: ordering, clock skew and uniqueness"""
+
+    def test_ids_sort_in_creation_order_and_parse_back(self):
+        clock = FakeClock((datetime(2025, 6, 1) - datetime(1970, 1, 1)).total_seconds())
+        ids = IdGenerator(worker_id=7, clock=clock)
+        first = ids.next_id("GP")
+        clock.seconds += 0.001
+        second = ids.next_id("GP")
+        self.assertLess(first, second)
+        self.assertEqual(len(first), len("GP") + 19)
+        self.assertEqual(parse_id(second, "GP"), (datetime(2025, 6, 1, 0, 0, 0, 1000), 7, 0))
+        with self.assertRaises(ValueError):
+            parse_id("GP1719876543", "GP")
+
+    def test_clock_going_backwards_never_repeats(self):
+        clock = FakeClock((EPOCH - datetime(1970, 1, 1)).total_seconds() + 100)
+        ids = IdGenerator(worker_id=1, clock=clock)
+        before = [ids.next_int() for _ in range(3)]
+        clock.seconds -= 5
+        after = [ids.next_int() for _ in range(3)]
+        self.assertEqual(before + after, sorted(set(before + after)))
+
+    def test_exhausted_sequence_borrows_next_millisecond(self):
+        clock = FakeClock((EPOCH - datetime(1970, 1, 1)).total_seconds() + 100)
+        ids = IdGenerator(worker_id=1, clock=clock)
+        values = [ids.next_id("SSR") for _ in range(MAX_SEQUENCE + 3)]
+        self.assertEqual(values, sorted(set(values)))
+        self.assertEqual(parse_id(values[-1], "SSR")[2], 1)
+
+    def test_worker_id_range_checked(self):
+        with self.assertRaises(ValueError):
+            IdGenerator(worker_id=1024)
+
+    def test_millions_of_ids_across_processes_are_unique(self):
+        with multiprocessing.get_context("spawn").Pool(PROCESSES) as pool:
+            chunks = pool.map(_generate, range(PROCESSES))
+        values = array("q")
+        for chunk in chunks:
+            per_process = array("q", chunk)
+            self.assertEqual(list(per_process), sorted(per_process))  # monotonic within a worker
+            values.extend(per_process)
+        self.assertEqual(len(values), PROCESSES * IDS_PER_PROCESS)
+        self.assertEqual(len(set(values)), len(values))
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs fork")
+    def test_forked_workers_get_their_own_worker_id(self):
+        generator.next_int()
+        with multiprocessing.get_context("fork").Pool(2) as pool:
+            results = pool.map(_child_worker_id, range(2))
+        for worker_id, pid in results:
+            self.assertEqual(worker_id, pid & 1023)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs fork")
+    def test_forked_workers_drop_the_parents_lease(self):
+        generator.use_worker_id(1000 if os.getpid() & 1023 != 1000 else 1001)
+        try:
+            leased = generator.worker_id
+            with multiprocessing.get_context("fork").Pool(2) as pool:
+                self.assertNotIn(leased, pool.map(_leased_child_worker_id, range(2)))
+        finally:
+            generator._forked()
+
+
+class WorkerIdLeaseTest(unittest.TestCase):
+    """Worker ids leased from storage instead of derived from the pid"""
+
+    def setUp(self):
+        self.storage = MongoStorage("mongodb://unused")
+        self.storage.use_database(mongomock.MongoClient().westports_db)
+        self.storage.ensure_indexes()
+
+    def test_default_generators_in_different_processes_never_collide(self):
+        # Two pods whose workers both run as the same pid: without a lease they share a worker id
+        clock = FakeClock((datetime(2025, 6, 1) - datetime(1970, 1, 1)).total_seconds())
+        first, second = IdGenerator(clock=clock), IdGenerator(clock=clock)
+        self.assertEqual(first.next_id("GP"), second.next_id("GP"))
+
+        for ids in (first, second):
+            WorkerIdLease(lambda: self.storage, ids).acquire()
+        self.assertNotEqual(first.worker_id, second.worker_id)
+        issued = [ids.next_id("GP") for _ in range(1000) for ids in (first, second)]
+        self.assertEqual(len(set(issued)), len(issued))
+
+    def test_expired_lease_is_reclaimed_and_lost_lease_replaced(self):
+        stalled, other = IdGenerator(), IdGenerator()
+        stalled_lease = WorkerIdLease(lambda: self.storage, stalled, ttl=60)
+        self.assertEqual(stalled_lease.acquire(), 0)
+        # The stalled process misses its renewals; the lease expires and is taken over
+        self.storage.db.worker_leases.update_one({"_id": 0},
+                                                 {"$set": {"expiresAt": datetime.utcnow() - timedelta(seconds=1)}})
+        self.assertEqual(WorkerIdLease(lambda: self.storage, other).acquire(), 0)
+
+        self.assertFalse(stalled_lease.renew())
+        self.assertEqual(stalled.worker_id, 1)
+        self.assertTrue(stalled_lease.renew())
+        stalled_lease.release()
+        self.assertEqual(self.storage.db.worker_leases.count_documents({}), 1)
+
+    def test_memory_storage_leases(self):
+        storage = MemoryStorage()
+        leases = [WorkerIdLease(lambda: storage, IdGenerator()) for _ in range(2)]
+        self.assertEqual([lease.acquire() for lease in leases], [0, 1])
+        leases[0].release()
+        self.assertEqual(WorkerIdLease(lambda: storage, IdGenerator()).acquire(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from ids import generator
+from journal import EventJournal, JournalMiddleware
+from metrics import JOURNAL_EVENTS
+from storage import MemoryStorage
+
+
+class FlakyEvents:
+    """Event repository that rejects writes while ``failing`` is set"""
+
+    def __init__(self, events):
+        self.events = events
+        self.failing = False
+        self.batches = []
+
+    def insert_many(self, documents):
+        documents = list(documents)
+        if self.failing:
+            raise ConnectionError("storage unavailable")
+        self.batches.append(len(documents))
+        return self.events.insert_many(documents)
+
+    def find_by_container(self, *args, **kwargs):
+        return self.events.find_by_container(*args, **kwargs)
+
+
+class FlakyStorage:
+    def __init__(self):
+        self.memory = MemoryStorage()
+        self.events = FlakyEvents(self.memory.events)
+
+
+class EventJournalTest(unittest.TestCase):
+    """Write-behind batching, spill on overflow or failure, and replay"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.spill_path = os.path.join(self.tmp.name, "journal.spill.jsonl")
+        self.storage = FlakyStorage()
+
+    def journal(self, **kwargs):
+        kwargs.setdefault("linger", 0.01)
+        kwargs.setdefault("retry_interval", 0.05)
+        journal = EventJournal(lambda: self.storage, spill_path=self.spill_path, **kwargs)
+        self.addCleanup(journal.close)
+        return journal
+
+    def timeline(self, container_number="ABCD1234567"):
+        return self.storage.events.find_by_container(container_number, limit=1000)
+
+    def test_events_written_in_batches_and_order(self):
+        journal = self.journal(batch_size=50)
+        ids = [journal.record("containerStatusChanged", "ABCD1234567", data={"to": str(i)}) for i in range(120)]
+        journal.start()
+        self.assertTrue(journal.flush())
+        events = self.timeline()
+        self.assertEqual([event.key for event in events], ids)
+        self.assertEqual(events[0]["data"], {"to": "0"})
+        self.assertLessEqual(max(self.storage.events.batches), 50)
+        self.assertLess(len(self.storage.events.batches), 120)
+
+    def test_filter_by_type_and_page(self):
+        journal = self.journal()
+        journal.start()
+        journal.record("containerStatusChanged", "ABCD1234567", data={"to": "DISCHARGED"})
+        journal.record("gatepassGenerated", "ABCD1234567")
+        journal.record("containerStatusChanged", "ABCD1234567", data={"to": "GATED_OUT"})
+        journal.record("containerStatusChanged", "EFGH9876543", data={"to": "GATED_OUT"})
+        journal.flush()
+        statuses = self.storage.events.find_by_container("ABCD1234567", types=["containerStatusChanged"])
+        self.assertEqual([event["data"]["to"] for event in statuses], ["DISCHARGED", "GATED_OUT"])
+        second = self.storage.events.find_by_container("ABCD1234567", after=statuses[0].key)
+        self.assertEqual([event["type"] for event in second], ["gatepassGenerated", "containerStatusChanged"])
+
+    def test_overflow_dropped_without_touching_disk(self):
+        journal = self.journal(max_pending=10)
+        dropped = JOURNAL_EVENTS.labels("dropped").value
+        ids = [journal.record("toolCall", "ABCD1234567") for _ in range(25)]
+        self.assertEqual(len(journal), 10)
+        self.assertEqual(JOURNAL_EVENTS.labels("dropped").value - dropped, 15)
+        self.assertFalse(os.path.exists(self.spill_path))
+        journal.start()
+        journal.flush()
+        self.assertEqual([event.key for event in self.timeline()], ids[:10])
+
+    def test_failed_batch_spilled_then_replayed_once(self):
+        journal = self.journal()
+        journal.start()
+        self.storage.events.failing = True
+        ids = [journal.record("ssrSubmitted", "ABCD1234567") for _ in range(5)]
+        journal.flush()
+        self.assertEqual(self.timeline(), [])
+        with open(self.spill_path) as f:
+            self.assertEqual(len(f.readlines()), 5)
+
+        self.storage.events.failing = False
+        ids.append(journal.record("ssrSubmitted", "ABCD1234567"))
+        journal.close()
+        # A fresh journal (a restart) replays the spill; replaying again writes nothing twice
+        restarted = self.journal()
+        restarted.start()
+        restarted.flush()
+        self.assertEqual(sorted(event.key for event in self.timeline()), sorted(ids))
+        self.assertEqual(self.storage.events.insert_many([event.to_doc() for event in self.timeline()]), 0)
+
+    def test_crashed_workers_spill_replayed_under_another_worker_id(self):
+        self.addCleanup(generator.use_worker_id, generator.worker_id)
+        self.spill_path = os.path.join(self.tmp.name, "journal.{worker}.spill.jsonl")
+        generator.use_worker_id(3)
+        crashed = self.journal()
+        crashed.start()
+        self.storage.events.failing = True
+        ids = [crashed.record("ssrSubmitted", "ABCD1234567") for _ in range(5)]
+        crashed.flush()
+        crashed.close()
+        orphan = os.path.join(self.tmp.name, "journal.3.spill.jsonl")
+        self.assertTrue(os.path.exists(orphan))
+
+        # Its replacement leases a different worker id, so it would never open journal.3 by name
+        generator.use_worker_id(4)
+        self.storage.events.failing = False
+        replacement = self.journal()
+        replacement.start()
+        replacement.flush()
+        self.assertEqual([event.key for event in self.timeline()], ids)
+        self.assertFalse(os.path.exists(orphan))
+
+    def test_live_workers_spill_left_alone(self):
+        self.addCleanup(generator.use_worker_id, generator.worker_id)
+        self.spill_path = os.path.join(self.tmp.name, "journal.{worker}.spill.jsonl")
+        generator.use_worker_id(3)
+        down = FlakyStorage()
+        down.events.failing = True
+        live = EventJournal(lambda: down, spill_path=self.spill_path, linger=0.01, retry_interval=60)
+        self.addCleanup(live.close)
+        live.start()
+        live.record("ssrSubmitted", "ABCD1234567")
+        live.flush()
+
+        generator.use_worker_id(4)
+        other = self.journal()
+        other.start()
+        other.flush()
+        self.assertEqual(self.timeline(), [])
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "journal.3.spill.jsonl")))
+
+    def test_spill_path_per_worker_and_absolute(self):
+        journal = EventJournal(lambda: self.storage, spill_path="journal.{worker}.spill.jsonl")
+        self.assertTrue(os.path.isabs(journal.spill_path))
+        self.assertTrue(journal.spill_path.endswith(f"journal.{generator.worker_id}.spill.jsonl"))
+
+    def test_without_spill_path_overflow_is_dropped(self):
+        journal = EventJournal(lambda: self.storage, spill_path=None, max_pending=2)
+        for _ in range(5):
+            journal.record("toolCall")
+        self.assertEqual(len(journal), 2)
+        journal.close()
+
+
+class JournalMiddlewareTest(unittest.TestCase):
+    def test_tool_call_journaled_with_parsed_body(self):
+        storage = MemoryStorage()
+        journal = EventJournal(lambda: storage, linger=0.01)
+        journal.start()
+        self.addCleanup(journal.close)
+
+        async def app(scope, receive, send):
+            await receive()
+            await send({"type": "http.response.start", "status": 404, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        middleware = JournalMiddleware(app, journal, {"/api/containers/status": "getContainerStatus"})
+        messages = [{"type": "http.request", "body": b'{"containerNumber": "ABCD1234567"}', "more_body": False}]
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            pass
+
+        for path in ("/api/containers/status", "/api/health"):
+            asyncio.run(middleware({"type": "http", "path": path}, receive, send))
+            messages.append({"type": "http.request", "body": b"", "more_body": False})
+        journal.flush()
+
+        events = storage.events.find_by_container("ABCD1234567")
+        self.assertEqual(len(events), 1)
+        event = events[0]
+        self.assertEqual((event["type"], event["tool"], event["status"]), ("toolCall", "getContainerStatus", 404))
+        self.assertEqual(event["data"], {"request": {"containerNumber": "ABCD1234567"}})
+        self.assertIsNone(event.get("body"))
@@ -0,0 +1,116 @@
+import asyncio
+import io
+import json
+import logging
+import threading
+import time
+import unittest
+
+import logs
+from logs import LogContextMiddleware, bind, parse_sample_rates, setup_logging, shutdown_logging
+from metrics import LOG_RECORDS_DISCARDED
+
+TOOLS = {"/api/containers/status": "getContainerStatus", "/api/containers/update": "updateContainerStatus"}
+
+
+class BlockedStream(io.StringIO):
+    """stdout that hangs until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.released = threading.Event()
+
+    def write(self, text):
+        self.released.wait()
+        return super().write(text)
+
+
+def app_for(status, message="Container status query"):
+    async def app(scope, receive, send):
+        bind(containerNumber="ABCD1234567")
+        logging.getLogger("server").info(message)
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+    return app
+
+
+def call(middleware, path="/api/containers/status", headers=()):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware({"type": "http", "path": path, "headers": list(headers)}, receive, send))
+    return sent
+
+
+class StructuredLoggingTest(unittest.TestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.addCleanup(shutdown_logging)
+
+    def records(self):
+        shutdown_logging()
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_call_records_carry_call_context(self):
+        setup_logging(fmt="json", stream=self.stream)
+        sent = call(LogContextMiddleware(app_for(200), TOOLS), headers=[(b"x-request-id", b"req-42")])
+        query, done = self.records()
+        for record in (query, done):
+            self.assertEqual((record["callId"], record["tool"], record["containerNumber"]),
+                             ("req-42", "getContainerStatus", "ABCD1234567"))
+        self.assertEqual(query["message"], "Container status query")
+        self.assertEqual(done["status"], 200)
+        self.assertIn("durationMs", done)
+        self.assertIn((b"x-request-id", b"req-42"), sent[0]["headers"])
+
+    def test_call_id_generated_per_call(self):
+        setup_logging(fmt="json", stream=self.stream)
+        middleware = LogContextMiddleware(app_for(200), TOOLS)
+        call(middleware)
+        call(middleware)
+        ids = {record["callId"] for record in self.records()}
+        self.assertEqual(len(ids), 2)
+        self.assertTrue(all(call_id.startswith("CALL") for call_id in ids))
+
+    def test_sampled_out_calls_keep_failures(self):
+        setup_logging(fmt="json", stream=self.stream)
+        rates = parse_sample_rates("getContainerStatus=0")
+        call(LogContextMiddleware(app_for(200), TOOLS, rates))
+        call(LogContextMiddleware(app_for(404), TOOLS, rates))
+        call(LogContextMiddleware(app_for(200, "Update"), TOOLS, rates), path="/api/containers/update")
+        records = self.records()
+        self.assertEqual([(r["tool"], r.get("status")) for r in records],
+                         [("getContainerStatus", 404), ("updateContainerStatus", None), ("updateContainerStatus", 200)])
+        with self.assertRaises(ValueError):
+            parse_sample_rates("getContainerStatus")
+
+    def test_slow_stdout_never_blocks_callers(self):
+        stream = BlockedStream()
+        self.addCleanup(stream.released.set)
+        setup_logging(fmt="json", stream=stream, max_queue=10)
+        dropped = LOG_RECORDS_DISCARDED.labels("queue_full").value
+        log = logging.getLogger("server")
+        started = time.perf_counter()
+        for i in range(100):
+            log.info("record %d", i)
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertGreater(LOG_RECORDS_DISCARDED.labels("queue_full").value, dropped)
+        stream.released.set()
+
+    def test_text_format_and_exceptions(self):
+        setup_logging(fmt="text", stream=self.stream)
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            logging.getLogger("server").exception("Failed", extra={"containerNumber": "ABCD1234567"})
+        shutdown_logging()
+        output = self.stream.getvalue()
+        self.assertIn("ERROR server Failed", output)
+        self.assertIn("containerNumber=ABCD1234567", output)
+        self.assertIn("RuntimeError: boom", output)
+        self.assertFalse(logs._installed)
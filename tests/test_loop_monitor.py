@@ -0,0 +1,41 @@
+import asyncio
+import time
+import unittest
+
+from loop_monitor import LoopLagMonitor
+
+
+class LoopLagMonitorTest(unittest.IsolatedAsyncioTestCase):
+    """Event-loop lag measurement and blocking-frame capture"""
+
+    async def asyncSetUp(self):
+        self.monitor = LoopLagMonitor(interval=0.02, threshold=0.05)
+        self.monitor.start()
+
+    async def asyncTearDown(self):
+        await self.monitor.stop()
+
+    async def test_idle_loop_has_no_stalls(self):
+        await asyncio.sleep(0.2)
+        snapshot = self.monitor.snapshot()
+        self.assertTrue(snapshot["running"])
+        self.assertEqual(snapshot["stalls"], 0)
+
+    async def test_blocking_call_is_captured(self):
+        await asyncio.sleep(0.05)
+        time.sleep(0.3)  # deliberately block the loop
+        await asyncio.sleep(0.05)
+
+        snapshot = self.monitor.snapshot()
+        self.assertGreaterEqual(snapshot["stalls"], 1)
+        self.assertGreater(snapshot["maxLagMs"], 200)
+
+        stall = self.monitor.recent_stalls()[-1]
+        self.assertTrue(any("test_blocking_call_is_captured" in line for line in stall["stack"]))
+        self.assertIsNotNone(stall["lagMs"])
+        # The blocked task is found through public asyncio APIs
+        self.assertIn("test_blocking_call_is_captured", stall["coroutine"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from metrics import Registry
+
+
+class MetricsRegistryTest(unittest.TestCase):
+    """Prometheus exposition of the in-process metrics registry"""
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_labels(self):
+        counter = self.registry.counter("tool_failures_total", "Failures.", ("tool", "reason"))
+        counter.labels("getContainerStatus", "not_found").inc()
+        counter.labels("getContainerStatus", "not_found").inc()
+        output = self.registry.render()
+        self.assertIn("# TYPE tool_failures_total counter", output)
+        self.assertIn('tool_failures_total{tool="getContainerStatus",reason="not_found"} 2', output)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.registry.histogram("latency_seconds", "Latency.", buckets=(0.01, 0.1, 1.0))
+        for value in (0.005, 0.05, 0.05, 5.0):
+            histogram.observe(value)
+        output = self.registry.render()
+        self.assertIn('latency_seconds_bucket{le="0.01"} 1', output)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 3', output)
+        self.assertIn('latency_seconds_bucket{le="1"} 3', output)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4', output)
+        self.assertIn("latency_seconds_count 4", output)
+
+    def test_gauge_function_read_at_scrape(self):
+        queue = [1, 2, 3]
+        gauge = self.registry.gauge("queue_depth", "Depth.")
+        gauge.set_function(lambda: len(queue))
+        queue.append(4)
+        self.assertIn("queue_depth 4", self.registry.render())
+
+    def test_label_values_are_escaped(self):
+        counter = self.registry.counter("events_total", "Events.", ("path",))
+        counter.labels('a"b').inc()
+        self.assertIn('events_total{path="a\\"b"} 1', self.registry.render())
+
+    def test_wrong_label_count_rejected(self):
+        counter = self.registry.counter("calls_total", "Calls.", ("tool",))
+        with self.assertRaises(ValueError):
+            counter.labels("a", "b")
+
+    def test_duplicate_registration_rejected(self):
+        self.registry.counter("calls_total", "Calls.")
+        with self.assertRaises(ValueError):
+            self.registry.counter("calls_total", "Calls.")
+
+
+if __name__ == "__main__":
+    unittest.main()
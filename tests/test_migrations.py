@@ -0,0 +1,163 @@
+import unittest
+from datetime import datetime
+
+import mongomock
+
+from migrations import pickup_eligibility, ssr_history, truck_plate, unique_ids, vessel_times, yard_location
+from storage import MongoStorage
+
+
+class MigrationTest(unittest.TestCase):
+    """Batch backfills against mongomock: transformed fields, and a second run changes nothing"""
+
+    def setUp(self):
+        self.db = mongomock.MongoClient().westports_db
+
+    def run_twice(self, migration):
+        first = migration.migrate(self.db, batch_size=2)
+        snapshot = {doc["_id"]: doc for doc in self.db[self.collection].find()}
+        second = migration.migrate(self.db, batch_size=2)
+        self.assertEqual(second["updated"], 0)
+        self.assertEqual({doc["_id"]: doc for doc in self.db[self.collection].find()}, snapshot)
+        return first
+
+    def test_pickup_eligibility(self):
+        self.collection = "containers"
+        self.db.containers.insert_many([
+            {"containerNumber": "AAAA0000001", "status": "DISCHARGED", "availableForPickup": True,
+             "edoStatus": "RELEASED", "customsStatus": "CLEARED", "version": 1},
+            {"containerNumber": "AAAA0000002", "status": "DISCHARGED", "availableForPickup": True,
+             "edoStatus": "PENDING", "customsStatus": "CLEARED", "version": 1},
+            {"containerNumber": "AAAA0000003", "status": "GATED_OUT", "availableForPickup": False,
+             "edoStatus": "RELEASED", "customsStatus": "CLEARED", "version": 4,
+             "pickupEligible": False, "pickupBlockers": ["Container status GATED_OUT not eligible for pickup"]},
+        ])
+        stats = self.run_twice(pickup_eligibility)
+        self.assertEqual((stats["documents"], stats["updated"], stats["eligible"]), (3, 2, 1))
+        first, second, third = self.db.containers.find().sort("containerNumber")
+        self.assertEqual((first["pickupEligible"], first["pickupBlockers"], first["version"]), (True, [], 2))
+        self.assertEqual(second["pickupBlockers"], ["EDO not released by shipping agent"])
+        self.assertEqual(third["version"], 4)  # already current: untouched
+
+    def test_yard_location(self):
+        self.collection = "containers"
+        self.db.containers.insert_many([
+            {"containerNumber": "AAAA0000001", "status": "DISCHARGED", "location": "Block A-15", "version": 1},
+            {"containerNumber": "AAAA0000002", "status": "DISCHARGED", "location": "Quay crane 3", "version": 1},
+            {"containerNumber": "AAAA0000003", "status": "GATED_OUT", "location": "Gate 2", "version": 1},
+        ])
+        stats = self.run_twice(yard_location)
+        self.assertEqual(stats["unparsed"], 1)
+        first = self.db.containers.find_one({"containerNumber": "AAAA0000001"})
+        self.assertEqual((first["yardBlock"], first["yardRow"], first["version"]), ("A", 15, 2))
+        gated_out = self.db.containers.find_one({"containerNumber": "AAAA0000003"})
+        self.assertIsNone(gated_out.get("yardBlock"))
+
+    def test_vessel_times(self):
+        self.collection = "vessels"
+        self.db.vessels.insert_many([
+            {"voyageNumber": "V1", "eta": "2025-07-01T06:00:00+08:00", "etd": "2025-07-02T00:00:00Z", "version": 1},
+            {"voyageNumber": "V2", "eta": datetime(2025, 7, 3), "etd": "soon", "version": 1},
+            {"voyageNumber": "V3", "eta": datetime(2025, 7, 4), "etd": datetime(2025, 7, 5), "version": 1},
+        ])
+        stats = self.run_twice(vessel_times)
+        self.assertEqual((stats["documents"], stats["updated"], stats["unparseable"]), (2, 1, 1))
+        first = self.db.vessels.find_one({"voyageNumber": "V1"})
+        self.assertEqual((first["eta"], first["etd"], first["version"]), (datetime(2025, 6, 30, 22), datetime(2025, 7, 2), 2))
+        self.assertEqual(self.db.vessels.find_one({"voyageNumber": "V2"})["etd"], "soon")
+        self.assertIn("eta_1", self.db.vessels.index_information())
+
+    def test_truck_plate(self):
+        self.collection = "gatepasses"
+        self.db.gatepasses.insert_many([
+            {"id": "GP1", "truckNumber": "wbe 1234-a", "status": "EXPIRED", "version": 2},
+            {"id": "GP2", "truckNumber": "WBE5678B", "truckPlate": "WBE5678B", "status": "ACTIVE", "version": 1},
+        ])
+        stats = self.run_twice(truck_plate)
+        self.assertEqual((stats["documents"], stats["updated"]), (1, 1))
+        expired = self.db.gatepasses.find_one({"id": "GP1"})
+        self.assertEqual((expired["truckPlate"], expired["version"]), ("WBE1234A", 3))
+        self.assertIn("truckPlate_1", self.db.gatepasses.index_information())
+
+    def test_unique_ids(self):
+        self.collection = "gatepasses"
+        self.db.gatepasses.insert_many([
+            {"id": "GP1719792000", "containerNumber": "ABCD1234567", "truckNumber": "WBE1234A", "version": 1},
+            {"id": "GP1719792000", "containerNumber": "EFGH7654321", "truckNumber": "WBE5678B", "version": 1},
+            {"id": "GP1719792001", "containerNumber": "ABCD1234567", "truckNumber": "WBE1234A", "version": 1},
+        ])
+        self.db.ssr_requests.insert_many([
+            {"id": "SSR1719792000", "containerNumber": "ABCD1234567", "ssrType": "REEFER", "version": 1},
+            {"id": "SSR1719792000", "containerNumber": "ABCD1234567", "ssrType": "INSPECTION", "version": 1},
+        ])
+        self.db.containers.insert_many([
+            {"containerNumber": "ABCD1234567", "activeGatepass": "GP1719792001", "version": 1,
+             "recentSSRs": [{"id": "SSR1719792000", "ssrType": "REEFER"},
+                            {"id": "SSR1719792000", "ssrType": "INSPECTION"}]},
+            {"containerNumber": "EFGH7654321", "activeGatepass": "GP1719792000", "version": 1, "recentSSRs": []},
+        ])
+        stats = self.run_twice(unique_ids)
+        self.assertEqual((stats["duplicateIds"], stats["updated"], stats["containersRepointed"]), (2, 2, 2))
+
+        kept = self.db.gatepasses.find_one({"containerNumber": "EFGH7654321"})
+        self.assertNotEqual(kept["id"], "GP1719792000")
+        self.assertEqual(kept["legacyId"], "GP1719792000")
+        containers = {doc["containerNumber"]: doc for doc in self.db.containers.find()}
+        self.assertEqual(containers["EFGH7654321"]["activeGatepass"], kept["id"])
+        self.assertEqual(containers["ABCD1234567"]["activeGatepass"], "GP1719792001")
+        inspection = self.db.ssr_requests.find_one({"ssrType": "INSPECTION"})
+        self.assertEqual([entry["id"] for entry in containers["ABCD1234567"]["recentSSRs"]],
+                         ["SSR1719792000", inspection["id"]])
+
+        storage = MongoStorage("mongodb://unused")
+        storage.use_database(self.db)
+        storage.ensure_indexes()
+        self.assertEqual(storage.missing_indexes(), [])
+
+    def test_ssr_history_rekeys_colliding_legacy_ids(self):
+        self.db.ssr_requests.insert_many([
+            {"id": "SSR1719792000", "containerNumber": "ABCD1234567", "ssrType": "REEFER", "status": "PENDING",
+             "submittedAt": "2024-07-01T00:00:00", "version": 1},
+            # Same second, different containers: both rows made it into ssr_requests
+            {"id": "SSR1719792005", "containerNumber": "ABCD1234567", "ssrType": "INSPECTION", "status": "PENDING",
+             "submittedAt": "2024-07-01T00:00:05", "version": 1},
+            {"id": "SSR1719792005", "containerNumber": "IJKL1111111", "ssrType": "INSPECTION", "status": "PENDING",
+             "submittedAt": "2024-07-01T00:00:05", "version": 1},
+        ])
+        self.db.containers.insert_many([
+            {"containerNumber": "ABCD1234567", "ssrHistory": ["SSR1719792000", "SSR1719792005"], "version": 1},
+            # Same second as ABCD's first SSR, whose row never reached ssr_requests
+            {"containerNumber": "EFGH7654321", "ssrHistory": ["SSR1719792000"], "version": 1},
+            {"containerNumber": "IJKL1111111", "ssrHistory": ["SSR1719792005"], "version": 1},
+        ])
+        stats = ssr_history.migrate(self.db, batch_size=2)
+        self.assertEqual((stats["renumbered"], stats["stubsCreated"], stats["stubsRekeyed"]), (1, 1, 1))
+        again = ssr_history.migrate(self.db, batch_size=2)
+        self.assertEqual((again["containers"], again["renumbered"], again["stubsCreated"]), (0, 0, 0))
+
+        stub = self.db.ssr_requests.find_one({"containerNumber": "EFGH7654321"})
+        self.assertEqual((stub["legacyId"], stub["status"], stub["submittedAt"]),
+                         ("SSR1719792000", "UNKNOWN", "2024-07-01T00:00:00"))
+        self.assertNotEqual(stub["id"], "SSR1719792000")
+        containers = {doc["containerNumber"]: doc for doc in self.db.containers.find()}
+        self.assertEqual([entry["id"] for entry in containers["ABCD1234567"]["recentSSRs"]],
+                         ["SSR1719792000", "SSR1719792005"])
+        self.assertEqual([entry["id"] for entry in containers["EFGH7654321"]["recentSSRs"]], [stub["id"]])
+        renumbered = self.db.ssr_requests.find_one({"containerNumber": "IJKL1111111"})
+        self.assertEqual(renumbered["legacyId"], "SSR1719792005")
+        self.assertEqual([entry["id"] for entry in containers["IJKL1111111"]["recentSSRs"]], [renumbered["id"]])
+        self.assertNotIn("ssrHistory", containers["ABCD1234567"])
+
+        ids = [doc["id"] for doc in self.db.ssr_requests.find()]
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_dry_run_writes_nothing(self):
+        self.db.containers.insert_one({"containerNumber": "AAAA0000001", "status": "DISCHARGED",
+                                       "location": "Block A-15", "version": 1})
+        stats = yard_location.migrate(self.db, dry_run=True)
+        self.assertEqual(stats["updated"], 1)
+        self.assertNotIn("yardBlock", self.db.containers.find_one())
+
+
+if __name__ == "__main__":
+    unittest.main()
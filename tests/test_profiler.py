@@ -0,0 +1,58 @@
+import time
+import unittest
+
+from profiler import SamplingProfiler
+
+
+def busy_tool_handler(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class SamplingProfilerTest(unittest.TestCase):
+    """Collapsed-stack sampling of selected requests"""
+
+    def setUp(self):
+        self.profiler = SamplingProfiler()
+
+    def tearDown(self):
+        self.profiler.stop()
+
+    def test_samples_only_while_request_in_flight(self):
+        self.profiler.start(endpoint="/api/gatepass/generate", interval=0.001)
+        busy_tool_handler(0.05)
+        self.assertEqual(self.profiler.samples, 0)
+
+        self.assertTrue(self.profiler.should_profile("/api/gatepass/generate"))
+        self.profiler.enter()
+        busy_tool_handler(0.2)
+        self.profiler.exit()
+        self.profiler.stop()
+
+        self.assertGreater(self.profiler.samples, 0)
+        lines = self.profiler.collapsed().splitlines()
+        self.assertTrue(any("busy_tool_handler" in line for line in lines))
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertGreater(int(count), 0)
+
+    def test_endpoint_selection(self):
+        self.profiler.start(endpoint="/api/gatepass/generate")
+        self.assertTrue(self.profiler.should_profile("/api/gatepass/generate"))
+        self.assertFalse(self.profiler.should_profile("/api/containers/status"))
+
+    def test_percentage_selection(self):
+        self.profiler.start(sample_percent=100)
+        self.assertTrue(self.profiler.should_profile("/api/containers/status"))
+        self.profiler.start(sample_percent=0)
+        self.assertFalse(self.profiler.should_profile("/api/containers/status"))
+
+    def test_window_expires(self):
+        self.profiler.start(endpoint="/api/ssr/submit", duration=0.01)
+        time.sleep(0.05)
+        self.assertFalse(self.profiler.should_profile("/api/ssr/submit"))
+        self.assertFalse(self.profiler.enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import time
+import unittest
+
+from readiness import ReadinessProbe
+
+
+class FakeStorage:
+    """Storage engine whose health checks are scripted by the test"""
+
+    name = "fake"
+
+    def __init__(self, ok=True, delay=0.0, error=None):
+        self.ok = ok
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    def health_checks(self):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {
+            "fake": {"ok": True, "latencyMs": 0.1},
+            "indexes": {"ok": self.ok, "missing": [] if self.ok else ["containers.containerNumber"], "latencyMs": 0.2},
+        }
+
+
+class ReadinessProbeTest(unittest.IsolatedAsyncioTestCase):
+    """Cached, rate-limited deep readiness checks"""
+
+    async def test_ready_when_all_checks_pass(self):
+        storage = FakeStorage()
+        result = await ReadinessProbe(lambda: storage).check()
+        self.assertEqual(result["status"], "ready")
+        self.assertEqual(result["storage"], "fake")
+        self.assertIn("latencyMs", result["checks"]["fake"])
+
+    async def test_failing_check_is_not_ready(self):
+        storage = FakeStorage(ok=False)
+        result = await ReadinessProbe(lambda: storage).check()
+        self.assertEqual(result["status"], "not_ready")
+        self.assertEqual(result["checks"]["indexes"]["missing"], ["containers.containerNumber"])
+
+    async def test_check_error_is_not_ready(self):
+        storage = FakeStorage(error=ConnectionError("connection refused"))
+        result = await ReadinessProbe(lambda: storage).check()
+        self.assertEqual(result["status"], "not_ready")
+        self.assertIn("connection refused", result["checks"]["fake"]["error"])
+
+    async def test_result_is_cached_within_ttl(self):
+        storage = FakeStorage()
+        probe = ReadinessProbe(lambda: storage, ttl=60)
+        first = await probe.check()
+        second = await probe.check()
+        self.assertFalse(first["cached"])
+        self.assertTrue(second["cached"])
+        self.assertEqual(storage.calls, 1)
+
+    async def test_slow_check_times_out(self):
+        storage = FakeStorage(delay=0.5)
+        result = await ReadinessProbe(lambda: storage, timeout=0.05).check()
+        self.assertEqual(result["status"], "not_ready")
+        self.assertIn("timed out", result["checks"]["fake"]["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import json
+import unittest
+
+from records import ContainerRecord, EncodedCache, GatepassRecord, encode_json
+
+
+class RecordTest(unittest.TestCase):
+    """Slot-based records: immutability, versioning and cached encoding"""
+
+    def test_from_doc_drops_mongo_id_and_keeps_unknown_fields(self):
+        record = ContainerRecord.from_doc({"_id": "x", "containerNumber": "ABCD1234567", "yardZone": "N"})
+        self.assertEqual(record.to_doc(), {"containerNumber": "ABCD1234567", "yardZone": "N"})
+        self.assertEqual(record["yardZone"], "N")
+        self.assertIn("containerNumber", record)
+        self.assertNotIn("status", record)
+        with self.assertRaises(KeyError):
+            record["status"]
+
+    def test_records_are_immutable(self):
+        record = ContainerRecord.new({"containerNumber": "ABCD1234567", "status": "DISCHARGED"})
+        with self.assertRaises(AttributeError):
+            record.status = "GATED_OUT"
+
+    def test_replace_bumps_version(self):
+        record = ContainerRecord.new({"containerNumber": "ABCD1234567", "status": "DISCHARGED"})
+        updated = record.replace({"status": "GATED_OUT"}, push={"recentSSRs": "SSR1"})
+        self.assertEqual((record.version, updated.version), (1, 2))
+        self.assertEqual(updated.recentSSRs, ["SSR1"])
+        self.assertEqual(record.status, "DISCHARGED")
+
+    def test_pickup_eligibility_materialized_on_new_and_replace(self):
+        record = ContainerRecord.new({
+            "containerNumber": "ABCD1234567", "status": "DISCHARGED", "availableForPickup": True,
+            "edoStatus": "PENDING", "customsStatus": "CLEARED",
+        })
+        self.assertFalse(record.pickupEligible)
+        self.assertEqual(record.pickupBlockers, ["EDO not released by shipping agent"])
+        released = record.replace({"edoStatus": "RELEASED"})
+        self.assertTrue(released.pickupEligible)
+        self.assertEqual(released.pickupBlockers, [])
+
+    def test_push_keep_last_trims_oldest(self):
+        record = ContainerRecord.new({"containerNumber": "ABCD1234567", "recentSSRs": ["SSR1", "SSR2"]})
+        updated = record.replace(push={"recentSSRs": "SSR3"}, keep_last=2)
+        self.assertEqual(updated.recentSSRs, ["SSR2", "SSR3"])
+
+    def test_json_encoded_once_per_version(self):
+        record = ContainerRecord.new({"containerNumber": "ZZZZ0000001", "status": "DISCHARGED"})
+        self.assertIs(record.to_json(), record.to_json())
+        updated = record.replace({"status": "GATED_OUT"})
+        self.assertEqual(json.loads(updated.to_json())["status"], "GATED_OUT")
+
+    def test_project_keeps_profile_fields_and_caches_separately(self):
+        record = ContainerRecord.new({
+            "containerNumber": "ZZZZ0000002", "status": "DISCHARGED", "recentSSRs": ["SSR1"], "yardZone": "N",
+        })
+        voice = record.project("voice")
+        self.assertEqual(voice.to_doc(), {
+            "containerNumber": "ZZZZ0000002", "status": "DISCHARGED", "pickupEligible": False,
+            "pickupBlockers": voice.pickupBlockers,
+        })
+        self.assertEqual(voice.version, 1)
+        self.assertIs(record.project("full"), record)
+        self.assertNotEqual(voice.to_json(), record.to_json())
+        with self.assertRaises(ValueError):
+            voice.replace({"status": "GATED_OUT"})
+
+    def test_projection_for_mongo(self):
+        projection = ContainerRecord.projection("voice")
+        self.assertEqual(projection["_id"], 0)
+        self.assertEqual(projection["version"], 1)
+        self.assertNotIn("recentSSRs", projection)
+        self.assertEqual(ContainerRecord.projection("full"), {"_id": 0})
+
+    def test_encode_json_splices_records(self):
+        gatepass = GatepassRecord.new({"id": "GP1", "containerNumber": "ABCD1234567"})
+        payload = {"success": True, "data": gatepass, "items": [gatepass, None], "message": "Gate ✓"}
+        self.assertEqual(json.loads(encode_json(payload)), {
+            "success": True,
+            "data": gatepass.to_doc(),
+            "items": [gatepass.to_doc(), None],
+            "message": "Gate ✓",
+        })
+
+    def test_encoded_cache_evicts_least_recent(self):
+        cache = EncodedCache(maxsize=2)
+        cache.put(("C", "a", 1), b"a")
+        cache.put(("C", "b", 1), b"b")
+        cache.get(("C", "a", 1))
+        cache.put(("C", "c", 1), b"c")
+        self.assertIsNone(cache.get(("C", "b", 1)))
+        self.assertEqual(cache.get(("C", "a", 1)), b"a")
+
+
+if __name__ == "__main__":
+    unittest.main()
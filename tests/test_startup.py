@@ -0,0 +1,25 @@
+import unittest
+
+from fastapi.testclient import TestClient
+
+import server
+
+
+class LazyStartupTest(unittest.TestCase):
+    """Importing the server must not touch MongoDB"""
+
+    def test_import_does_not_connect(self):
+        self.assertIsNone(server.storage)
+        self.assertGreater(server.startup_timings["importSeconds"], 0)
+
+    def test_not_ready_before_lifespan_startup(self):
+        # Without the context manager TestClient skips the lifespan handler
+        client = TestClient(server.app)
+        self.assertEqual(client.get("/api/health/live").status_code, 200)
+        response = client.get("/api/health/ready")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["status"], "starting")
+
+
+if __name__ == "__main__":
+    unittest.main()
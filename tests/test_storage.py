@@ -0,0 +1,310 @@
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+
+import mongomock
+
+from storage import REQUIRED_INDEXES, MemoryStorage, MongoStorage
+
+CONTAINER = {
+    "containerNumber": "ABCD1234567",
+    "status": "DISCHARGED",
+    "location": "Block A-15",
+    "recentSSRs": [],
+}
+
+
+class MemoryStorageTest(unittest.TestCase):
+    """In-memory engine: indexed lookups, copy-on-write records and persistence"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_container_get_and_update(self):
+        storage = MemoryStorage()
+        storage.containers.insert_many([CONTAINER])
+        updated = storage.containers.update("ABCD1234567", {"status": "GATED_OUT"}, push={"recentSSRs": "SSR1"})
+        self.assertEqual(updated["status"], "GATED_OUT")
+        self.assertEqual(updated["recentSSRs"], ["SSR1"])
+        self.assertEqual(storage.containers.get("ABCD1234567")["status"], "GATED_OUT")
+        self.assertIsNone(storage.containers.get("XXXX0000000"))
+        self.assertIsNone(storage.containers.update("XXXX0000000", {"status": "GATED_OUT"}))
+
+    def test_updates_are_copy_on_write(self):
+        storage = MemoryStorage()
+        storage.containers.insert_many([CONTAINER])
+        before = storage.containers.get("ABCD1234567")
+        with self.assertRaises(TypeError):
+            before["status"] = "MUTATED"
+        after = storage.containers.update("ABCD1234567", {"status": "GATED_OUT"}, push={"recentSSRs": "SSR1"})
+        self.assertEqual((before.status, before.version, before.recentSSRs), ("DISCHARGED", 1, []))
+        self.assertEqual((after.status, after.version, after.recentSSRs), ("GATED_OUT", 2, ["SSR1"]))
+        self.assertEqual(CONTAINER["recentSSRs"], [])
+        self.assertNotIn("version", CONTAINER)
+
+    def test_ssr_history_pages_newest_first(self):
+        storage = MemoryStorage()
+        for i in range(5):
+            storage.ssr_requests.insert({"id": f"SSR{i}", "containerNumber": "ABCD1234567",
+                                         "submittedAt": f"2025-07-0{i + 1}T08:00:00"})
+        storage.ssr_requests.insert({"id": "SSR9", "containerNumber": "EFGH9876543", "submittedAt": "2025-07-09"})
+        first = storage.ssr_requests.find_by_container("ABCD1234567", limit=2)
+        self.assertEqual([ssr.id for ssr in first], ["SSR4", "SSR3"])
+        rest = storage.ssr_requests.find_by_container("ABCD1234567", limit=10,
+                                                      before=(first[-1].submittedAt, first[-1].id))
+        self.assertEqual([ssr.id for ssr in rest], ["SSR2", "SSR1", "SSR0"])
+
+    def test_recent_ssrs_bounded_across_restart(self):
+        storage = MemoryStorage(path=self.tmp.name)
+        storage.connect()
+        storage.containers.insert_many([CONTAINER])
+        for i in range(4):
+            storage.containers.update("ABCD1234567", {}, push={"recentSSRs": f"SSR{i}"}, keep_last=2)
+        storage._oplog.close()  # crash: no snapshot
+        storage._oplog = None
+
+        reopened = MemoryStorage(path=self.tmp.name)
+        reopened.connect()
+        self.assertEqual(reopened.containers.get("ABCD1234567").recentSSRs, ["SSR2", "SSR3"])
+        reopened.close()
+
+    def test_pickup_listing_follows_eligibility_changes(self):
+        storage = MemoryStorage()
+        storage.containers.insert_many([
+            dict(CONTAINER, containerNumber=f"PICK000000{i}", consignee="ACME", shippingAgent="MSC",
+                 availableForPickup=True, customsStatus="CLEARED", edoStatus="RELEASED" if i % 2 else "PENDING")
+            for i in range(6)
+        ])
+        ready = storage.containers.find_pickup("consignee", "ACME")
+        self.assertEqual([c.containerNumber for c in ready], ["PICK0000001", "PICK0000003", "PICK0000005"])
+        page = storage.containers.find_pickup("shippingAgent", "MSC", limit=2, after="PICK0000001")
+        self.assertEqual([c.containerNumber for c in page], ["PICK0000003", "PICK0000005"])
+        blocked = storage.containers.find_pickup("consignee", "ACME", eligible=False)
+        self.assertEqual(blocked[0].pickupBlockers, ["EDO not released by shipping agent"])
+
+        storage.containers.update("PICK0000000", {"edoStatus": "RELEASED"})
+        storage.containers.update("PICK0000001", {"status": "GATED_OUT", "availableForPickup": False})
+        ready = storage.containers.find_pickup("consignee", "ACME")
+        self.assertEqual([c.containerNumber for c in ready], ["PICK0000000", "PICK0000003", "PICK0000005"])
+
+    def test_vessel_lookups(self):
+        storage = MemoryStorage()
+        storage.vessels.insert_many([
+            {"vesselName": "MSC MAYA", "voyageNumber": "MAY001E"},
+            {"vesselName": "EVERGREEN STAR", "voyageNumber": "EVG002W"},
+        ])
+        self.assertEqual(storage.vessels.find_by_name("evergreen")["voyageNumber"], "EVG002W")
+        self.assertEqual(storage.vessels.find_by_voyage("MAY001E")["vesselName"], "MSC MAYA")
+        self.assertIsNone(storage.vessels.find_by_voyage("NOPE"))
+        # An invalid pattern is searched for literally instead of raising
+        self.assertIsNone(storage.vessels.find_by_name("MSC ("))
+
+    def test_vessel_overlap_and_update(self):
+        storage = MemoryStorage()
+        storage.vessels.insert_many([
+            {"voyageNumber": "V1", "eta": "2025-07-01T06:00:00+08:00", "etd": "2025-07-02T00:00:00Z", "berth": "CT1-B3"},
+            {"voyageNumber": "V2", "eta": "2025-07-03T00:00:00Z", "etd": "2025-07-04T00:00:00Z", "berth": "CT1-B3"},
+            {"voyageNumber": "V3", "eta": "2025-07-01T12:00:00Z", "etd": "2025-07-05T00:00:00Z", "berth": "CT2-B1"},
+        ])
+        # Times are normalized to UTC with a Z suffix
+        self.assertEqual(storage.vessels.find_by_voyage("V1")["eta"], "2025-06-30T22:00:00Z")
+        window = (datetime(2025, 7, 1, 18), datetime(2025, 7, 3, 1))
+        self.assertEqual([v["voyageNumber"] for v in storage.vessels.find_overlapping(*window)], ["V1", "V3", "V2"])
+        self.assertEqual([v["voyageNumber"] for v in storage.vessels.find_overlapping(*window, berth="CT2-B1")], ["V3"])
+
+        updated = storage.vessels.update("V2", {"eta": "2025-07-03T09:00:00+08:00"})
+        self.assertEqual((updated["eta"], updated["version"]), ("2025-07-03T01:00:00Z", 2))
+        self.assertEqual([v["voyageNumber"] for v in storage.vessels.find_overlapping(*window)], ["V1", "V3"])
+        self.assertIsNone(storage.vessels.update("NOPE", {"berth": "CT1-B1"}))
+
+    def test_gatepass_truck_index(self):
+        storage = MemoryStorage()
+        storage.gatepasses.insert({"id": "GP1", "truckNumber": "WBE1234A", "containerNumber": "ABCD1234567"})
+        storage.gatepasses.insert({"id": "GP2", "truckNumber": "WBE1234A", "containerNumber": "EFGH9876543"})
+        self.assertEqual([gp["id"] for gp in storage.gatepasses.find_by_truck("WBE1234A")], ["GP1", "GP2"])
+        self.assertEqual(storage.gatepasses.get("GP2")["containerNumber"], "EFGH9876543")
+
+    def test_state_survives_restart(self):
+        storage = MemoryStorage(path=self.tmp.name)
+        storage.connect()
+        storage.containers.insert_many([CONTAINER])
+        storage.containers.update("ABCD1234567", {"status": "GATED_OUT"})
+        storage.ssr_requests.insert({"id": "SSR1", "containerNumber": "ABCD1234567"})
+        storage.close()
+
+        restored = MemoryStorage(path=self.tmp.name)
+        restored.connect()
+        self.assertEqual(restored.containers.get("ABCD1234567")["status"], "GATED_OUT")
+        self.assertEqual(len(restored.ssr_requests.all()), 1)
+        restored.close()
+
+    def test_oplog_replayed_after_crash(self):
+        storage = MemoryStorage(path=self.tmp.name, compact_every=2)
+        storage.connect()
+        storage.containers.insert_many([CONTAINER])
+        storage.containers.update("ABCD1234567", {"status": "ARRIVED"})  # triggers compaction
+        storage.containers.update("ABCD1234567", {"status": "GATED_OUT"})
+        # Simulate a crash: no close(), plus a torn final line
+        storage._oplog.write('{"op": "upd')
+        storage._oplog.flush()
+
+        restored = MemoryStorage(path=self.tmp.name)
+        restored.connect()
+        self.assertEqual(restored.containers.get("ABCD1234567")["status"], "GATED_OUT")
+        self.assertEqual(restored.containers.count(), 1)
+        restored.close()
+
+    def test_events_bounded_and_kept_out_of_oplog(self):
+        storage = MemoryStorage(path=self.tmp.name, max_events=3)
+        storage.connect()
+        events = [{"id": f"EV{i:02d}", "type": "toolCall", "containerNumber": "ABCD1234567"} for i in range(5)]
+        self.assertEqual(storage.events.insert_many(events), 5)
+        self.assertEqual(storage.events.insert_many(events[-1:]), 0)
+        kept = storage.events.find_by_container("ABCD1234567")
+        self.assertEqual([event.key for event in kept], ["EV02", "EV03", "EV04"])
+        storage.close()
+
+        restored = MemoryStorage(path=self.tmp.name)
+        restored.connect()
+        self.assertEqual(restored.events.find_by_container("ABCD1234567"), [])
+        restored.close()
+
+    def test_reads_safe_during_writes_from_another_thread(self):
+        storage = MemoryStorage()
+        errors = []
+
+        def write():
+            for i in range(20):
+                storage.events.insert_many([{"id": f"EV{i:03d}{j:03d}", "type": "toolCall",
+                                             "containerNumber": "ABCD1234567"} for j in range(200)])
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        while writer.is_alive():
+            try:
+                storage.events.find_by_container("ABCD1234567", limit=10)
+            except RuntimeError as exc:
+                errors.append(exc)
+        writer.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(storage.events.find_by_container("ABCD1234567", limit=10_000)), 4000)
+
+    def test_health_checks(self):
+        checks = MemoryStorage().health_checks()
+        self.assertTrue(checks["memory"]["ok"])
+        self.assertIn("latencyMs", checks["memory"])
+
+
+class FakeCollection:
+    def __init__(self, indexes):
+        self.indexes = indexes
+
+    def index_information(self):
+        return self.indexes
+
+
+class FakeDatabase:
+    """Just enough of a pymongo database for the index check"""
+
+    def __init__(self, missing=()):
+        self.missing = set(missing)
+
+    def __getitem__(self, name):
+        indexes = {"_id_": {"key": [("_id", 1)]}}
+        for spec in REQUIRED_INDEXES[name]:
+            fields = "_".join(field for field, _ in spec["keys"])
+            if f"{name}.{fields}" not in self.missing:
+                # Named the way MongoDB names them, so compound indexes sharing a prefix don't collide
+                indexes["_".join(f"{field}_{direction}" for field, direction in spec["keys"])] = {
+                    "key": list(spec["keys"])}
+        return FakeCollection(indexes)
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+class MongoStorageIndexTest(unittest.TestCase):
+    """Required-index verification used by the readiness probe"""
+
+    def storage(self, db):
+        storage = MongoStorage("mongodb://unused")
+        storage.use_database(db)
+        return storage
+
+    def test_no_missing_indexes(self):
+        self.assertEqual(self.storage(FakeDatabase()).missing_indexes(), [])
+
+    def test_missing_index_reported(self):
+        storage = self.storage(FakeDatabase(missing=["containers.containerNumber"]))
+        self.assertEqual(storage.missing_indexes(), ["containers.containerNumber"])
+
+    def test_index_build_failure_stops_startup(self):
+        db = mongomock.MongoClient().westports_db
+        db.gatepasses.insert_many([{"id": "GP1719792000", "containerNumber": "ABCD1234567"},
+                                   {"id": "GP1719792000", "containerNumber": "EFGH7654321"}])
+        storage = self.storage(db)
+        with self.assertRaisesRegex(RuntimeError, r"gatepasses\.id .*migrations\.unique_ids"):
+            storage.ensure_indexes()
+        self.assertEqual(storage.missing_indexes(), ["gatepasses.id"])
+
+
+class MongoStorageTest(unittest.TestCase):
+    """MongoDB engine against mongomock: update documents, BSON times and event dedupe"""
+
+    def setUp(self):
+        self.storage = MongoStorage("mongodb://unused")
+        self.storage.use_database(mongomock.MongoClient().westports_db)
+        self.storage.ensure_indexes()
+
+    def test_update_materializes_pickup_eligibility(self):
+        self.storage.containers.insert_many([dict(CONTAINER, availableForPickup=True, customsStatus="CLEARED",
+                                                  edoStatus="PENDING")])
+        self.assertFalse(self.storage.containers.get("ABCD1234567").pickupEligible)
+        updated = self.storage.containers.update("ABCD1234567", {"edoStatus": "RELEASED"})
+        # The update bumps the version and the conditional derived-field write bumps it again
+        self.assertEqual((updated.pickupEligible, updated.pickupBlockers, updated.version), (True, [], 3))
+        stored = self.storage.db.containers.find_one({"containerNumber": "ABCD1234567"})
+        self.assertEqual((stored["pickupEligible"], stored["version"]), (True, 3))
+
+        # Nothing derived changes: a single write
+        updated = self.storage.containers.update("ABCD1234567", {"lastUpdated": "2025-07-01T08:00:00"})
+        self.assertEqual((updated.lastUpdated, updated.version), ("2025-07-01T08:00:00", 4))
+        self.assertIsNone(self.storage.containers.update("ABCD1234567", {"status": "GATED_OUT"},
+                                                         expected={"version": 1}))
+
+    def test_recent_ssrs_keep_last(self):
+        self.storage.containers.insert_many([CONTAINER])
+        for i in range(4):
+            self.storage.containers.update("ABCD1234567", {}, push={"recentSSRs": f"SSR{i}"}, keep_last=2)
+        self.assertEqual(self.storage.containers.get("ABCD1234567").recentSSRs, ["SSR2", "SSR3"])
+
+    def test_vessel_times_stored_as_dates(self):
+        self.storage.vessels.insert_many([
+            {"voyageNumber": "V1", "eta": "2025-07-01T06:00:00+08:00", "etd": "2025-07-02T00:00:00Z", "berth": "CT1-B3"},
+            {"voyageNumber": "V2", "eta": "2025-07-03T00:00:00Z", "etd": "2025-07-04T00:00:00Z", "berth": "CT1-B3"},
+        ])
+        stored = self.storage.db.vessels.find_one({"voyageNumber": "V1"})
+        self.assertEqual(stored["eta"], datetime(2025, 6, 30, 22))
+        self.assertEqual(self.storage.vessels.find_by_voyage("V1")["eta"], "2025-06-30T22:00:00Z")
+        window = (datetime(2025, 7, 1, 18), datetime(2025, 7, 3, 1))
+        self.assertEqual([v.voyageNumber for v in self.storage.vessels.find_overlapping(*window)], ["V1", "V2"])
+
+        updated = self.storage.vessels.update("V2", {"eta": "2025-07-03T09:00:00+08:00"})
+        self.assertEqual((updated["eta"], updated["version"]), ("2025-07-03T01:00:00Z", 2))
+        self.assertEqual(self.storage.db.vessels.find_one({"voyageNumber": "V2"})["eta"], datetime(2025, 7, 3, 1))
+
+    def test_event_reinsert_skips_written_ids(self):
+        events = [{"id": f"EV{i:02d}", "type": "toolCall", "containerNumber": "ABCD1234567"} for i in range(3)]
+        self.assertEqual(self.storage.events.insert_many(events[:2]), 2)
+        self.assertEqual(self.storage.events.insert_many(events), 1)
+        self.assertEqual(self.storage.events.insert_many(events), 0)
+        self.assertEqual([event.key for event in self.storage.events.find_by_container("ABCD1234567")],
+                         ["EV00", "EV01", "EV02"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,243 @@
+import os
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+import server
+
+
+class ToolEndpointsTest(unittest.TestCase):
+    """Ultravox tool endpoints end-to-end on the in-memory storage engine"""
+
+    def setUp(self):
+        env = mock.patch.dict(os.environ, {"STORAGE_BACKEND": "memory", "LOOP_MONITOR_ENABLED": "false"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = TestClient(server.app)
+        self.client.__enter__()
+        self.addCleanup(self.client.__exit__, None, None, None)
+
+    def test_ready_on_memory_storage(self):
+        response = self.client.get("/api/health/ready")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["storage"], "memory")
+
+    def test_container_status(self):
+        response = self.client.post("/api/containers/status", json={"containerNumber": "ABCD1234567"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data["success"])
+        self.assertEqual(data["data"]["status"], "DISCHARGED")
+        self.assertNotIn("_id", data["data"])
+        breakdown = data["chargeBreakdown"]
+        self.assertEqual(breakdown["totalCharges"], data["data"]["charges"] + breakdown["storageCharges"])
+
+    def test_charges_summary(self):
+        summary = self.client.get("/api/charges/summary", params={"top": 2}).json()["data"]
+        self.assertEqual(summary["containers"], 3)
+        self.assertEqual(len(summary["longestDwell"]), 2)
+
+    def test_voice_profile_trims_container(self):
+        full = self.client.post("/api/containers/status", json={"containerNumber": "ABCD1234567"})
+        voice = self.client.post("/api/containers/status?profile=voice", json={"containerNumber": "ABCD1234567"})
+        self.assertEqual(voice.status_code, 200)
+        data = voice.json()["data"]
+        self.assertEqual(data["status"], "DISCHARGED")
+        for field in ("id", "recentSSRs", "lastUpdated", "version"):
+            self.assertNotIn(field, data)
+        self.assertLess(len(voice.content), len(full.content))
+
+    def test_unknown_profile_rejected(self):
+        response = self.client.post("/api/containers/status?profile=tiny", json={"containerNumber": "ABCD1234567"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("voice", response.json()["detail"]["message"])
+
+    def test_container_not_found(self):
+        response = self.client.post("/api/containers/status", json={"containerNumber": "XXXX0000000"})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.json()["detail"]["success"])
+
+    def test_update_container_status(self):
+        response = self.client.post("/api/containers/update", json={
+            "containerNumber": "EFGH9876543",
+            "newStatus": "AVAILABLE_FOR_DELIVERY",
+            "location": "Block B-10",
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual(data["status"], "AVAILABLE_FOR_DELIVERY")
+        self.assertEqual(data["location"], "Block B-10")
+        self.assertTrue(data["availableForPickup"])
+
+    def test_generate_gatepass(self):
+        response = self.client.post("/api/gatepass/generate", json={
+            "containerNumber": "ABCD1234567",
+            "haulierCompany": "ABC LOGISTICS",
+            "truckNumber": "WBE1234A",
+        })
+        self.assertEqual(response.status_code, 200)
+        gatepass = response.json()["data"]
+        self.assertEqual(gatepass["status"], "ACTIVE")
+        self.assertEqual(gatepass["charges"], response.json()["chargeBreakdown"]["totalCharges"])
+        container = self.client.post("/api/containers/status", json={"containerNumber": "ABCD1234567"}).json()["data"]
+        self.assertEqual(container["activeGatepass"], gatepass["id"])
+
+    def test_gate_lookup_after_generate(self):
+        gatepass = self.client.post("/api/gatepass/generate", json={
+            "containerNumber": "ABCD1234567",
+            "haulierCompany": "ABC LOGISTICS",
+            "truckNumber": "WBE1234A",
+        }).json()["data"]
+        by_plate = self.client.get("/api/gate/lookup", params={"truckNumber": "wbe 1234 a"})
+        self.assertEqual(by_plate.status_code, 200)
+        self.assertTrue(by_plate.json()["eligible"])
+        self.assertEqual(by_plate.json()["data"][0]["gatepass"]["id"], gatepass["id"])
+        by_id = self.client.get("/api/gate/lookup", params={"gatepassId": gatepass["id"]})
+        self.assertEqual(by_id.json()["data"][0]["container"]["containerNumber"], "ABCD1234567")
+        self.assertEqual(self.client.get("/api/gate/lookup", params={"truckNumber": "NONE1"}).status_code, 404)
+        self.assertEqual(self.client.get("/api/gate/lookup").status_code, 400)
+
+    def test_gatepass_validation_errors(self):
+        response = self.client.post("/api/gatepass/generate", json={
+            "containerNumber": "MSKU7654321",
+            "haulierCompany": "ABC LOGISTICS",
+            "truckNumber": "WBE1234A",
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Customs clearance pending", response.json()["detail"]["validationErrors"])
+
+    def test_pickup_listing_by_consignee(self):
+        response = self.client.get("/api/pickup", params={"consignee": "ABC TRADING SDN BHD"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c["containerNumber"] for c in response.json()["data"]], ["ABCD1234567"])
+
+        self.client.post("/api/containers/update", json={"containerNumber": "ABCD1234567", "newStatus": "GATED_OUT"})
+        self.assertEqual(self.client.get("/api/pickup", params={"consignee": "ABC TRADING SDN BHD"}).json()["data"], [])
+        blocked = self.client.get("/api/pickup", params={
+            "agent": "MAERSK MALAYSIA", "eligible": "false", "profile": "voice",
+        }).json()["data"]
+        self.assertIn("Container status GATED_OUT not eligible for pickup", blocked[0]["pickupBlockers"])
+        self.assertEqual(self.client.get("/api/pickup").status_code, 400)
+
+    def test_yard_occupancy_follows_moves(self):
+        blocks = self.client.get("/api/yard/blocks").json()["data"]
+        self.assertEqual([block["block"] for block in blocks["blocks"]], ["A", "B", "CIC"])
+        self.client.post("/api/containers/update", json={
+            "containerNumber": "MSKU7654321", "newStatus": "AVAILABLE_FOR_DELIVERY", "location": "Block A-02"})
+        block_a = self.client.get("/api/yard/blocks/a", params={"profile": "voice"}).json()
+        self.assertEqual(block_a["data"]["containers"], 2)
+        self.assertEqual(block_a["data"]["rows"], {"2": 1, "15": 1})
+        self.assertEqual(len(block_a["containers"]), 2)
+        page = self.client.get("/api/yard/blocks/A", params={"limit": 1}).json()
+        self.assertEqual(len(page["containers"]), 1)
+        self.assertIsNotNone(page["nextCursor"])
+        self.assertEqual(self.client.get("/api/yard/blocks/CIC").json()["data"]["containers"], 0)
+
+    def test_vessel_schedule(self):
+        by_name = self.client.post("/api/vessels/schedule", json={"vesselName": "maya"})
+        self.assertEqual(by_name.json()["data"]["voyageNumber"], "MAY001E")
+        by_voyage = self.client.post("/api/vessels/schedule", json={"voyageNumber": "evg002w"})
+        self.assertEqual(by_voyage.json()["data"]["vesselName"], "EVERGREEN STAR")
+        missing = self.client.post("/api/vessels/schedule", json={"voyageNumber": "NOPE"})
+        self.assertEqual(missing.status_code, 404)
+
+    def test_berth_schedule_queries(self):
+        window = {"from": "2025-06-29T00:00:00Z", "to": "2025-06-30T00:00:00Z"}
+        arrivals = self.client.get("/api/vessels/arrivals", params=window).json()
+        self.assertEqual([v["voyageNumber"] for v in arrivals["data"]], ["EVG002W"])
+        occupancy = self.client.get("/api/berths/ct1-b3/occupancy", params=window).json()
+        self.assertEqual([v["voyageNumber"] for v in occupancy["data"]], ["MAY001E"])
+        at = self.client.get("/api/berths", params={"at": "2025-07-01T00:00:00+08:00"}).json()
+        self.assertEqual(sorted(at["data"]), ["CT1-B3", "CT2-B1"])
+        backwards = self.client.get("/api/vessels/arrivals", params={"from": window["to"], "to": window["from"]})
+        self.assertEqual(backwards.status_code, 400)
+
+    def test_reschedule_vessel_updates_berth_index(self):
+        eta = datetime.utcnow().replace(microsecond=0) + timedelta(hours=2)
+        response = self.client.post("/api/vessels/update", json={
+            "voyageNumber": "may001e", "berth": "ct2-b4",
+            "eta": eta.isoformat() + "Z", "etd": (eta + timedelta(days=1)).isoformat() + "Z",
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["eta"], eta.isoformat() + "Z")
+
+        tool = self.client.post("/api/vessels/schedule", json={"withinHours": 6}).json()
+        self.assertEqual([v["voyageNumber"] for v in tool["data"]], ["MAY001E"])
+        berth = self.client.post("/api/vessels/schedule", json={"berth": "CT2-B4", "withinHours": 3}).json()
+        self.assertEqual([v["voyageNumber"] for v in berth["data"]], ["MAY001E"])
+        self.assertEqual(self.client.post("/api/vessels/schedule", json={"berth": "CT2-B4"}).json()["data"], [])
+
+        invalid = self.client.post("/api/vessels/update", json={
+            "voyageNumber": "MAY001E", "etd": (eta - timedelta(hours=1)).isoformat() + "Z"})
+        self.assertEqual(invalid.status_code, 400)
+        missing = self.client.post("/api/vessels/update", json={"voyageNumber": "NOPE", "berth": "CT1-B1"})
+        self.assertEqual(missing.status_code, 404)
+
+    def test_submit_ssr(self):
+        response = self.client.post("/api/ssr/submit", json={
+            "containerNumber": "MSKU7654321",
+            "ssrType": "ITT",
+            "requestDetails": "Transfer to Terminal 2",
+        })
+        self.assertEqual(response.status_code, 200)
+        ssr_id = response.json()["data"]["id"]
+        dashboard = self.client.get("/api/dashboard?profile=dashboard").json()["data"]
+        self.assertIn(ssr_id, [ssr["id"] for ssr in dashboard["ssrRequests"]])
+        self.assertNotIn("requestDetails", dashboard["ssrRequests"][0])
+
+    def test_ssr_history_paginated_and_summary_bounded(self):
+        for i in range(7):
+            self.client.post("/api/ssr/submit", json={
+                "containerNumber": "ABCD1234567", "ssrType": "ITT", "requestDetails": f"Request {i}",
+            })
+        container = self.client.post("/api/containers/status", json={"containerNumber": "ABCD1234567"}).json()["data"]
+        self.assertEqual(len(container["recentSSRs"]), server.SSR_RECENT_LIMIT)
+
+        seen, ids, cursor = [], [], None
+        while True:
+            page = self.client.get("/api/containers/ABCD1234567/ssr",
+                                   params={"limit": 3, **({"cursor": cursor} if cursor else {})}).json()
+            seen.extend(ssr["requestDetails"] for ssr in page["data"])
+            ids.extend(ssr["id"] for ssr in page["data"])
+            cursor = page["nextCursor"]
+            if cursor is None:
+                break
+        self.assertEqual(seen, [f"Request {i}" for i in reversed(range(7))])
+        # Submitted within the same second, yet every SSR has its own id
+        self.assertEqual(ids, sorted(set(ids), reverse=True))
+        bad = self.client.get("/api/containers/ABCD1234567/ssr", params={"cursor": "nope"})
+        self.assertEqual(bad.status_code, 400)
+
+    def test_container_event_timeline(self):
+        for status, location in (("AVAILABLE_FOR_DELIVERY", "Block B-10"), ("GATED_OUT", None)):
+            self.client.post("/api/containers/update", json={
+                "containerNumber": "EFGH9876543", "newStatus": status, **({"location": location} if location else {})})
+        self.client.post("/api/containers/status", json={"containerNumber": "EFGH9876543"})
+        self.assertTrue(server.journal.flush())
+
+        events = self.client.get("/api/containers/EFGH9876543/events").json()["data"]
+        # A call is journaled once it completes, after the transitions it made
+        self.assertEqual([event["type"] for event in events], ["containerStatusChanged", "toolCall"] * 2 + ["toolCall"])
+        self.assertEqual(events[1]["tool"], "updateContainerStatus")
+        self.assertEqual(events[1]["data"]["request"]["newStatus"], "AVAILABLE_FOR_DELIVERY")
+
+        timeline = self.client.get("/api/containers/EFGH9876543/events",
+                                   params={"type": "containerStatusChanged", "limit": 1}).json()
+        self.assertEqual(timeline["data"][0]["data"]["to"], "AVAILABLE_FOR_DELIVERY")
+        rest = self.client.get("/api/containers/EFGH9876543/events",
+                               params={"type": "containerStatusChanged", "cursor": timeline["nextCursor"]}).json()
+        self.assertEqual([event["data"]["to"] for event in rest["data"]], ["GATED_OUT"])
+        self.assertIsNone(rest["nextCursor"])
+
+    def test_broadcast_reaches_websocket(self):
+        with self.client.websocket_connect("/ws") as ws:
+            self.client.post("/api/containers/status", json={"containerNumber": "ABCD1234567"})
+            event = ws.receive_json()
+        self.assertEqual(event["type"], "containerQueried")
+        self.assertEqual(event["containerNumber"], "ABCD1234567")
+
+
+if __name__ == "__main__":
+    unittest.main()
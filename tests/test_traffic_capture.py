@@ -0,0 +1,87 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from benchmarks.replay import group_records, load_capture
+from traffic_capture import TrafficCaptureMiddleware, TrafficRecorder
+
+
+class TrafficCaptureTest(unittest.TestCase):
+    """Capture format written by the server and read back by the replay tool"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def capture(self, name, calls):
+        path = os.path.join(self.tmp.name, name)
+        recorder = TrafficRecorder(path)
+        for offset, path_, body, status in calls:
+            recorder.record(offset, path_, body, status, 0.002)
+        recorder.close()
+        return path
+
+    def test_round_trip(self):
+        for name in ("capture.jsonl", "capture.jsonl.gz"):
+            path = self.capture(name, [
+                (0.5, "/api/containers/status", b'{"containerNumber": "ABCD1234567"}', 200),
+                (0.1, "/api/vessels/schedule", b'{"vesselName": "MAYA"}', 200),
+                (0.9, "/api/containers/status", b"not json", 422),
+            ])
+            header, records = load_capture(path)
+            self.assertIn("startedAt", header)
+            self.assertEqual([r["t"] for r in records], [0.1, 0.5, 0.9])
+            self.assertEqual(records[1]["b"], {"containerNumber": "ABCD1234567"})
+            self.assertEqual(records[2]["b"], "not json")
+            self.assertEqual(records[2]["s"], 422)
+
+    def test_lines_are_compact(self):
+        path = self.capture("capture.jsonl", [(1.0, "/api/ssr/submit", b'{"containerNumber": "X"}', 200)])
+        with open(path) as f:
+            line = f.readlines()[1]
+        self.assertNotIn(" ", line.strip())
+        self.assertEqual(set(json.loads(line)), {"t", "p", "b", "s", "ms"})
+
+    def test_query_string_captured_for_replay(self):
+        path = os.path.join(self.tmp.name, "capture.jsonl")
+        recorder = TrafficRecorder(path)
+
+        async def app(scope, receive, send):
+            await receive()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        async def receive():
+            return {"type": "http.request", "body": b'{"containerNumber": "X"}', "more_body": False}
+
+        async def send(message):
+            pass
+
+        middleware = TrafficCaptureMiddleware(app, lambda: recorder, ["/api/containers/status"])
+        for query in (b"profile=voice", b""):
+            asyncio.run(middleware({"type": "http", "path": "/api/containers/status", "query_string": query},
+                                   receive, send))
+        recorder.close()
+        _, records = load_capture(path)
+        self.assertEqual([r.get("q") for r in records], ["profile=voice", None])
+
+    def test_calls_grouped_per_container_in_order(self):
+        records = [
+            {"t": 0.0, "p": "/api/containers/status", "b": {"containerNumber": "ABCD1234567"}},
+            {"t": 0.1, "p": "/api/vessels/schedule", "b": {"vesselName": "MAYA"}},
+            {"t": 0.2, "p": "/api/containers/update", "b": {"containerNumber": "abcd1234567"}},
+            {"t": 0.3, "p": "/api/containers/status", "b": {"containerNumber": "EFGH9876543"}},
+            {"t": 0.4, "p": "/api/gatepass/generate", "b": {"containerNumber": "ABCD1234567"}},
+        ]
+        groups = group_records(records)
+        by_first_path = {tuple(r["p"] for r in group): group for group in groups}
+        self.assertIn(("/api/containers/status", "/api/containers/update", "/api/gatepass/generate"), by_first_path)
+        self.assertEqual(len(groups), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import asyncio
+import unittest
+
+from records import ContainerRecord
+from refresh import PeriodicRefresh
+from storage import MemoryStorage
+from yard import YardOccupancy, parse_location, yard_fields
+
+CONTAINERS = [
+    {"containerNumber": "AAAA0000001", "location": "Block A-15", "status": "DISCHARGED", "size": "40HC"},
+    {"containerNumber": "AAAA0000002", "location": "Block A-15", "status": "AVAILABLE_FOR_DELIVERY", "size": "20ST"},
+    {"containerNumber": "AAAA0000003", "location": "Block A-02", "status": "DISCHARGED", "size": "20ST"},
+    {"containerNumber": "CCCC0000001", "location": "CIC-01", "status": "CUSTOMS_HOLD", "size": "20ST"},
+    {"containerNumber": "GGGG0000001", "location": "Block B-01", "status": "GATED_OUT", "size": "20ST"},
+    {"containerNumber": "VVVV0000001", "location": "On vessel", "status": "ARRIVED", "size": "20ST"},
+]
+
+
+class ParseLocationTest(unittest.TestCase):
+    def test_blocks_and_facilities(self):
+        self.assertEqual(parse_location("Block A-15"), ("A", 15))
+        self.assertEqual(parse_location("block b - 08"), ("B", 8))
+        self.assertEqual(parse_location("CIC-01"), ("CIC", 1))
+        self.assertEqual(parse_location("On vessel"), (None, None))
+        self.assertEqual(parse_location(None), (None, None))
+
+    def test_gated_out_containers_leave_the_yard(self):
+        self.assertEqual(yard_fields({"location": "Block B-01", "status": "GATED_OUT"}),
+                         {"yardBlock": None, "yardRow": None})
+
+    def test_materialized_on_write(self):
+        record = ContainerRecord.new(CONTAINERS[0])
+        self.assertEqual((record["yardBlock"], record["yardRow"]), ("A", 15))
+        moved = record.replace({"location": "CIC-03"})
+        self.assertEqual((moved["yardBlock"], moved["yardRow"]), ("CIC", 3))
+
+
+class YardOccupancyTest(unittest.TestCase):
+    """Per-block counts loaded from storage and adjusted container by container"""
+
+    def setUp(self):
+        self.storage = MemoryStorage()
+        self.storage.containers.insert_many(CONTAINERS)
+        self.yard = YardOccupancy(lambda: self.storage)
+        self.yard.load()
+
+    def test_load(self):
+        summary = self.yard.summary()
+        self.assertEqual([block["block"] for block in summary["blocks"]], ["A", "CIC"])
+        self.assertEqual((summary["containers"], summary["teu"]), (4, 5))
+        block_a = self.yard.block("A")
+        self.assertEqual(block_a["rows"], {"2": 1, "15": 2})
+        self.assertEqual(block_a["byStatus"], {"AVAILABLE_FOR_DELIVERY": 1, "DISCHARGED": 2})
+        self.assertEqual(self.yard.block("CIC")["area"], "Customs Inspection Centre")
+
+    def test_apply_moves_counts(self):
+        old = self.storage.containers.get("AAAA0000003")
+        new = self.storage.containers.update("AAAA0000003", {"location": "Block B-04"})
+        self.assertEqual(self.yard.apply(old, new), ["A", "B"])
+        self.assertEqual(self.yard.block("B")["containers"], 1)
+
+        # Gating out removes it, and the emptied block disappears from the map
+        old, new = new, self.storage.containers.update("AAAA0000003", {"status": "GATED_OUT"})
+        self.assertEqual(self.yard.apply(old, new), ["B"])
+        self.assertNotIn("B", self.yard.blocks)
+        self.assertEqual(self.yard.block("B")["containers"], 0)
+
+        # Unrelated changes touch nothing
+        old = self.storage.containers.get("CCCC0000001")
+        self.assertEqual(self.yard.apply(old, self.storage.containers.update("CCCC0000001", {"charges": 10.0})), [])
+
+    def test_incremental_counts_match_a_reload(self):
+        moves = [("AAAA0000001", {"location": "CIC-02", "status": "CUSTOMS_HOLD"}),
+                 ("VVVV0000001", {"location": "Block C-07", "status": "DISCHARGED"}),
+                 ("CCCC0000001", {"status": "GATED_OUT"})]
+        for container_number, fields in moves:
+            old = self.storage.containers.get(container_number)
+            self.yard.apply(old, self.storage.containers.update(container_number, fields))
+        reloaded = YardOccupancy(lambda: self.storage)
+        reloaded.load()
+        self.assertEqual(self.yard.summary(), reloaded.summary())
+
+    def test_find_in_block(self):
+        self.assertEqual([c.containerNumber for c in self.storage.containers.find_in_block("A")],
+                         ["AAAA0000001", "AAAA0000002", "AAAA0000003"])
+        self.assertEqual([c.containerNumber for c in self.storage.containers.find_in_block("A", row=15, limit=1,
+                                                                                             after="AAAA0000001")],
+                         ["AAAA0000002"])
+        self.assertEqual(self.storage.containers.find_in_block("B"), [])
+
+
+class YardRefreshTest(unittest.IsolatedAsyncioTestCase):
+    """Counts rebuilt periodically pick up writes made by other workers"""
+
+    async def test_write_made_elsewhere_is_eventually_seen(self):
+        storage = MemoryStorage()
+        storage.containers.insert_many(CONTAINERS)
+        yard = YardOccupancy(lambda: storage)
+        yard.load()
+        refresh = PeriodicRefresh("yard", yard.fetch, yard.install, interval=0.01)
+        refresh.start()
+        self.addAsyncCleanup(refresh.stop)
+
+        # Another worker moves a container: this process's apply() never hears of it
+        storage.containers.update("VVVV0000001", {"location": "Block C-07", "status": "DISCHARGED"})
+        for _ in range(200):
+            if yard.block("C")["containers"]:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(yard.block("C")["containers"], 1)
+        self.assertEqual(yard.summary()["containers"], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
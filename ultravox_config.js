@@ -39,7 +39,7 @@ Response: "I'll update that container status in our OPUS system right now."
 Customer: "I need an eGatepass for container ABCD1234567 for ABC Logistics with truck WBE1234A"
 Response: "I'll generate that eGatepass for you right now through our ETP system."
 [Use generateEGatepass tool]
-"Excellent! I've generated eGatepass GP1719876543 for container ABCD1234567. The gatepass is valid for 48 hours and has been sent to ABC Logistics. Please ensure the truck driver has the reference number when arriving at the gate."
+"Excellent! I've generated eGatepass GP0370620648497049600 for container ABCD1234567. The gatepass is valid for 48 hours and has been sent to ABC Logistics. Please ensure the truck driver has the reference number when arriving at the gate."
 
 SYSTEM KNOWLEDGE:
 - ETP: Electronic Terminal Portal (primary customer interface)
@@ -65,6 +65,16 @@ Remember: You are a LIVE system agent with real database access. Always use your
 // Get backend URL from environment or use the external URL for Ultravox
 const BACKEND_URL = 'https://0796086f-31e6-4512-b74d-a8a43b1bdc46.preview.emergentagent.com';
 
+// Ask the backend for the trimmed "voice" response profile: only the fields
+// Aisha needs to answer, which keeps tool results small for the model
+const VOICE_RESPONSE_PROFILE = [
+    {
+        name: "profile",
+        location: "PARAMETER_LOCATION_QUERY",
+        value: "voice"
+    }
+];
+
 const ULTRAVOX_CALL_CONFIG = {
     systemPrompt: WESTPORTS_SYSTEM_PROMPT,
     model: 'fixie-ai/ultravox',
@@ -91,6 +101,7 @@ const ULTRAVOX_CALL_CONFIG = {
                             required: true
                         }
                     ],
+                    staticParameters: VOICE_RESPONSE_PROFILE,
                     http: {
                         baseUrlPattern: `${BACKEND_URL}/api/containers/status`,
                         httpMethod: "POST"
@@ -134,6 +145,7 @@ const ULTRAVOX_CALL_CONFIG = {
                             required: false
                         }
                     ],
+                    staticParameters: VOICE_RESPONSE_PROFILE,
                     http: {
                         baseUrlPattern: `${BACKEND_URL}/api/containers/update`,
                         httpMethod: "POST"
@@ -176,6 +188,7 @@ const ULTRAVOX_CALL_CONFIG = {
                             required: true
                         }
                     ],
+                    staticParameters: VOICE_RESPONSE_PROFILE,
                     http: {
                         baseUrlPattern: `${BACKEND_URL}/api/gatepass/generate`,
                         httpMethod: "POST"
@@ -188,7 +201,7 @@ const ULTRAVOX_CALL_CONFIG = {
                 name: "checkVesselSchedule",
                 description: "Check vessel arrival/departure schedule through CBAS system",
                 definition: {
-                    description: "Retrieves vessel schedule information including ETA, ETD, and berth allocation",
+                    description: "Retrieves vessel schedule information including ETA, ETD, and berth allocation for one vessel, or the arrivals and berth occupancy over the next hours",
                     dynamicParameters: [
                         {
                             name: "vesselName",
@@ -207,8 +220,27 @@ const ULTRAVOX_CALL_CONFIG = {
                                 description: "Voyage number"
                             },
                             required: false
+                        },
+                        {
+                            name: "berth",
+                            location: "PARAMETER_LOCATION_BODY",
+                            schema: {
+                                type: "string",
+                                description: "Berth (e.g. CT1-B3) to list the vessels alongside, when no vessel is given"
+                            },
+                            required: false
+                        },
+                        {
+                            name: "withinHours",
+                            location: "PARAMETER_LOCATION_BODY",
+                            schema: {
+                                type: "number",
+                                description: "Look ahead this many hours: arrivals port-wide, or the berth's vessels"
+                            },
+                            required: false
                         }
                     ],
+                    staticParameters: VOICE_RESPONSE_PROFILE,
                     http: {
                         baseUrlPattern: `${BACKEND_URL}/api/vessels/schedule`,
                         httpMethod: "POST"
@@ -252,6 +284,7 @@ const ULTRAVOX_CALL_CONFIG = {
                             required: true
                         }
                     ],
+                    staticParameters: VOICE_RESPONSE_PROFILE,
                     http: {
                         baseUrlPattern: `${BACKEND_URL}/api/ssr/submit`,
                         httpMethod: "POST"